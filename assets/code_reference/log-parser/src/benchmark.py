@@ -0,0 +1,122 @@
+"""
+Benchmark the Pydantic, fast and parallel parsing paths in lines per second.
+
+Writes a synthetic log (10 million lines by default, about 1 GB) to a
+temporary file unless --file is given, checks that both paths produce
+identical output on its first lines, then times each path over the whole
+file.
+
+Usage (from the project root):
+    python -m src.benchmark
+    python -m src.benchmark --lines 1000000
+    python -m src.benchmark --file app.log --mode fast --mode fast-tuples
+    python -m src.benchmark --mode fast --mode parallel-fast --workers 8
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, Optional
+from .parallel import iter_ndjson_file, iter_parse_file
+from .parser import LogParser
+
+LEVELS = ("INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR")
+MESSAGES = (
+    "GET /api/v1/orders 200 {ms}ms",
+    "User {n} logged in",
+    "Cache miss for key session:{n}",
+    "Payment {n} failed: card declined",
+    "Retrying upstream request, attempt {ms}",
+)
+# Lines compared between the paths before timing
+VERIFY_LINES = 100_000
+
+def read_lines(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8", buffering=1 << 20) as f:
+        yield from f
+
+# Each mode takes the log's path and the worker count (parallel modes only)
+MODES: Dict[str, Callable[[str, Optional[int]], Iterator]] = {
+    'pydantic': lambda path, workers: LogParser().iter_parse(read_lines(path)),
+    'fast': lambda path, workers: LogParser(fast=True).iter_parse(read_lines(path)),
+    'fast-tuples': lambda path, workers: LogParser(fast=True).iter_records(read_lines(path)),
+    'parallel': lambda path, workers: iter_parse_file(path, workers),
+    'parallel-fast': lambda path, workers: iter_parse_file(path, workers, fast=True),
+    # One item per NDJSON line, so records are counted like the other modes
+    'parallel-ndjson': lambda path, workers: itertools.chain.from_iterable(
+        itertools.repeat(None, chunk.count("\n")) for chunk in iter_ndjson_file(path, workers, fast=True)
+    ),
+}
+
+def write_synthetic_log(path: str, lines: int, seed: int = 0) -> None:
+    """
+    Writes `lines` log lines with millisecond timestamps a few ms apart,
+    about 1% of them malformed.
+    """
+    rng = random.Random(seed)
+    moment = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        for i in range(lines):
+            moment += timedelta(milliseconds=rng.randint(0, 5))
+            if rng.random() < 0.01:
+                f.write(f"corrupted line {i}\n")
+                continue
+            timestamp = moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+            message = rng.choice(MESSAGES).format(ms=rng.randint(1, 999), n=rng.randint(1, 10**6))
+            f.write(f"[{timestamp}] [{rng.choice(LEVELS)}] [{rng.getrandbits(64):016x}] {message}\n")
+
+def verify(path: str) -> None:
+    """Fails if the paths disagree on the first VERIFY_LINES lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        sample = list(itertools.islice(f, VERIFY_LINES))
+    if LogParser().parse_lines(sample) != LogParser(fast=True).parse_lines(sample):
+        raise SystemExit("Fast path output differs from the Pydantic path")
+
+def count_lines(path: str) -> int:
+    with open(path, "rb") as f:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+
+def run_mode(mode: str, path: str, lines: int, workers: Optional[int] = None) -> Dict[str, float]:
+    """Parses the whole file with one path and returns its throughput."""
+    start = time.perf_counter()
+    records = 0
+    for _ in MODES[mode](path, workers):
+        records += 1
+    elapsed = time.perf_counter() - start
+    return {'lines': lines, 'records': records, 'seconds': elapsed, 'lines_per_sec': lines / elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the log parsing paths.")
+    parser.add_argument("--lines", type=int, default=10_000_000, help="Lines in the synthetic log.")
+    parser.add_argument("--file", help="Benchmark an existing log instead of a synthetic one.")
+    parser.add_argument(
+        "--mode",
+        choices=sorted(MODES),
+        action="append",
+        help="Path to run (repeatable, default: all)."
+    )
+    parser.add_argument("--workers", type=int, help="Processes for the parallel modes (default: one per CPU).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.file
+        if path is None:
+            path = os.path.join(directory, "synthetic.log")
+            print(f"Writing {args.lines} synthetic lines...")
+            write_synthetic_log(path, args.lines)
+        verify(path)
+        lines = count_lines(path)
+
+        print(f"{'mode':<16} {'lines':>11} {'seconds':>9} {'lines/s':>11} {'speedup':>8}")
+        baseline = None
+        for mode in args.mode or list(MODES):
+            result = run_mode(mode, path, lines, args.workers)
+            baseline = baseline or result['lines_per_sec']
+            print(f"{mode:<16} {result['lines']:>11} {result['seconds']:>9.2f} "
+                  f"{result['lines_per_sec']:>11.0f} {result['lines_per_sec'] / baseline:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import re
+from datetime import datetime
+from typing import Dict, Optional
+from pydantic import TypeAdapter
+from .schema import LogEntry, LogLevel
+
+# Output field order, as in LogEntry and its JSON dump
+FIELDS = tuple(LogEntry.model_fields)
+
+LEVELS = frozenset(level.value for level in LogLevel)
+
+# Characters allowed by LogEntry's trace_id pattern ^[a-f0-9\-]+$
+TRACE_ID_CHARS = "abcdef0123456789-"
+
+# Minute prefix of the common timestamp shape, e.g. "2023-10-27T10:00:"
+MINUTE_PREFIX = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:")
+PREFIX_LENGTH = 17
+# Rest of the common shape: seconds, optional fraction, optional offset
+TIMESTAMP_REST = re.compile(r"([0-9]{2})(?:\.([0-9]{1,6}))?(Z|[+-][0-9]{2}:[0-9]{2})?")
+# Any valid minute, used to validate and format the rest on its own
+REFERENCE_PREFIX = "2000-01-01T00:00:"
+
+DATETIME = TypeAdapter(datetime)
+
+VALID, INVALID, IRREGULAR = "valid", "invalid", "irregular"
+MISSING = object()
+
+class TimestampCache:
+    """
+    Validates raw timestamps and returns them as LogEntry would serialize
+    them to JSON, or None if LogEntry would reject them.
+
+    Timestamps of the common shape are split into their minute prefix
+    ("2023-10-27T10:00:") and the rest ("05.123Z"). Validity of one does
+    not depend on the other, and both are written back unchanged apart
+    from the rest's normalized fraction and offset, so each part is
+    validated once and looked up in a dict afterwards. Rests that miss
+    the cache (e.g. microsecond timestamps) are assembled from their
+    seconds, fraction and a cached offset. Any other shape goes through
+    the Pydantic validator and serializer, cached by the full string.
+    """
+    MAX_ENTRIES = 65536
+
+    def __init__(self):
+        self._prefixes: Dict[str, str] = {}
+        self._rests: Dict[str, object] = {}
+        self._offsets: Dict[Optional[str], Optional[str]] = {}
+        self._full: Dict[str, Optional[str]] = {}
+
+    @staticmethod
+    def _serialize(raw: str) -> Optional[str]:
+        """The Pydantic path: LogEntry's validator, then its JSON form."""
+        try:
+            return DATETIME.dump_python(LogEntry.parse_timestamp(raw), mode="json")
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _remember(cache: dict, key, value):
+        if len(cache) >= TimestampCache.MAX_ENTRIES:
+            cache.clear()
+        cache[key] = value
+        return value
+
+    def _prefix_state(self, prefix: str) -> str:
+        if not MINUTE_PREFIX.fullmatch(prefix):
+            return IRREGULAR
+        serialized = self._serialize(prefix + "00")
+        if serialized is None:
+            return INVALID
+        # A valid minute is written back as is; anything else is left to Pydantic
+        return VALID if serialized[:PREFIX_LENGTH] == prefix else IRREGULAR
+
+    def _offset(self, offset: Optional[str]) -> Optional[str]:
+        """The serialized form of an offset ("Z", "+05:30" or ""), or None if invalid."""
+        suffix = self._offsets.get(offset, MISSING)
+        if suffix is MISSING:
+            serialized = self._serialize(REFERENCE_PREFIX + "00" + (offset or ""))
+            suffix = serialized[PREFIX_LENGTH + 2:] if serialized is not None else None
+            self._remember(self._offsets, offset, suffix)
+        return suffix
+
+    def _rest(self, rest: str) -> object:
+        """The serialized rest, None if invalid, or IRREGULAR."""
+        match = TIMESTAMP_REST.fullmatch(rest)
+        if match is None:
+            serialized = self._serialize(REFERENCE_PREFIX + rest)
+            if serialized is None:
+                return None
+            return IRREGULAR
+        seconds, fraction, offset = match.groups()
+        suffix = self._offset(offset)
+        if suffix is None or seconds > "59":
+            return None
+        # Microseconds are written as 6 digits, and not at all when zero
+        if fraction and fraction != "0" * len(fraction):
+            return seconds + "." + fraction.ljust(6, "0") + suffix
+        return seconds + suffix
+
+    def serialize(self, raw: str) -> Optional[str]:
+        prefix = raw[:PREFIX_LENGTH]
+        state = self._prefixes.get(prefix)
+        if state is None:
+            state = self._remember(self._prefixes, prefix, self._prefix_state(prefix))
+        if state is VALID:
+            rest = raw[PREFIX_LENGTH:]
+            serialized = self._rests.get(rest, MISSING)
+            if serialized is MISSING:
+                serialized = self._remember(self._rests, rest, self._rest(rest))
+            if serialized is not IRREGULAR:
+                return None if serialized is None else prefix + serialized
+        elif state is INVALID:
+            # The date or time of day is invalid, whatever follows
+            return None
+
+        serialized = self._full.get(raw, MISSING)
+        if serialized is MISSING:
+            serialized = self._remember(self._full, raw, self._serialize(raw))
+        return serialized
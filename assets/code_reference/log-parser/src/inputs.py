@@ -0,0 +1,140 @@
+import bz2
+import contextlib
+import glob
+import gzip
+import heapq
+import io
+import os
+import re
+import sys
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, TextIO
+from .parser import LogParser
+
+try:
+    import zstandard
+except ImportError:  # Only needed for .zst input
+    zstandard = None
+
+# Read size for compressed and plain files alike
+BUFFER_SIZE = 1 << 20
+
+# Leading bytes of each supported compression format
+MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bzip2",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+# Rotated names such as app.log, app.log.1 and app.log.2.gz
+ROTATED_NAME = re.compile(r"^(?P<base>.*?)(?:\.(?P<number>[0-9]+))?(?:\.(?:gz|bz2|zst))?$")
+
+def detect_compression(head: bytes) -> Optional[str]:
+    """
+    Returns the compression format of a stream from its first bytes,
+    or None for plain text.
+    """
+    for magic, name in MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+def _decompress(binary: io.BufferedReader):
+    compression = detect_compression(binary.peek(4)[:4])
+    if compression == "gzip":
+        stream = gzip.GzipFile(fileobj=binary)
+    elif compression == "bzip2":
+        stream = bz2.BZ2File(binary)
+    elif compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Reading .zst input requires the zstandard package.")
+        stream = zstandard.ZstdDecompressor().stream_reader(
+            binary, read_size=BUFFER_SIZE, read_across_frames=True, closefd=False
+        )
+    else:
+        return binary
+    return io.BufferedReader(stream, buffer_size=BUFFER_SIZE)
+
+@contextlib.contextmanager
+def open_input(path: str) -> Iterator[TextIO]:
+    """
+    Opens a log file as UTF-8 text, decompressing gzip, bzip2 and zstd
+    input on the fly (detected by magic bytes, not by file name).
+    "-" reads standard input.
+    """
+    with contextlib.ExitStack() as stack:
+        if path == "-":
+            binary = sys.stdin.buffer
+        else:
+            binary = stack.enter_context(open(path, "rb", buffering=BUFFER_SIZE))
+        stream = _decompress(binary)
+        if stream is not binary:
+            stack.callback(stream.close)
+        text = io.TextIOWrapper(stream, encoding="utf-8")
+        try:
+            yield text
+        finally:
+            # Don't let the wrapper close the underlying stdin
+            text.detach()
+
+def rotation_key(path: str):
+    """
+    Sorts rotated files oldest first: app.log.2.gz, app.log.1, app.log.
+    """
+    match = ROTATED_NAME.match(os.path.basename(path))
+    number = int(match.group("number") or 0)
+    return os.path.dirname(path), match.group("base"), -number, path
+
+def expand_inputs(specs: Iterable[str]) -> List[str]:
+    """
+    Expands the CLI's input arguments into file paths: directories give
+    the files in them, glob patterns the files they match, and "-" is kept
+    for standard input. Raises FileNotFoundError for anything else that
+    does not exist.
+    """
+    paths = []
+    for spec in specs:
+        if spec == "-":
+            paths.append(spec)
+        elif os.path.isdir(spec):
+            paths.extend(
+                sorted(
+                    entry.path for entry in os.scandir(spec)
+                    if entry.is_file() and not entry.name.startswith(".")
+                )
+            )
+        elif any(char in spec for char in "*?["):
+            matches = sorted(path for path in glob.glob(spec) if os.path.isfile(path))
+            if not matches:
+                raise FileNotFoundError(f"No files match '{spec}'.")
+            paths.extend(matches)
+        elif os.path.isfile(spec):
+            paths.append(spec)
+        else:
+            raise FileNotFoundError(f"File '{spec}' not found.")
+    return paths
+
+def timestamp_key(record: dict) -> datetime:
+    """
+    Orders records by their timestamp; timestamps without an offset are
+    taken as UTC so they compare with the others.
+    """
+    moment = datetime.fromisoformat(record["timestamp"])
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def iter_parse_files(log_parser: LogParser, paths: List[str]) -> Iterator[dict]:
+    """
+    Parses several logs into one stream ordered by timestamp, assuming each
+    file is in time order itself (as a log is). Files are read side by side
+    and merged, so only one pending record per file is held in memory.
+    Records with equal timestamps keep the order of rotation_key().
+    """
+    with contextlib.ExitStack() as stack:
+        streams = [
+            log_parser.iter_parse(stack.enter_context(open_input(path)))
+            for path in sorted(paths, key=rotation_key)
+        ]
+        if len(streams) == 1:
+            yield from streams[0]
+        else:
+            yield from heapq.merge(*streams, key=timestamp_key)
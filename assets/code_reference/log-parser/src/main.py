@@ -1,28 +1,127 @@
+import os
 import sys
 import json
 import argparse
-from pathlib import Path
+import contextlib
+from typing import Iterable, TextIO
+from .inputs import detect_compression, expand_inputs, iter_parse_files
+from .parallel import iter_ndjson_file, iter_parse_file
 from .parser import LogParser
+from .sinks import BATCH_SIZE, write_arrow, write_csv, write_parquet
+
+def write_ndjson(records: Iterable[dict], out: TextIO) -> None:
+    """
+    Writes one JSON record per line as soon as it is available.
+    """
+    for record in records:
+        out.write(json.dumps(record))
+        out.write("\n")
 
 def main():
     parser = argparse.ArgumentParser(description="Parse log files into structured JSON.")
-    parser.add_argument("file", help="Path to the log file to parse.")
+    parser.add_argument(
+        "files",
+        nargs="+",
+        metavar="file",
+        help="Log files, directories or glob patterns to parse, or - for standard input. "
+             "gzip, bzip2 and zstd files are decompressed on the fly; several files are "
+             "merged into one stream in timestamp order."
+    )
+    parser.add_argument(
+        "--format",
+        choices=("json", "ndjson", "csv", "arrow", "parquet"),
+        default="json",
+        help="json: one indented array once the input is parsed; "
+             "ndjson: one record per line, streamed in constant memory; "
+             "csv: a header row, then one row per record; "
+             "arrow: an Arrow IPC stream of record batches; "
+             "parquet: a dataset directory partitioned by date and level (needs --output)."
+    )
+    parser.add_argument("--output", help="Write to this file (a directory for parquet) instead of standard output.")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help="Records per batch for the csv, arrow and parquet formats."
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Validate without building Pydantic models (same output, several times faster)."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Parse the file in byte-range chunks on this many processes (0: one per CPU)."
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="With --workers, write chunks as they finish instead of in file order."
+    )
     args = parser.parse_args()
 
-    file_path = Path(args.file)
-    if not file_path.exists():
-        print(f"Error: File '{file_path}' not found.", file=sys.stderr)
+    if args.format == "parquet" and not args.output:
+        parser.error("--format parquet needs --output")
+
+    try:
+        paths = expand_inputs(args.files)
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    log_parser = LogParser()
+    if args.workers is not None:
+        if len(paths) != 1 or paths[0] == "-":
+            parser.error("--workers needs a single file, not several or standard input")
+        try:
+            with open(paths[0], "rb") as f:
+                head = f.read(4)
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if detect_compression(head):
+            parser.error("--workers needs an uncompressed file")
+
+    log_parser = LogParser(fast=args.fast)
 
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        with contextlib.ExitStack() as stack:
+            if args.format == "parquet":
+                out = None
+            elif args.format == "arrow":
+                out = stack.enter_context(open(args.output, "wb")) if args.output else sys.stdout.buffer
+            elif args.output:
+                out = stack.enter_context(open(args.output, "w", encoding="utf-8", newline=""))
+            else:
+                out = sys.stdout
+
+            if args.workers is not None:
+                options = dict(workers=args.workers or None, ordered=not args.unordered, fast=args.fast)
+                if args.format == "ndjson":
+                    # Workers serialize their own chunks; only writing is left here
+                    for chunk in iter_ndjson_file(paths[0], **options):
+                        out.write(chunk)
+                    return
+                records = iter_parse_file(paths[0], **options)
+            else:
+                # Lines are read and parsed lazily, one at a time
+                records = iter_parse_files(log_parser, paths)
 
-        parsed_logs = log_parser.parse_lines(lines)
-        print(json.dumps(parsed_logs, indent=2))
+            if args.format == "ndjson":
+                write_ndjson(records, out)
+            elif args.format == "csv":
+                write_csv(records, out, args.batch_size)
+            elif args.format == "arrow":
+                write_arrow(records, out, args.batch_size)
+            elif args.format == "parquet":
+                write_parquet(records, args.output, args.batch_size)
+            else:
+                print(json.dumps(list(records), indent=2), file=out)
 
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); silence the final flush
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
     except Exception as e:
         print(f"Error processing file: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,137 @@
+import io
+import json
+import mmap
+import os
+import queue
+from collections import deque
+from multiprocessing import Pool
+from typing import Iterator, List, Optional, Tuple
+from .fastpath import FIELDS
+from .parser import LogParser
+
+# Bytes per task: small enough to keep every worker busy and memory
+# bounded, large enough that scheduling and pickling stay cheap
+CHUNK_SIZE = 16 * 1024 * 1024
+# Chunks per worker dispatched ahead of the consumer
+IN_FLIGHT_PER_WORKER = 2
+
+# One parser per worker process, so its timestamp cache stays warm
+_parser: Optional[LogParser] = None
+
+def chunk_ranges(path: str, chunk_size: int = CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """
+    Splits a file into (start, end) byte ranges of about chunk_size bytes,
+    each ending just after a newline (or at the end of the file), so no
+    line is cut in two.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    ranges = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            newline = mm.find(b"\n", min(start + chunk_size, size) - 1)
+            end = size if newline == -1 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def _init_worker(fast: bool) -> None:
+    global _parser
+    _parser = LogParser(fast=fast)
+
+def _parse_range(task: Tuple[str, int, int, bool]):
+    """
+    Parses one byte range in a worker. Returns the chunk as NDJSON text if
+    asked to, else its records; the fast path sends tuples, which are
+    cheaper to send back than dicts.
+    """
+    path, start, end, as_ndjson = task
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    # Decoded the way open(path, "r", encoding="utf-8") would, newlines included
+    lines = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+    if as_ndjson:
+        # The lines write_ndjson() would write for these records
+        return "".join([json.dumps(record) + "\n" for record in _parser.iter_parse(lines)])
+    if _parser.fast:
+        return list(_parser.iter_records(lines))
+    return list(_parser.iter_parse(lines))
+
+def _map_chunks(path, workers, ordered, fast, chunk_size, as_ndjson) -> Iterator:
+    """
+    Yields the parsed chunks, keeping at most IN_FLIGHT_PER_WORKER chunks
+    per worker queued or finished but not yet consumed, so memory stays
+    bounded when the consumer is slower than the workers.
+    """
+    tasks = [(path, start, end, as_ndjson) for start, end in chunk_ranges(path, chunk_size)]
+    if not tasks:
+        return
+
+    processes = workers or os.cpu_count()
+    window = IN_FLIGHT_PER_WORKER * processes
+    with Pool(processes, initializer=_init_worker, initargs=(fast,)) as pool:
+        if ordered:
+            pending = deque()
+            for task in tasks:
+                if len(pending) >= window:
+                    yield pending.popleft().get()
+                pending.append(pool.apply_async(_parse_range, (task,)))
+            while pending:
+                yield pending.popleft().get()
+        else:
+            # Results and worker exceptions alike, in completion order
+            done = queue.SimpleQueue()
+            in_flight = 0
+            for task in tasks:
+                if in_flight >= window:
+                    yield _unwrap(done.get())
+                    in_flight -= 1
+                pool.apply_async(_parse_range, (task,), callback=done.put, error_callback=done.put)
+                in_flight += 1
+            for _ in range(in_flight):
+                yield _unwrap(done.get())
+
+def _unwrap(result):
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+def iter_parse_file(
+    path: str,
+    workers: Optional[int] = None,
+    ordered: bool = True,
+    fast: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[dict]:
+    """
+    Parses a log file on several cores and yields the same dictionaries as
+    LogParser(fast).iter_parse(open(path)). With ordered=False, chunks are
+    yielded as soon as they are parsed, in no particular order.
+    workers defaults to the number of CPUs.
+
+    Every record is still unpickled and yielded by this process, which
+    limits scaling; iter_ndjson_file() leaves it almost nothing to do.
+    """
+    for records in _map_chunks(path, workers, ordered, fast, chunk_size, False):
+        if fast:
+            for record in records:
+                yield dict(zip(FIELDS, record))
+        else:
+            yield from records
+
+def iter_ndjson_file(
+    path: str,
+    workers: Optional[int] = None,
+    ordered: bool = True,
+    fast: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Like iter_parse_file(), but the workers also serialize their records,
+    and each chunk is yielded as one string of NDJSON lines, exactly as
+    write_ndjson() would write them.
+    """
+    yield from _map_chunks(path, workers, ordered, fast, chunk_size, True)
@@ -1,7 +1,8 @@
 import re
 import json
-from typing import Optional, List
+from typing import Iterable, Iterator, Optional, List, Tuple
 from pydantic import ValidationError
+from .fastpath import FIELDS, LEVELS, TRACE_ID_CHARS, TimestampCache
 from .schema import LogEntry
 
 # Regex pattern to match the log format: [TIMESTAMP] [LEVEL] [TRACE_ID] MESSAGE
@@ -9,9 +10,22 @@ LOG_PATTERN = re.compile(
     r"^\[(?P<timestamp>.*?)\] \[(?P<level>.*?)\] \[(?P<trace_id>.*?)\] (?P<message>.*)$"
 )
 
+# Valid lines of the common shape in one step: fields cannot contain the
+# "]" that ends them, so each ends where LOG_PATTERN's lazy group would,
+# and level and trace_id are checked as LogEntry checks them
+FAST_LOG_PATTERN = re.compile(
+    r"\[([^\]\n]*)\] \[(" + "|".join(sorted(LEVELS)) + r")\] \[([" + re.escape(TRACE_ID_CHARS) + r"]+)\] (.*)"
+)
+
 class LogParser:
-    def __init__(self):
-        pass
+    def __init__(self, fast: bool = False):
+        """
+        With fast=True, iter_parse() and parse_lines() skip building
+        LogEntry models and validate with precompiled checks instead.
+        The output is identical either way.
+        """
+        self.fast = fast
+        self._timestamps = TimestampCache()
 
     def parse_line(self, line: str) -> Optional[LogEntry]:
         """
@@ -34,14 +48,60 @@ class LogParser:
         except ValidationError:
             return None
 
-    def parse_lines(self, lines: List[str]) -> List[dict]:
+    def parse_record(self, line: str) -> Optional[Tuple[str, str, str, str]]:
         """
-        Parses a list of lines and returns a list of valid log dictionaries.
+        Fast path for parse_line(): validates a line the way LogEntry does
+        and returns its JSON-ready fields (timestamp, level, trace_id,
+        message) as a tuple. Returns None if the line is malformed or invalid.
+        """
+        line = line.strip()
+        if not line:
+            return None
+
+        match = FAST_LOG_PATTERN.fullmatch(line)
+        if match:
+            timestamp, level, trace_id, message = match.groups()
+        else:
+            match = LOG_PATTERN.match(line)
+            if not match:
+                return None
+            timestamp, level, trace_id, message = match.groups()
+            # A non-empty trace_id made only of allowed characters strips to ""
+            if level not in LEVELS or not trace_id or trace_id.strip(TRACE_ID_CHARS):
+                return None
+        timestamp = self._timestamps.serialize(timestamp)
+        if timestamp is None:
+            return None
+        return timestamp, level, trace_id, message
+
+    def iter_records(self, lines: Iterable[str]) -> Iterator[Tuple[str, str, str, str]]:
+        """
+        Lazily yields parse_record() tuples for the valid lines.
         """
-        results = []
+        parse_record = self.parse_record
+        for line in lines:
+            record = parse_record(line)
+            if record is not None:
+                yield record
+
+    def iter_parse(self, lines: Iterable[str]) -> Iterator[dict]:
+        """
+        Lazily parses lines (e.g. an open file) and yields a dictionary for
+        each valid log line, so memory use does not grow with the input.
+        """
+        if self.fast:
+            for record in self.iter_records(lines):
+                yield dict(zip(FIELDS, record))
+            return
+
         for line in lines:
             entry = self.parse_line(line)
             if entry:
                 # Convert to dict, serialize datetime to string
-                results.append(json.loads(entry.model_dump_json()))
-        return results
+                yield json.loads(entry.model_dump_json())
+
+    def parse_lines(self, lines: Iterable[str]) -> List[dict]:
+        """
+        Parses a list of lines and returns a list of valid log dictionaries.
+        """
+        return list(self.iter_parse(lines))
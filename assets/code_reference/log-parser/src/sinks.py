@@ -0,0 +1,117 @@
+import csv
+import itertools
+from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator, TextIO, Union
+from .fastpath import FIELDS
+from .inputs import timestamp_key
+from .schema import LogEntry
+
+# Records per batch, so memory stays bounded whatever the input size
+BATCH_SIZE = 65536
+
+def _import_pyarrow():
+    """
+    Imports pyarrow on first use, so CSV and the CLI's JSON formats don't
+    pay for it (or need it installed).
+    """
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.ipc
+    except ImportError:
+        raise RuntimeError("Arrow and Parquet output require the pyarrow package.") from None
+    return pyarrow
+
+def arrow_schema() -> "pyarrow.Schema":
+    """
+    The Arrow schema of LogEntry: timestamps in UTC with microsecond
+    precision, the level enum and other strings as strings.
+    """
+    pyarrow = _import_pyarrow()
+    arrow_types = (
+        (datetime, pyarrow.timestamp("us", tz="UTC")),
+        (str, pyarrow.string()),  # Also LogLevel, a str enum
+    )
+    fields = []
+    for name, field in LogEntry.model_fields.items():
+        arrow_type = next(
+            arrow_type for python_type, arrow_type in arrow_types
+            if issubclass(field.annotation, python_type)
+        )
+        fields.append(pyarrow.field(name, arrow_type, nullable=not field.is_required()))
+    return pyarrow.schema(fields)
+
+def iter_batches(records: Iterable[dict], batch_size: int = BATCH_SIZE) -> Iterator[list]:
+    """
+    Groups records into lists of at most batch_size.
+    """
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def iter_record_batches(
+    records: Iterable[dict], batch_size: int = BATCH_SIZE
+) -> Iterator["pyarrow.RecordBatch"]:
+    """
+    Converts parsed records (as yielded by LogParser.iter_parse) into Arrow
+    record batches of at most batch_size rows. Timestamps without an offset
+    are taken as UTC.
+    """
+    pyarrow = _import_pyarrow()
+    schema = arrow_schema()
+    for batch in iter_batches(records, batch_size):
+        columns = {name: [record[name] for record in batch] for name in FIELDS}
+        columns["timestamp"] = [timestamp_key(record) for record in batch]
+        yield pyarrow.RecordBatch.from_pydict(columns, schema=schema)
+
+def write_arrow(records: Iterable[dict], out: Union[str, BinaryIO], batch_size: int = BATCH_SIZE) -> None:
+    """
+    Writes records in the Arrow IPC streaming format, one record batch at
+    a time. Read it back with pyarrow.ipc.open_stream().
+    """
+    pyarrow = _import_pyarrow()
+    schema = arrow_schema()
+    with pyarrow.ipc.new_stream(out, schema) as writer:
+        for batch in iter_record_batches(records, batch_size):
+            writer.write_batch(batch)
+
+def write_parquet(records: Iterable[dict], directory: str, batch_size: int = BATCH_SIZE) -> None:
+    """
+    Writes records as a Parquet dataset partitioned by UTC date and level,
+    e.g. directory/date=2023-10-27/level=INFO/part-0.parquet. Batches are
+    streamed to the writer, which flushes row groups of at most batch_size
+    rows. Every partition this run writes to is emptied first, so no parts
+    of an earlier, larger run are left behind; other partitions are kept.
+    """
+    pyarrow = _import_pyarrow()
+    schema = arrow_schema().append(pyarrow.field("date", pyarrow.date32(), nullable=False))
+
+    def with_date(batches):
+        for batch in batches:
+            date = pyarrow.compute.cast(batch.column("timestamp"), pyarrow.date32())
+            yield pyarrow.RecordBatch.from_arrays(batch.columns + [date], schema=schema)
+
+    pyarrow.dataset.write_dataset(
+        with_date(iter_record_batches(records, batch_size)),
+        directory,
+        schema=schema,
+        format="parquet",
+        partitioning=pyarrow.dataset.partitioning(
+            pyarrow.schema([schema.field("date"), schema.field("level")]), flavor="hive"
+        ),
+        max_rows_per_group=batch_size,
+        existing_data_behavior="delete_matching",
+    )
+
+def write_csv(records: Iterable[dict], out: TextIO, batch_size: int = BATCH_SIZE) -> None:
+    """
+    Writes records as CSV with a header row, values as in the JSON output.
+    """
+    writer = csv.writer(out)
+    writer.writerow(FIELDS)
+    for batch in iter_batches(records, batch_size):
+        writer.writerows([[record[name] for name in FIELDS] for record in batch])
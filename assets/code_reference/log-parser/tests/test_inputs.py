@@ -0,0 +1,67 @@
+import bz2
+import gzip
+import pytest
+from src.inputs import detect_compression, expand_inputs, iter_parse_files, open_input, rotation_key
+from src.parser import LogParser
+
+LOG = (
+    "[2023-10-27T10:00:00Z] [INFO] [abc-123] Line 1\n"
+    "Invalid Line\n"
+    "[2023-10-27T10:01:00Z] [ERROR] [def-456] Line 2\n"
+)
+
+def zstd_compress(data):
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+COMPRESSORS = {
+    "app.log": lambda data: data,
+    "app.log.gz": gzip.compress,
+    "app.log.bz2": bz2.compress,
+    "app.log.zst": zstd_compress,
+}
+
+@pytest.mark.parametrize("name", sorted(COMPRESSORS))
+def test_open_input_decompresses_by_magic_bytes(tmp_path, name):
+    # The name is misleading on purpose: only the content decides
+    log_file = tmp_path / "renamed.txt"
+    log_file.write_bytes(COMPRESSORS[name](LOG.encode("utf-8")))
+    with open_input(str(log_file)) as f:
+        assert f.read() == LOG
+
+def test_detect_compression():
+    assert detect_compression(gzip.compress(b"x")[:4]) == "gzip"
+    assert detect_compression(b"BZh9") == "bzip2"
+    assert detect_compression(LOG.encode("utf-8")[:4]) is None
+
+def test_expand_inputs(tmp_path):
+    for name in ("app.log", "app.log.1", ".hidden"):
+        (tmp_path / name).write_text(LOG, encoding="utf-8")
+    (tmp_path / "archive").mkdir()
+
+    assert expand_inputs([str(tmp_path)]) == [str(tmp_path / "app.log"), str(tmp_path / "app.log.1")]
+    assert expand_inputs([str(tmp_path / "*.1"), "-"]) == [str(tmp_path / "app.log.1"), "-"]
+    with pytest.raises(FileNotFoundError):
+        expand_inputs([str(tmp_path / "missing.log")])
+    with pytest.raises(FileNotFoundError):
+        expand_inputs([str(tmp_path / "*.gz")])
+
+def test_rotated_files_sort_oldest_first():
+    paths = ["logs/app.log", "logs/app.log.1", "logs/app.log.10.gz", "logs/app.log.2.gz"]
+    assert sorted(paths, key=rotation_key) == [
+        "logs/app.log.10.gz", "logs/app.log.2.gz", "logs/app.log.1", "logs/app.log"
+    ]
+
+def test_files_are_merged_in_timestamp_order(tmp_path):
+    (tmp_path / "a.log").write_text(
+        "[2023-10-27T10:00:00Z] [INFO] [a] 1\n"
+        "[2023-10-27T12:30:00+02:00] [INFO] [a] 3\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "b.log.gz").write_bytes(gzip.compress(
+        b"[2023-10-27T10:15:00] [INFO] [b] 2\n"
+        b"[2023-10-27T11:00:00Z] [INFO] [b] 4\n"
+    ))
+    paths = expand_inputs([str(tmp_path)])
+    records = list(iter_parse_files(LogParser(fast=True), paths))
+    assert [record["message"] for record in records] == ["1", "2", "3", "4"]
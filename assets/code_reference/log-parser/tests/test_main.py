@@ -0,0 +1,88 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+import pytest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+LOG = (
+    "[2023-10-27T10:00:00Z] [INFO] [abc-123] Line 1\n"
+    "Invalid Line\n"
+    "[2023-10-27T10:01:00Z] [ERROR] [def-456] Line 2\n"
+)
+
+def run_cli(*args, stdin=None):
+    return subprocess.run(
+        [sys.executable, "-m", "src.main", *args],
+        cwd=PROJECT_ROOT,
+        input=stdin,
+        capture_output=True,
+        text=True,
+    )
+
+def test_ndjson_from_stdin():
+    result = run_cli("-", "--format", "ndjson", stdin=LOG)
+    assert result.returncode == 0
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [record["message"] for record in records] == ["Line 1", "Line 2"]
+
+def test_ndjson_matches_json_output(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_text(LOG, encoding="utf-8")
+    array = json.loads(run_cli(str(log_file)).stdout)
+    lines = run_cli(str(log_file), "--format", "ndjson").stdout.splitlines()
+    assert [json.loads(line) for line in lines] == array
+
+def test_missing_file():
+    result = run_cli("does-not-exist.log")
+    assert result.returncode == 1
+    assert "not found" in result.stderr
+
+def test_fast_matches_default_output():
+    assert run_cli("-", "--fast", stdin=LOG).stdout == run_cli("-", stdin=LOG).stdout
+
+def test_workers_match_serial_output(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_text(LOG * 100, encoding="utf-8")
+    parallel = run_cli(str(log_file), "--workers", "2", "--format", "ndjson")
+    assert parallel.returncode == 0
+    assert parallel.stdout == run_cli(str(log_file), "--format", "ndjson").stdout
+
+def test_workers_need_a_file():
+    result = run_cli("-", "--workers", "2", stdin=LOG)
+    assert result.returncode == 2
+
+@pytest.mark.skipif(os.name != "posix" or os.geteuid() == 0, reason="needs a file the user cannot read")
+def test_workers_report_unreadable_file(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_text(LOG, encoding="utf-8")
+    log_file.chmod(0)
+    result = run_cli(str(log_file), "--workers", "2")
+    assert result.returncode == 1
+    assert result.stderr.startswith("Error:") and "Traceback" not in result.stderr
+
+def test_rotated_set_from_a_glob(tmp_path):
+    (tmp_path / "app.log.1.gz").write_bytes(gzip.compress(LOG.encode("utf-8")))
+    (tmp_path / "app.log").write_text(
+        "[2023-10-27T10:02:00Z] [INFO] [abc-789] Line 3\n", encoding="utf-8"
+    )
+    result = run_cli(str(tmp_path / "app.log*"), "--format", "ndjson")
+    assert result.returncode == 0
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [record["message"] for record in records] == ["Line 1", "Line 2", "Line 3"]
+
+def test_parquet_needs_output():
+    result = run_cli("-", "--format", "parquet", stdin=LOG)
+    assert result.returncode == 2
+
+def test_csv_to_output_file(tmp_path):
+    output = tmp_path / "out.csv"
+    result = run_cli("-", "--format", "csv", "--output", str(output), stdin=LOG)
+    assert result.returncode == 0
+    assert output.read_text(encoding="utf-8").splitlines()[1:] == [
+        "2023-10-27T10:00:00Z,INFO,abc-123,Line 1",
+        "2023-10-27T10:01:00Z,ERROR,def-456,Line 2",
+    ]
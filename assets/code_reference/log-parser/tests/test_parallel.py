@@ -0,0 +1,60 @@
+import json
+import pytest
+from src.parallel import chunk_ranges, iter_ndjson_file, iter_parse_file
+from src.parser import LogParser
+
+LINES = [
+    "[2023-10-27T10:00:00Z] [INFO] [abc-123] Line 1\n",
+    "Invalid Line\r\n",
+    "[2023-10-27T10:01:00.5+02:00] [ERROR] [def-456] Ünïcode ✓\n",
+    "\n",
+    "[2023-10-27T10:02:00Z] [WARN] [0-0] No trailing newline",
+]
+
+def write_log(tmp_path, copies=50):
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes("".join(LINES * copies).encode("utf-8"))
+    return str(log_file)
+
+def serial(path, fast=False):
+    with open(path, "r", encoding="utf-8") as f:
+        return LogParser(fast=fast).parse_lines(f)
+
+def test_chunks_cover_the_file_on_line_boundaries(tmp_path):
+    path = write_log(tmp_path)
+    data = open(path, "rb").read()
+    ranges = chunk_ranges(path, chunk_size=100)
+    assert len(ranges) > 10
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and data[end - 1:end] == b"\n"
+
+def test_chunks_of_an_empty_file(tmp_path):
+    empty = tmp_path / "empty.log"
+    empty.write_bytes(b"")
+    assert chunk_ranges(str(empty)) == []
+    assert list(iter_parse_file(str(empty), workers=2)) == []
+
+def test_ordered_output_matches_the_serial_parser(tmp_path):
+    path = write_log(tmp_path)
+    for fast in (False, True):
+        parallel = list(iter_parse_file(path, workers=2, fast=fast, chunk_size=100))
+        assert parallel == serial(path, fast)
+
+def test_unordered_output_has_the_same_records(tmp_path):
+    path = write_log(tmp_path)
+    parallel = iter_parse_file(path, workers=2, ordered=False, fast=True, chunk_size=100)
+    key = lambda record: sorted(record.items())
+    assert sorted(parallel, key=key) == sorted(serial(path), key=key)
+
+def test_ndjson_chunks_match_the_serial_records(tmp_path):
+    path = write_log(tmp_path)
+    text = "".join(iter_ndjson_file(path, workers=2, fast=True, chunk_size=100))
+    assert [json.loads(line) for line in text.splitlines()] == serial(path)
+
+def test_worker_errors_reach_the_caller(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes("".join(LINES * 50).encode("utf-8") + b"\xff\xfe\n")
+    for ordered in (True, False):
+        with pytest.raises(UnicodeDecodeError):
+            list(iter_parse_file(str(log_file), workers=2, ordered=ordered, chunk_size=100))
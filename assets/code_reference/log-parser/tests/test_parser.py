@@ -1,3 +1,4 @@
+import itertools
 import pytest
 from src.parser import LogParser
 from src.schema import LogLevel
@@ -49,3 +50,43 @@ def test_parse_multiple_lines(parser):
     assert results[0]["message"] == "Line 1"
     assert results[1]["message"] == "Line 2"
     assert results[1]["level"] == "ERROR"
+
+def test_iter_parse_is_lazy(parser):
+    # An endless input still yields records one at a time
+    lines = itertools.cycle([
+        "[2023-10-27T10:00:00Z] [INFO] [abc-123] Line 1",
+        "Invalid Line",
+    ])
+    records = parser.iter_parse(lines)
+    assert next(records)["message"] == "Line 1"
+    assert next(records)["trace_id"] == "abc-123"
+
+EDGE_CASE_LINES = [
+    "[2023-10-27T10:00:00Z] [INFO] [abc-123] Line 1",
+    "  [2023-10-27T10:00:05.123+05:30] [WARN] [0-0-] Padded  \n",
+    "[2023-10-27T10:00:05.1234567Z] [DEBUG] [abc] Too many fraction digits",
+    "[2023-10-27T10:00:05.000Z] [INFO] [abc] Zero fraction",
+    "[2023-10-27 10:00:05] [INFO] [abc] Space separator",
+    "[1698400805] [INFO] [abc] Unix time",
+    "[2023-02-30T10:00:00Z] [INFO] [abc] No such day",
+    "[2023-10-27T10:00:60Z] [INFO] [abc] Leap second",
+    "[2023-10-27T10:00:00Z] [info] [abc] Lowercase level",
+    "[2023-10-27T10:00:00Z] [INFO] [ABC] Uppercase trace id",
+    "[2023-10-27T10:00:00Z] [INFO] [] Empty trace id",
+    "[2023-10-27T10:00:00Z] [ERROR] [abc] Message with ] [ brackets",
+    "[2023-10-27T10:00:00]Z] [ERROR] [abc] Bracket in timestamp",
+]
+
+def test_fast_path_matches_pydantic_path():
+    expected = LogParser().parse_lines(EDGE_CASE_LINES)
+    # Parse twice so the second pass is served from the timestamp cache
+    fast = LogParser(fast=True)
+    assert fast.parse_lines(EDGE_CASE_LINES) == expected
+    assert fast.parse_lines(EDGE_CASE_LINES) == expected
+
+def test_iter_records_yields_tuples():
+    records = list(LogParser(fast=True).iter_records(EDGE_CASE_LINES[:2]))
+    assert records == [
+        ("2023-10-27T10:00:00Z", "INFO", "abc-123", "Line 1"),
+        ("2023-10-27T10:00:05.123000+05:30", "WARN", "0-0-", "Padded"),
+    ]
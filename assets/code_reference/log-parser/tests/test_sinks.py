@@ -0,0 +1,66 @@
+import csv
+import io
+import pytest
+from datetime import datetime, timezone
+from src.parser import LogParser
+from src.sinks import arrow_schema, iter_record_batches, write_arrow, write_csv, write_parquet
+
+LINES = [
+    "[2023-10-27T23:59:59.5Z] [INFO] [abc-123] Line 1",
+    "Invalid Line",
+    "[2023-10-28T01:00:00+05:30] [ERROR] [def-456] Line 2, \"quoted\"",
+    "[2023-10-28T01:00:00] [INFO] [abc-789] Line 3",
+]
+
+def records():
+    return LogParser().iter_parse(LINES)
+
+@pytest.fixture
+def pyarrow():
+    # Optional: only the Arrow and Parquet sinks need it
+    pytest.importorskip("pyarrow.ipc")
+    pytest.importorskip("pyarrow.parquet")
+    return pytest.importorskip("pyarrow")
+
+def test_schema_follows_log_entry(pyarrow):
+    schema = arrow_schema()
+    assert schema.names == ["timestamp", "level", "trace_id", "message"]
+    assert schema.field("timestamp").type == pyarrow.timestamp("us", tz="UTC")
+
+def test_record_batches_are_bounded(pyarrow):
+    batches = list(iter_record_batches(records(), batch_size=2))
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert batches[0].column("timestamp")[1].as_py() == datetime(2023, 10, 27, 19, 30, tzinfo=timezone.utc)
+
+def test_arrow_stream_round_trip(pyarrow):
+    out = io.BytesIO()
+    write_arrow(records(), out, batch_size=2)
+    table = pyarrow.ipc.open_stream(out.getvalue()).read_all()
+    assert table.schema == arrow_schema()
+    assert table.column("message").to_pylist() == ["Line 1", 'Line 2, "quoted"', "Line 3"]
+
+def test_parquet_is_partitioned_by_date_and_level(tmp_path, pyarrow):
+    write_parquet(records(), str(tmp_path), batch_size=2)
+    files = sorted(str(path.relative_to(tmp_path)) for path in tmp_path.rglob("*.parquet"))
+    assert files == [
+        "date=2023-10-27/level=ERROR/part-0.parquet",
+        "date=2023-10-27/level=INFO/part-0.parquet",
+        "date=2023-10-28/level=INFO/part-0.parquet",
+    ]
+    table = pyarrow.parquet.read_table(str(tmp_path)).sort_by("timestamp")
+    assert table.column("trace_id").to_pylist() == ["def-456", "abc-123", "abc-789"]
+
+def test_parquet_rewrite_drops_stale_parts(tmp_path, pyarrow):
+    write_parquet(records(), str(tmp_path), batch_size=2)
+    # A part only a larger earlier run would have written
+    partition = tmp_path / "date=2023-10-27" / "level=INFO"
+    (partition / "part-1.parquet").write_bytes((partition / "part-0.parquet").read_bytes())
+    write_parquet(records(), str(tmp_path), batch_size=2)
+    assert sorted(path.name for path in partition.iterdir()) == ["part-0.parquet"]
+    assert pyarrow.parquet.read_table(str(tmp_path)).num_rows == 3
+
+def test_csv_matches_json_values():
+    out = io.StringIO()
+    write_csv(records(), out, batch_size=2)
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert rows == list(records())
@@ -0,0 +1,228 @@
+"""
+Alternative rate limiting algorithms behind the StorageBackend interface.
+
+All of them read `capacity` and `refill_rate` like the token bucket:
+`capacity` requests may pass in a burst, and the sustained rate is
+`refill_rate` per second. The window-based ones therefore use a window of
+capacity / refill_rate seconds holding at most `capacity` requests.
+
+- GCRAStorage: Generic Cell Rate Algorithm. Admits exactly what the token
+  bucket admits, but the whole state is one float per key: the
+  theoretical arrival time (TAT) of the next request.
+- SlidingWindowCounterStorage: counts per fixed window and weights the
+  previous window by how much of it still overlaps the sliding window.
+  Three numbers per key; an approximation that smooths window edges.
+- SlidingWindowLogStorage: keeps the timestamp of every admitted request
+  in the window. Exact, but memory grows with `capacity`.
+
+With a refill_rate of 0 there is no window; as with the token bucket, a
+key gets a fixed allowance of `capacity` that is never refilled.
+
+Like ShardedInMemoryStorage, keys are spread over independently locked
+stripes.
+"""
+import abc
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Sequence, Tuple
+
+from .storage import RateLimitResult, StorageBackend, TokenRequest
+
+
+class _StripedStorage(StorageBackend):
+    """
+    Lock striping and batch handling shared by the algorithms below.
+    Subclasses decide a request in two steps so a batch can be checked in
+    full before anything is charged: _check() returns the seconds until
+    the cost would fit (0.0 if it fits now) and _commit() charges it.
+    Both are called with the key's stripe locked, and only for a positive
+    refill_rate; fixed allowances are handled here.
+    """
+
+    def __init__(self, shards: int = 64):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self._shards = shards
+        self._states = [{} for _ in range(shards)]
+        # Cost charged so far per key, for requests with no refill
+        self._spent = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def __len__(self) -> int:
+        return sum(len(states.keys() | spent.keys()) for states, spent in zip(self._states, self._spent))
+
+    def _shard(self, key: str) -> int:
+        return hash(key) % self._shards
+
+    @abc.abstractmethod
+    def _check(self, states: Dict[str, Any], key: str, now: float, capacity: int, refill_rate: float, cost: float) -> float:
+        pass
+
+    @abc.abstractmethod
+    def _commit(self, states: Dict[str, Any], key: str, now: float, capacity: int, refill_rate: float, cost: float) -> None:
+        pass
+
+    def _check_request(self, shard: int, key: str, now: float, capacity: int, refill_rate: float, cost: float) -> float:
+        if refill_rate <= 0:
+            # Like the token bucket: capacity in total, never refilled
+            return 0.0 if self._spent[shard].get(key, 0.0) + cost <= capacity else math.inf
+        return self._check(self._states[shard], key, now, capacity, refill_rate, cost)
+
+    def _commit_request(self, shard: int, key: str, now: float, capacity: int, refill_rate: float, cost: float) -> None:
+        if refill_rate <= 0:
+            spent = self._spent[shard]
+            spent[key] = spent.get(key, 0.0) + cost
+        else:
+            self._commit(self._states[shard], key, now, capacity, refill_rate, cost)
+
+    def take_token(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> bool:
+        shard = self._shard(key)
+        with self._locks[shard]:
+            current_time = time.monotonic()
+            if self._check_request(shard, key, current_time, capacity, refill_rate, cost) > 0:
+                return False
+            self._commit_request(shard, key, current_time, capacity, refill_rate, cost)
+            return True
+
+    def take_tokens(self, requests: Sequence[TokenRequest]) -> RateLimitResult:
+        # Costs for a repeated key add up; its first request's limits apply
+        demand: Dict[str, Tuple[TokenRequest, float]] = {}
+        for request in requests:
+            if request.cost < 0:
+                raise ValueError("cost must not be negative")
+            first, total = demand.get(request.key, (request, 0.0))
+            demand[request.key] = (first, total + request.cost)
+
+        shards = {key: self._shard(key) for key in demand}
+        # Lock stripes in index order so concurrent batches cannot deadlock
+        locks = [self._locks[shard] for shard in sorted(set(shards.values()))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            current_time = time.monotonic()
+            retry_after = 0.0
+            for key, (request, total) in demand.items():
+                retry_after = max(retry_after, self._check_request(
+                    shards[key], key, current_time, request.capacity, request.refill_rate, total
+                ))
+            if retry_after > 0:
+                return RateLimitResult(False, retry_after)
+            for key, (request, total) in demand.items():
+                self._commit_request(
+                    shards[key], key, current_time, request.capacity, request.refill_rate, total
+                )
+            return RateLimitResult(True)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+
+class GCRAStorage(_StripedStorage):
+    """
+    GCRA: one float per key. Each request pushes the key's theoretical
+    arrival time (TAT) forward by cost / refill_rate; a request is allowed
+    while the TAT stays within capacity / refill_rate of now.
+    """
+
+    def _check(self, states, key, now, capacity, refill_rate, cost):
+        if cost > capacity:
+            return math.inf
+        tat = max(states.get(key, now), now)
+        allow_at = tat + (cost - capacity) / refill_rate
+        return max(0.0, allow_at - now)
+
+    def _commit(self, states, key, now, capacity, refill_rate, cost):
+        if cost:
+            states[key] = max(states.get(key, now), now) + cost / refill_rate
+
+
+class _WindowCounter:
+    __slots__ = ('window_start', 'previous', 'current')
+
+    def __init__(self, window_start: float):
+        self.window_start = window_start
+        self.previous = 0.0
+        self.current = 0.0
+
+
+class SlidingWindowCounterStorage(_StripedStorage):
+    """
+    Sliding window counter: requests are counted per fixed window of
+    capacity / refill_rate seconds, and the previous window's count is
+    weighted by the fraction of it the sliding window still covers.
+    """
+
+    def _window(self, states, key, now, window) -> _WindowCounter:
+        counter = states.get(key)
+        if counter is None:
+            counter = states[key] = _WindowCounter(now - now % window)
+        # Roll forward to the window containing now
+        elapsed_windows = int((now - counter.window_start) // window)
+        if elapsed_windows >= 1:
+            counter.previous = counter.current if elapsed_windows == 1 else 0.0
+            counter.current = 0.0
+            counter.window_start += elapsed_windows * window
+        return counter
+
+    def _check(self, states, key, now, capacity, refill_rate, cost):
+        if cost > capacity:
+            return math.inf
+        window = capacity / refill_rate
+        counter = self._window(states, key, now, window)
+        into = now - counter.window_start
+        room = capacity - counter.current - cost
+        if counter.previous * (1 - into / window) <= room:
+            return 0.0
+        if room >= 0:
+            # Wait for the previous window's weight to decay enough
+            return window * (1 - room / counter.previous) - into
+        # Not before the next window, once this one has decayed enough
+        decay = window * (1 - (capacity - cost) / counter.current)
+        return window - into + max(0.0, decay)
+
+    def _commit(self, states, key, now, capacity, refill_rate, cost):
+        states[key].current += cost
+
+
+class _RequestLog:
+    __slots__ = ('entries', 'total')
+
+    def __init__(self):
+        self.entries = deque()  # (timestamp, cost) of admitted requests
+        self.total = 0.0
+
+
+class SlidingWindowLogStorage(_StripedStorage):
+    """
+    Sliding window log: admits a request if the costs logged in the last
+    capacity / refill_rate seconds plus its own stay within capacity.
+    """
+
+    def _check(self, states, key, now, capacity, refill_rate, cost):
+        if cost > capacity:
+            return math.inf
+        window = capacity / refill_rate
+        log = states.get(key)
+        if log is None:
+            log = states[key] = _RequestLog()
+        entries = log.entries
+        while entries and entries[0][0] <= now - window:
+            log.total -= entries.popleft()[1]
+
+        excess = log.total + cost - capacity
+        if excess <= 0:
+            return 0.0
+        # Wait until enough of the oldest entries leave the window
+        freed = 0.0
+        for timestamp, entry_cost in entries:
+            freed += entry_cost
+            if freed >= excess:
+                return timestamp + window - now
+        return math.inf
+
+    def _commit(self, states, key, now, capacity, refill_rate, cost):
+        log = states[key]
+        log.entries.append((now, cost))
+        log.total += cost
@@ -0,0 +1,283 @@
+"""
+Multi-threaded benchmark for the storage backends.
+
+Every thread calls take_token() in a tight loop on keys drawn from a shared
+key space for a fixed duration. Reports throughput and p50/p99 latency per
+backend.
+
+With --processes N, every backend is driven from N processes at once.
+Besides throughput, each process then draws from one shared "enforced"
+bucket, showing whether the backend applies a single limit across
+processes (admitted == limit) or one per process (N times the limit).
+
+With --memory N, each backend instead tracks N distinct keys in a fresh
+process and reports the resident memory per key.
+
+The gcra, sliding-counter and sliding-log backends run the alternative
+algorithms from src.algorithms, so the same runs compare them with the
+token bucket. leased-shm puts a LeasedStorage in front of shm, leasing
+tokens in batches instead of locking the shared table on every call.
+
+Usage (from the project root):
+    python -m src.benchmark --threads 8 --keys 1000 --duration 2
+    python -m src.benchmark --processes 4 --threads 2
+    python -m src.benchmark --memory 10000000
+"""
+import argparse
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.storage import StorageBackend, InMemoryStorage, ShardedInMemoryStorage
+from src.shm_storage import SharedMemoryStorage
+from src.leased_storage import LeasedStorage
+from src.algorithms import GCRAStorage, SlidingWindowCounterStorage, SlidingWindowLogStorage
+
+def temporary_shm_storage() -> SharedMemoryStorage:
+    """SharedMemoryStorage on a new temporary file, unlinked once mapped."""
+    fd, path = tempfile.mkstemp(prefix="ratelimit-")
+    os.close(fd)
+    storage = SharedMemoryStorage(path)
+    os.unlink(path)
+    return storage
+
+
+def leased_shm_storage(path: Optional[str] = None) -> LeasedStorage:
+    """LeasedStorage over SharedMemoryStorage at `path`, or a temporary one."""
+    return LeasedStorage(SharedMemoryStorage(path) if path else temporary_shm_storage())
+
+
+BACKENDS: Dict[str, Callable[[], StorageBackend]] = {
+    'memory': InMemoryStorage,
+    'sharded': ShardedInMemoryStorage,
+    'sharded-ttl': functools.partial(ShardedInMemoryStorage, idle_ttl=3600.0),
+    'shm': temporary_shm_storage,
+    'leased-shm': leased_shm_storage,
+    'gcra': GCRAStorage,
+    'sliding-counter': SlidingWindowCounterStorage,
+    'sliding-log': SlidingWindowLogStorage,
+}
+
+# Keys are pre-drawn per thread so the RNG stays out of the timed loop
+KEY_SEQUENCE_LENGTH = 10_000
+# Shared bucket used to check cross-process enforcement
+ENFORCED_LIMIT = 1000
+
+
+def percentile(sorted_values: List[int], fraction: float) -> int:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def collect_latencies(
+    storage: StorageBackend,
+    threads: int,
+    keys: int,
+    duration: float,
+    capacity: int = 100,
+    refill_rate: float = 50.0,
+    seed: int = 0,
+) -> Tuple[List[int], float]:
+    """
+    Hammer `storage` from `threads` threads for `duration` seconds.
+
+    Returns:
+        (sorted per-call latencies in ns, elapsed seconds)
+    """
+    key_space = [f"user_{i}" for i in range(keys)]
+    latencies: List[List[int]] = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+    deadline = 0.0
+
+    def worker(index: int):
+        rng = random.Random(seed * threads + index)
+        sequence = [rng.choice(key_space) for _ in range(KEY_SEQUENCE_LENGTH)]
+        samples = latencies[index]
+        take_token = storage.take_token
+        clock = time.perf_counter_ns
+        barrier.wait()
+        i = 0
+        while time.perf_counter() < deadline:
+            key = sequence[i % KEY_SEQUENCE_LENGTH]
+            start = clock()
+            take_token(key, capacity, refill_rate)
+            samples.append(clock() - start)
+            i += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    deadline = time.perf_counter() + duration
+    barrier.wait()
+    started = time.perf_counter()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return sorted(sample for samples in latencies for sample in samples), elapsed
+
+
+def summarize(latencies: List[int], elapsed: float) -> Dict[str, float]:
+    return {
+        'ops': len(latencies),
+        'ops_per_sec': len(latencies) / elapsed,
+        'p50_us': percentile(latencies, 0.50) / 1000,
+        'p99_us': percentile(latencies, 0.99) / 1000,
+    }
+
+
+def run_benchmark(storage: StorageBackend, threads: int, keys: int, duration: float, **options) -> Dict[str, float]:
+    """
+    Hammer `storage` from `threads` threads for `duration` seconds.
+
+    Returns:
+        dict with ops, ops_per_sec, p50_us and p99_us.
+    """
+    return summarize(*collect_latencies(storage, threads, keys, duration, **options))
+
+
+def process_worker(
+    factory: Callable[[], StorageBackend],
+    index: int,
+    start_at: float,
+    threads: int,
+    keys: int,
+    duration: float,
+) -> Tuple[List[int], float, int]:
+    """
+    One process of a multi-process run. Starts at wall time `start_at` so
+    all processes overlap.
+
+    Returns:
+        (latencies, elapsed, tokens this process got from the enforced bucket)
+    """
+    storage = factory()
+    time.sleep(max(0.0, start_at - time.time()))
+    latencies, elapsed = collect_latencies(storage, threads, keys, duration, seed=index)
+    # No refill: across all processes at most ENFORCED_LIMIT calls may pass
+    admitted = sum(storage.take_token("enforced", ENFORCED_LIMIT, 0.0) for _ in range(ENFORCED_LIMIT))
+    return latencies, elapsed, admitted
+
+
+def run_process_benchmark(
+    factory: Callable[[], StorageBackend],
+    processes: int,
+    threads: int,
+    keys: int,
+    duration: float,
+) -> Dict[str, float]:
+    """
+    Run the benchmark from `processes` processes, each creating its own
+    storage with `factory` (which must be picklable).
+
+    Returns:
+        run_benchmark()'s dict plus 'admitted' from the enforced bucket.
+    """
+    context = multiprocessing.get_context("spawn")
+    # Leave time for the spawned interpreters to start
+    start_at = time.time() + 1.0 + 0.2 * processes
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        futures = [
+            executor.submit(process_worker, factory, index, start_at, threads, keys, duration)
+            for index in range(processes)
+        ]
+        results = [future.result() for future in futures]
+
+    latencies = sorted(sample for result in results for sample in result[0])
+    summary = summarize(latencies, max(result[1] for result in results))
+    summary['admitted'] = sum(result[2] for result in results)
+    return summary
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (Linux only)."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def measure_memory(backend: str, keys: int) -> Dict[str, float]:
+    """
+    Track `keys` distinct 12-character keys in a new `backend` instance.
+    Run in a fresh process (see main) so memory freed by an earlier backend
+    cannot be reused and hide the real cost.
+    """
+    before = current_rss()
+    storage = BACKENDS[backend]()
+    for i in range(keys):
+        storage.take_token(f"user_{i:07d}", 10, 1.0)
+    used = current_rss() - before
+    return {'keys': keys, 'rss_bytes': used, 'bytes_per_key': used / keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rate limiter storage backends.")
+    parser.add_argument("--threads", type=int, default=8, help="Number of worker threads.")
+    parser.add_argument("--keys", type=int, default=1000, help="Number of distinct keys.")
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds per backend.")
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BACKENDS),
+        action="append",
+        help="Backend to run (repeatable, default: all)."
+    )
+    parser.add_argument(
+        "--memory",
+        type=int,
+        metavar="N",
+        help="Measure resident memory per key with N tracked keys instead."
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Drive each backend from this many processes at once."
+    )
+    args = parser.parse_args()
+
+    if args.processes > 1:
+        with tempfile.TemporaryDirectory() as directory:
+            factories = dict(BACKENDS)
+            # Every process must open the same table
+            factories['shm'] = functools.partial(SharedMemoryStorage, os.path.join(directory, "buckets"))
+            factories['leased-shm'] = functools.partial(leased_shm_storage, os.path.join(directory, "leased"))
+            print(f"{args.processes} processes x {args.threads} threads, {args.keys} keys, "
+                  f"{args.duration:.1f}s per backend")
+            print(f"{'backend':<16} {'ops':>10} {'ops/s':>12} {'p50 us':>8} {'p99 us':>8} {'admitted':>9}")
+            for name in args.backend or list(factories):
+                result = run_process_benchmark(
+                    factories[name], args.processes, args.threads, args.keys, args.duration
+                )
+                print(f"{name:<16} {result['ops']:>10} {result['ops_per_sec']:>12.0f} "
+                      f"{result['p50_us']:>8.2f} {result['p99_us']:>8.2f} "
+                      f"{result['admitted']:>5}/{ENFORCED_LIMIT}")
+        return
+
+    if args.memory:
+        print(f"{args.memory} keys per backend")
+        print(f"{'backend':<16} {'RSS MiB':>10} {'bytes/key':>10}")
+        context = multiprocessing.get_context("spawn")
+        for name in args.backend or list(BACKENDS):
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(measure_memory, name, args.memory).result()
+            print(f"{name:<16} {result['rss_bytes'] / 2**20:>10.1f} {result['bytes_per_key']:>10.1f}")
+        return
+
+    print(f"{args.threads} threads, {args.keys} keys, {args.duration:.1f}s per backend")
+    print(f"{'backend':<16} {'ops':>10} {'ops/s':>12} {'p50 us':>8} {'p99 us':>8}")
+    for name in args.backend or list(BACKENDS):
+        result = run_benchmark(BACKENDS[name](), args.threads, args.keys, args.duration)
+        print(f"{name:<16} {result['ops']:>10} {result['ops_per_sec']:>12.0f} "
+              f"{result['p50_us']:>8.2f} {result['p99_us']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+A per-process tier of leased tokens in front of a shared backend.
+
+LeasedStorage wraps any StorageBackend, typically a shared one such as
+RedisStorage or SharedMemoryStorage, and takes tokens from it in batches
+of `lease_size`. Later calls for the key are served from the leased
+tokens in process memory until they run out, so only about one call in
+`lease_size` reaches the shared backend.
+
+The price is accuracy. Leased tokens are already gone from the shared
+bucket, so:
+
+- Over-admission is bounded: no call is admitted without a token from the
+  shared bucket, but tokens leased earlier may be spent later. Over any
+  interval the instances together admit at most what the shared bucket
+  allows plus `lease_size` per instance and key.
+- Under-admission: a process can be denied while others hold unused
+  tokens. Leases expire after `lease_ttl` seconds and their unused tokens
+  go back to the shared bucket (see StorageBackend.return_tokens()), as
+  do all leftovers on close(), which also runs at interpreter exit for
+  storages still open.
+
+A larger lease_size means fewer round trips and a looser limit. Keep it
+well below capacity divided by the number of processes.
+"""
+import atexit
+import threading
+import time
+import weakref
+from typing import Sequence
+
+from .storage import RateLimitResult, StorageBackend, TokenRequest
+
+
+# Storages not closed yet, so their leases are returned at exit
+_open_storages: "weakref.WeakSet[LeasedStorage]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_storages() -> None:
+    for storage in list(_open_storages):
+        storage.close()
+
+
+class _Lease:
+    """Tokens taken from the shared backend but not used yet."""
+    __slots__ = ('tokens', 'capacity', 'refill_rate', 'expires_at')
+
+    def __init__(self, capacity: int, refill_rate: float, expires_at: float):
+        self.tokens = 0.0
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.expires_at = expires_at
+
+
+class LeasedStorage(StorageBackend):
+    """
+    Serves take_token() from locally leased tokens, refilling the lease
+    from `backend` in batches.
+
+    Args:
+        backend: The shared storage to lease from.
+        lease_size: Tokens to lease per round trip. A call still succeeds
+            with just its own cost if the shared bucket holds less than a
+            full lease.
+        lease_ttl: Seconds after which unused leased tokens are returned.
+        shards: Number of independently locked stripes of leases.
+    """
+
+    def __init__(self, backend: StorageBackend, lease_size: float = 10.0, lease_ttl: float = 1.0, shards: int = 64):
+        if lease_size < 1:
+            raise ValueError("lease_size must be at least 1")
+        if lease_ttl <= 0:
+            raise ValueError("lease_ttl must be positive")
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.backend = backend
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl
+        self._shards = shards
+        self._leases = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        # Per stripe, so each counter is only written under its own lock
+        self._backend_calls = [0] * shards
+        _open_storages.add(self)
+
+    @property
+    def backend_calls(self) -> int:
+        """take_token() calls that had to go to the shared backend."""
+        return sum(self._backend_calls)
+
+    def _shard(self, key: str) -> int:
+        return hash(key) % self._shards
+
+    def _release(self, key: str, lease: _Lease) -> None:
+        if lease.tokens > 0:
+            self.backend.return_tokens(key, lease.capacity, lease.refill_rate, lease.tokens)
+
+    def take_token(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> bool:
+        if cost < 0:
+            raise ValueError("cost must not be negative")
+        shard = self._shard(key)
+        leases = self._leases[shard]
+        with self._locks[shard]:
+            current_time = time.monotonic()
+            lease = leases.get(key)
+            if lease is not None and current_time >= lease.expires_at:
+                del leases[key]
+                self._release(key, lease)
+                lease = None
+            if lease is not None and lease.tokens >= cost:
+                lease.tokens -= cost
+                return True
+
+            held = lease.tokens if lease is not None else 0.0
+            needed = cost - held
+            # Lease a full batch if the shared bucket has one, else just enough
+            batch = max(needed, min(self.lease_size, capacity))
+            self._backend_calls[shard] += 1
+            if self.backend.take_token(key, capacity, refill_rate, batch):
+                leased = batch
+            elif batch > needed and self.backend.take_token(key, capacity, refill_rate, needed):
+                leased = needed
+            else:
+                return False
+
+            if lease is None:
+                lease = leases[key] = _Lease(capacity, refill_rate, current_time)
+            lease.tokens = held + leased - cost
+            lease.expires_at = current_time + self.lease_ttl
+            return True
+
+    def take_tokens(self, requests: Sequence[TokenRequest]) -> RateLimitResult:
+        # Batches stay atomic by going straight to the shared backend
+        return self.backend.take_tokens(requests)
+
+    def expire(self) -> int:
+        """
+        Return the unused tokens of every expired lease, one stripe at a
+        time. Expired leases are otherwise only returned when their key is
+        used again, so call this periodically if keys go quiet.
+        Returns the number of leases released.
+        """
+        released = 0
+        for leases, lock in zip(self._leases, self._locks):
+            with lock:
+                now = time.monotonic()
+                expired = [key for key, lease in leases.items() if now >= lease.expires_at]
+                for key in expired:
+                    self._release(key, leases.pop(key))
+                released += len(expired)
+        return released
+
+    def close(self) -> None:
+        """
+        Return every lease's unused tokens to the shared backend. Called
+        at interpreter exit for storages that are still open.
+        """
+        _open_storages.discard(self)
+        for leases, lock in zip(self._leases, self._locks):
+            with lock:
+                for key, lease in leases.items():
+                    self._release(key, lease)
+                leases.clear()
+
+    def __enter__(self) -> "LeasedStorage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,15 +1,35 @@
+import asyncio
 import functools
-from typing import Callable, Any
-from .storage import StorageBackend, InMemoryStorage
+import inspect
+import math
+import time
+from typing import Callable, Any, Dict, Iterable, Optional, Union
+from .metrics import LimiterMetrics
+from .storage import (
+    AsyncInMemoryStorage,
+    AsyncStorageBackend,
+    InMemoryStorage,
+    RateLimitResult,
+    StorageBackend,
+    TokenRequest,
+)
+
+def _record(metrics: Optional[LimiterMetrics], requests: Iterable[TokenRequest], allowed: bool) -> None:
+    """Count a batch decision once for every key it touched."""
+    if metrics is not None:
+        for key in dict.fromkeys(request.key for request in requests):
+            metrics.record(key, allowed)
 
 class RateLimiter:
     """
     Implements the Token Bucket algorithm for rate limiting.
+    Pass a LimiterMetrics to count every decision.
     """
-    def __init__(self, storage: StorageBackend):
+    def __init__(self, storage: StorageBackend, metrics: Optional[LimiterMetrics] = None):
         self.storage = storage
+        self.metrics = metrics
 
-    def allow_request(self, key: str, capacity: int, refill_rate: float) -> bool:
+    def allow_request(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> bool:
         """
         Checks if a request is allowed under the given capacity and refill rate.
         Delegates to the storage backend to ensure atomicity.
@@ -18,43 +38,176 @@ class RateLimiter:
             key (str): Unique identifier for the bucket.
             capacity (int): Maximum number of tokens the bucket can hold.
             refill_rate (float): Number of tokens added per second.
+            cost (float): Tokens the request consumes.
 
         Returns:
             bool: True if allowed, False otherwise.
         """
-        return self.storage.take_token(key, capacity, refill_rate)
+        allowed = self.storage.take_token(key, capacity, refill_rate, cost)
+        if self.metrics is not None:
+            self.metrics.record(key, allowed)
+        return allowed
+
+    def check(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> RateLimitResult:
+        """
+        Like allow_request(), but on denial also reports how long to wait.
+
+        Returns:
+            RateLimitResult: Truthy if allowed; retry_after holds the seconds
+            until the request would fit.
+        """
+        return self.allow_many([TokenRequest(key, capacity, refill_rate, cost)])
+
+    def allow_many(self, requests: Iterable[TokenRequest]) -> RateLimitResult:
+        """
+        Checks several buckets at once (e.g. user, org and endpoint) in one
+        atomic storage call. Either every bucket is charged or none is.
+
+        Args:
+            requests: TokenRequest(key, capacity, refill_rate, cost) entries.
+
+        Returns:
+            RateLimitResult: Truthy if all were allowed; retry_after is the
+            longest wait among the buckets that denied.
+        """
+        requests = list(requests)
+        result = self.storage.take_tokens(requests)
+        _record(self.metrics, requests, result.allowed)
+        return result
+
+class AsyncRateLimiter:
+    """
+    Token Bucket rate limiter for asyncio code.
+    Accepts an AsyncStorageBackend, or a synchronous StorageBackend whose
+    calls are short enough to run on the event loop directly.
+    """
+    def __init__(
+        self,
+        storage: Union[AsyncStorageBackend, StorageBackend],
+        metrics: Optional[LimiterMetrics] = None
+    ):
+        self.storage = storage
+        self.metrics = metrics
+
+    async def allow_request(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> bool:
+        """See RateLimiter.allow_request()."""
+        if isinstance(self.storage, AsyncStorageBackend):
+            allowed = await self.storage.take_token(key, capacity, refill_rate, cost)
+        else:
+            allowed = self.storage.take_token(key, capacity, refill_rate, cost)
+        if self.metrics is not None:
+            self.metrics.record(key, allowed)
+        return allowed
+
+    async def check(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> RateLimitResult:
+        """See RateLimiter.check()."""
+        return await self.allow_many([TokenRequest(key, capacity, refill_rate, cost)])
+
+    async def allow_many(self, requests: Iterable[TokenRequest]) -> RateLimitResult:
+        """See RateLimiter.allow_many()."""
+        requests = list(requests)
+        if isinstance(self.storage, AsyncStorageBackend):
+            result = await self.storage.take_tokens(requests)
+        else:
+            result = self.storage.take_tokens(requests)
+        _record(self.metrics, requests, result.allowed)
+        return result
+
+    async def acquire(
+        self,
+        key: str,
+        capacity: int,
+        refill_rate: float,
+        cost: float = 1.0,
+        timeout: Optional[float] = None
+    ) -> None:
+        """
+        Wait until the request is allowed, then consume its tokens.
+        Sleeps for exactly the reported retry_after between attempts instead
+        of polling; another task may take the refilled tokens first, in which
+        case it waits again.
+
+        Args:
+            timeout: Maximum seconds to wait. None waits indefinitely.
+
+        Raises:
+            RateLimitExceeded: If the cost can never fit, or waiting would
+                exceed `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            result = await self.check(key, capacity, refill_rate, cost)
+            if result:
+                return
+            if math.isinf(result.retry_after):
+                raise RateLimitExceeded("Request can never be allowed", retry_after=result.retry_after)
+            if deadline is not None and time.monotonic() + result.retry_after > deadline:
+                raise RateLimitExceeded("Too many requests", retry_after=result.retry_after)
+            await asyncio.sleep(result.retry_after)
 
 def limit_requests(
     key_func: Callable[..., str],
     capacity: int,
     refill_rate: float,
-    storage: StorageBackend = None
+    storage: Union[StorageBackend, AsyncStorageBackend] = None,
+    cost: float = 1.0,
+    metrics: Optional[LimiterMetrics] = None
 ):
     """
-    Decorator to apply rate limiting to a function.
+    Decorator to apply rate limiting to a function or coroutine function.
 
     Args:
         key_func: A function that takes the decorated function's args/kwargs
                   and returns a unique string key.
         capacity: Max tokens.
         refill_rate: Tokens per second.
-        storage: Storage backend instance. If None, uses a new InMemoryStorage.
+        storage: Storage backend instance. If None, every function this
+                 decorator wraps shares one InMemoryStorage, or for `async def`
+                 functions one AsyncInMemoryStorage.
+                 An AsyncStorageBackend can only limit `async def` functions.
+        cost: Tokens each call consumes.
+        metrics: Optional LimiterMetrics counting every decision.
     """
-    if storage is None:
-        storage = InMemoryStorage()
+    # Default storages, created on first use and shared by every decorated function
+    defaults: Dict[bool, Union[StorageBackend, AsyncStorageBackend]] = {}
 
-    limiter = RateLimiter(storage)
+    def default_storage(is_async: bool):
+        if is_async not in defaults:
+            defaults[is_async] = AsyncInMemoryStorage() if is_async else InMemoryStorage()
+        return defaults[is_async]
 
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            limiter = AsyncRateLimiter(storage if storage is not None else default_storage(True), metrics)
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = key_func(*args, **kwargs)
+                result = await limiter.check(key, capacity, refill_rate, cost)
+                if result:
+                    return await func(*args, **kwargs)
+                else:
+                    raise RateLimitExceeded("Too many requests", retry_after=result.retry_after)
+            return async_wrapper
+
+        if isinstance(storage, AsyncStorageBackend):
+            raise TypeError("An AsyncStorageBackend can only limit async functions")
+        limiter = RateLimiter(storage if storage is not None else default_storage(False), metrics)
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             key = key_func(*args, **kwargs)
-            if limiter.allow_request(key, capacity, refill_rate):
+            result = limiter.check(key, capacity, refill_rate, cost)
+            if result:
                 return func(*args, **kwargs)
             else:
-                raise RateLimitExceeded("Too many requests")
+                raise RateLimitExceeded("Too many requests", retry_after=result.retry_after)
         return wrapper
     return decorator
 
 class RateLimitExceeded(Exception):
-    pass
+    """Raised when a rate limited call is denied. retry_after is in seconds."""
+
+    def __init__(self, message: str = "Too many requests", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
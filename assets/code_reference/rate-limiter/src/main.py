@@ -1,41 +1,379 @@
-import time
-import threading
+"""
+Load-test harness for the rate limiter storage backends.
+
+Drives one backend from --processes processes of --threads threads for
+--duration seconds. With --tasks N, every thread runs an event loop with N
+asyncio tasks instead of a plain loop. Keys are drawn from --keys distinct
+keys with Zipf skew --zipf (0 is uniform), so a few hot keys get most of
+the traffic, as in production.
+
+Reports throughput and latency percentiles, and checks enforcement
+against an exact oracle: every decision is replayed in time order through
+a single-threaded token bucket with the same limits, and the admitted
+counts per key are compared. Backends that share state admit what the
+oracle admits up to timing noise at the boundaries; per-process backends
+driven from several processes, leases and the sliding window algorithms
+show how far they drift from it.
+
+With --output, the configuration, results and current git commit are
+written as JSON so runs can be compared across commits.
+
+Usage (from the project root):
+    python -m src.main --backend sharded --threads 4 --keys 10000 --zipf 1.1
+    python -m src.main --backend shm --processes 4 --output run.json
+    python -m src.main --backend memory --threads 2 --tasks 50 --metrics
+"""
+import argparse
+import asyncio
+import bisect
+import concurrent.futures
+import functools
+import inspect
+import itertools
+import json
+import multiprocessing
+import os
 import random
-from src.limiter import RateLimiter
-from src.storage import InMemoryStorage
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.benchmark import BACKENDS, KEY_SEQUENCE_LENGTH, leased_shm_storage, percentile
+from src.limiter import AsyncRateLimiter, RateLimiter
+from src.metrics import LimiterMetrics
+from src.redis_storage import RedisStorage
+from src.shm_storage import SharedMemoryStorage
+from src.storage import StorageBackend
+
+# (start in monotonic ns, latency in ns, key index, allowed)
+Sample = Tuple[int, int, int, bool]
+
+HOT_KEYS_REPORTED = 10
+
+
+class LoadConfig(NamedTuple):
+    """What every worker thread does; see main() for the meaning of each."""
+    keys: int = 1000
+    zipf: float = 1.1
+    threads: int = 4
+    tasks: int = 0
+    duration: float = 2.0
+    capacity: int = 10
+    refill_rate: float = 5.0
+    metrics: bool = False
+
+
+def key_name(index: int) -> str:
+    return f"user:{index}"
+
+
+def zipf_cum_weights(keys: int, skew: float) -> List[float]:
+    """Cumulative weights of key ranks 1..keys under Zipf(skew)."""
+    return list(itertools.accumulate(1.0 / rank ** skew for rank in range(1, keys + 1)))
+
+
+def draw_keys(cum_weights: List[float], count: int, seed: int) -> List[int]:
+    """Pre-draw key indexes so the RNG stays out of the timed loop."""
+    rng = random.Random(seed)
+    total = cum_weights[-1]
+    return [bisect.bisect(cum_weights, rng.random() * total) for _ in range(count)]
+
+
+def run_thread(
+    decide: Callable[[str, int, float], bool],
+    config: LoadConfig,
+    sequence: List[int],
+    deadline: int,
+) -> List[Sample]:
+    """Call decide() on keys from `sequence` until `deadline` (monotonic ns)."""
+    names = [key_name(index) for index in range(config.keys)]
+    capacity, refill_rate = config.capacity, config.refill_rate
+    clock = time.monotonic_ns
+    samples: List[Sample] = []
+    i = 0
+    while clock() < deadline:
+        key = sequence[i % KEY_SEQUENCE_LENGTH]
+        start = clock()
+        allowed = decide(names[key], capacity, refill_rate)
+        samples.append((start, clock() - start, key, allowed))
+        i += 1
+    return samples
+
+
+def run_tasks(
+    limiter: AsyncRateLimiter,
+    config: LoadConfig,
+    sequences: List[List[int]],
+    deadline: int,
+) -> List[Sample]:
+    """Run one asyncio task per sequence on a new event loop in this thread."""
+    names = [key_name(index) for index in range(config.keys)]
+    capacity, refill_rate = config.capacity, config.refill_rate
+    clock = time.monotonic_ns
+    samples: List[Sample] = []
+
+    async def task(sequence: List[int]):
+        i = 0
+        while clock() < deadline:
+            key = sequence[i % KEY_SEQUENCE_LENGTH]
+            start = clock()
+            allowed = await limiter.allow_request(names[key], capacity, refill_rate)
+            samples.append((start, clock() - start, key, allowed))
+            i += 1
+            # Synchronous backends never suspend, so yield to the other tasks
+            await asyncio.sleep(0)
+
+    async def run_all():
+        await asyncio.gather(*(task(sequence) for sequence in sequences))
+
+    asyncio.run(run_all())
+    return samples
+
+
+def accepts_metrics(factory: Callable[..., StorageBackend]) -> bool:
+    """Whether a storage factory takes a `metrics` keyword argument."""
+    try:
+        return 'metrics' in inspect.signature(factory).parameters
+    except (TypeError, ValueError):
+        return False
 
-def simulate_user(user_id: str, limiter: RateLimiter):
+
+def run_process(
+    factory: Callable[[], StorageBackend],
+    config: LoadConfig,
+    index: int,
+    start_at: float,
+) -> Tuple[List[Sample], Optional[Dict[str, object]]]:
     """
-    Simulates a user making requests at random intervals.
+    One process of a run. Starts at wall time `start_at` so all processes
+    overlap.
+
+    Returns:
+        (samples from every thread, metrics snapshot if enabled)
     """
-    # Rate limit: 5 requests burst, refill 1 request per second.
-    capacity = 5
-    refill_rate = 1.0
+    metrics = LimiterMetrics() if config.metrics else None
+    # Storages that take metrics (InMemoryStorage) also report lock waits
+    storage = factory(metrics=metrics) if metrics is not None and accepts_metrics(factory) else factory()
+    limiter = RateLimiter(storage, metrics=metrics)
+    async_limiter = AsyncRateLimiter(storage, metrics=metrics)
+    cum_weights = zipf_cum_weights(config.keys, config.zipf)
 
-    for i in range(10):
-        allowed = limiter.allow_request(user_id, capacity, refill_rate)
-        status = "ALLOWED" if allowed else "DENIED"
-        print(f"[{time.strftime('%H:%M:%S')}] User {user_id}: Request {i+1} -> {status}")
-        # Sleep for a bit to simulate real world usage
-        time.sleep(random.uniform(0.1, 1.5))
+    results: List[List[Sample]] = [[] for _ in range(config.threads)]
+    workers = []
+    for thread in range(config.threads):
+        seed = (index * config.threads + thread) * max(1, config.tasks)
+        if config.tasks:
+            sequences = [draw_keys(cum_weights, KEY_SEQUENCE_LENGTH, seed + t) for t in range(config.tasks)]
+            target = functools.partial(run_tasks, async_limiter, config, sequences)
+        else:
+            sequence = draw_keys(cum_weights, KEY_SEQUENCE_LENGTH, seed)
+            target = functools.partial(run_thread, limiter.allow_request, config, sequence)
+        workers.append(target)
 
-def main():
-    print("Initializing Rate Limiter Demo...")
-    storage = InMemoryStorage()
-    limiter = RateLimiter(storage)
-
-    threads = []
-    # Simulate 3 users running concurrently
-    for i in range(1, 4):
-        user_id = f"user_{i}"
-        t = threading.Thread(target=simulate_user, args=(user_id, limiter))
-        threads.append(t)
-        t.start()
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.monotonic_ns() + int(config.duration * 1e9)
 
+    def worker(thread: int):
+        results[thread] = workers[thread](deadline)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(config.threads)]
+    for t in threads:
+        t.start()
     for t in threads:
         t.join()
+    samples = [sample for result in results for sample in result]
+    return samples, metrics.snapshot() if metrics is not None else None
+
+
+def oracle_admitted(samples: List[Sample], capacity: int, refill_rate: float) -> Dict[int, int]:
+    """Admitted calls per key when `samples` are replayed through exact token buckets."""
+    buckets: Dict[int, List[float]] = {}  # key -> [tokens, updated_at]
+    admitted: Dict[int, int] = {}
+    for start, _, key, _ in sorted(samples):
+        now = start / 1e9
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = [float(capacity), now]
+        tokens = min(float(capacity), bucket[0] + (now - bucket[1]) * refill_rate)
+        bucket[1] = now
+        if tokens >= 1.0:
+            tokens -= 1.0
+            admitted[key] = admitted.get(key, 0) + 1
+        bucket[0] = tokens
+    return admitted
+
+
+def accuracy(samples: List[Sample], capacity: int, refill_rate: float) -> Dict[str, float]:
+    """Compare the backend's admitted counts per key with the oracle's."""
+    admitted: Dict[int, int] = {}
+    for _, _, key, allowed in samples:
+        if allowed:
+            admitted[key] = admitted.get(key, 0) + 1
+    expected = oracle_admitted(samples, capacity, refill_rate)
+
+    over = under = 0
+    for key in admitted.keys() | expected.keys():
+        difference = admitted.get(key, 0) - expected.get(key, 0)
+        if difference > 0:
+            over += difference
+        else:
+            under -= difference
+    return {
+        'admitted': sum(admitted.values()),
+        'oracle_admitted': sum(expected.values()),
+        'over_admitted': over,
+        'under_admitted': under,
+        'error_rate': (over + under) / len(samples) if samples else 0.0,
+    }
+
+
+def merge_metrics(snapshots: List[Dict[str, object]]) -> Dict[str, object]:
+    """Add up per-process metrics snapshots."""
+    requests: Dict[str, Dict[str, int]] = {}
+    hot_keys: Dict[str, int] = {}
+    # Every process uses the same bucket bounds, so cumulative counts add up
+    lock_wait = {'buckets': [], 'sum': 0.0, 'count': 0}
+    for snapshot in snapshots:
+        for prefix, counts in snapshot['requests'].items():
+            totals = requests.setdefault(prefix, {'allowed': 0, 'denied': 0})
+            totals['allowed'] += counts['allowed']
+            totals['denied'] += counts['denied']
+        for key, count, _ in snapshot['hot_keys']:
+            hot_keys[key] = hot_keys.get(key, 0) + count
+        waits = snapshot['lock_wait_seconds']
+        lock_wait['buckets'] = [
+            (bound, count + (merged[1] if merged else 0))
+            for (bound, count), merged in itertools.zip_longest(waits['buckets'], lock_wait['buckets'])
+        ]
+        lock_wait['sum'] += waits['sum']
+        lock_wait['count'] += waits['count']
+    ranked = sorted(hot_keys.items(), key=lambda item: item[1], reverse=True)
+    return {'requests': requests, 'hot_keys': ranked[:HOT_KEYS_REPORTED], 'lock_wait_seconds': lock_wait}
+
+
+def run_load(factory: Callable[[], StorageBackend], config: LoadConfig, processes: int = 1) -> Dict[str, object]:
+    """
+    Drive the storage built by `factory` (picklable if processes > 1)
+    from `processes` processes.
+
+    Returns:
+        dict with throughput, latency percentiles, accuracy and, if
+        enabled, metrics.
+    """
+    if processes == 1:
+        results = [run_process(factory, config, 0, time.time())]
+    else:
+        context = multiprocessing.get_context("spawn")
+        # Leave time for the spawned interpreters to start
+        start_at = time.time() + 1.0 + 0.2 * processes
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+            futures = [
+                executor.submit(run_process, factory, config, index, start_at)
+                for index in range(processes)
+            ]
+            results = [future.result() for future in futures]
+
+    samples = [sample for result in results for sample in result[0]]
+    latencies = sorted(sample[1] for sample in samples)
+    elapsed = (max(s[0] + s[1] for s in samples) - min(s[0] for s in samples)) / 1e9 if samples else 0.0
+    report: Dict[str, object] = {
+        'ops': len(samples),
+        'ops_per_sec': len(samples) / elapsed if elapsed else 0.0,
+        'latency_us': {
+            name: percentile(latencies, fraction) / 1000
+            for name, fraction in (('p50', 0.50), ('p90', 0.90), ('p99', 0.99), ('p999', 0.999))
+        },
+        'accuracy': accuracy(samples, config.capacity, config.refill_rate),
+    }
+    report['latency_us']['max'] = (latencies[-1] if latencies else 0) / 1000
+    if config.metrics:
+        report['metrics'] = merge_metrics([result[1] for result in results])
+    return report
+
+
+def git_commit() -> Optional[str]:
+    """The checked out commit, if this runs inside a git work tree."""
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return None
+    return completed.stdout.strip() if completed.returncode == 0 else None
+
+
+def main():
+    defaults = LoadConfig()
+    parser = argparse.ArgumentParser(description="Load-test a rate limiter storage backend.")
+    parser.add_argument("--backend", choices=sorted(BACKENDS) + ['redis'], default='sharded')
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0", help="Server for --backend redis.")
+    parser.add_argument("--keys", type=int, default=defaults.keys, help="Number of distinct keys.")
+    parser.add_argument("--zipf", type=float, default=defaults.zipf, help="Zipf skew of key popularity; 0 is uniform.")
+    parser.add_argument("--threads", type=int, default=defaults.threads, help="Threads per process.")
+    parser.add_argument("--processes", type=int, default=1, help="Processes sharing the backend.")
+    parser.add_argument("--tasks", type=int, default=defaults.tasks, help="Asyncio tasks per thread; 0 runs a plain loop.")
+    parser.add_argument("--duration", type=float, default=defaults.duration, help="Seconds to run.")
+    parser.add_argument("--capacity", type=int, default=defaults.capacity, help="Bucket capacity per key.")
+    parser.add_argument("--refill-rate", type=float, default=defaults.refill_rate, help="Tokens per second per key.")
+    parser.add_argument("--metrics", action="store_true", help="Record LimiterMetrics and report them (adds per-decision overhead).")
+    parser.add_argument("--output", help="Write the configuration and results as JSON to this file.")
+    args = parser.parse_args()
+
+    config = LoadConfig(
+        keys=args.keys,
+        zipf=args.zipf,
+        threads=args.threads,
+        tasks=args.tasks,
+        duration=args.duration,
+        capacity=args.capacity,
+        refill_rate=args.refill_rate,
+        metrics=args.metrics,
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        factories = dict(BACKENDS)
+        factories['redis'] = functools.partial(RedisStorage, url=args.redis_url)
+        if args.processes > 1:
+            # Every process must open the same table
+            factories['shm'] = functools.partial(SharedMemoryStorage, os.path.join(directory, "buckets"))
+            factories['leased-shm'] = functools.partial(leased_shm_storage, os.path.join(directory, "leased"))
+        report = run_load(factories[args.backend], config, args.processes)
+
+    latency = report['latency_us']
+    result = report['accuracy']
+    print(f"{args.backend}: {args.processes} processes x {config.threads} threads"
+          f"{f' x {config.tasks} tasks' if config.tasks else ''}, {config.keys} keys, "
+          f"zipf {config.zipf}, {config.duration:.1f}s")
+    print(f"  {report['ops']} ops, {report['ops_per_sec']:.0f} ops/s")
+    print(f"  latency us: p50 {latency['p50']:.2f}  p90 {latency['p90']:.2f}  "
+          f"p99 {latency['p99']:.2f}  p999 {latency['p999']:.2f}  max {latency['max']:.2f}")
+    print(f"  admitted {result['admitted']} (oracle {result['oracle_admitted']}), "
+          f"over {result['over_admitted']}, under {result['under_admitted']}, "
+          f"error rate {result['error_rate']:.4%}")
+    if config.metrics:
+        print(f"  hot keys: {', '.join(f'{key} ({count})' for key, count in report['metrics']['hot_keys'])}")
+        lock_wait = report['metrics']['lock_wait_seconds']
+        if lock_wait['count']:
+            print(f"  lock waits: {lock_wait['count']}, mean {lock_wait['sum'] / lock_wait['count'] * 1e6:.3f} us")
+
+    if args.output:
+        document = {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'backend': args.backend,
+            'processes': args.processes,
+            'config': config._asdict(),
+            'results': report,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"  wrote {args.output}")
 
-    print("Simulation complete.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,371 @@
+"""
+Low-overhead instrumentation for rate limiters.
+
+LimiterMetrics collects:
+
+- allowed/denied counts per key prefix ("user:42" counts under "user"),
+- the hottest keys, estimated with a space-saving sketch of `top_k`
+  counters, and
+- a histogram of how long InMemoryStorage callers wait for its lock.
+
+Counters and sketches are kept per thread and only merged when read, so
+recording a decision takes no lock and threads never contend on shared
+counters. Each thread also maps recent keys straight to their prefix's
+counters, skipping key_prefix() on the hot path. What remains still costs
+a few hundred nanoseconds per decision, plus a timed acquire per storage
+call when InMemoryStorage reports lock waits, so leave metrics off when
+measuring raw throughput (the load harness in src.main only enables them
+with --metrics). Read them with snapshot() (a plain dict) or prometheus_text()
+(Prometheus text exposition format), or serve the latter over HTTP with
+start_http_server().
+
+Usage:
+    metrics = LimiterMetrics()
+    limiter = RateLimiter(InMemoryStorage(metrics=metrics), metrics=metrics)
+"""
+import bisect
+import functools
+import heapq
+import http.server
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds; lock waits are usually well under a microsecond
+LOCK_WAIT_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1)
+
+
+@functools.lru_cache(maxsize=65536)
+def default_key_prefix(key: str) -> str:
+    """
+    The part of a key before its first ':' ("user:42" -> "user"), or for
+    keys without one, the key without trailing digits ("user_42" -> "user_").
+    """
+    prefix, separator, _ = key.partition(":")
+    return prefix if separator else key.rstrip("0123456789")
+
+
+class SpaceSaving:
+    """
+    Space-saving sketch (Metwally et al.) of the most frequent keys.
+
+    Tracks at most `capacity` keys. A new key replaces the one with the
+    lowest count and inherits that count as its possible overestimate, so
+    every key seen more than total / capacity times is guaranteed to be
+    tracked. Not thread-safe; LimiterMetrics keeps one per thread.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        # (count, key) candidates for the minimum; entries go stale as
+        # counts grow and are refreshed lazily on eviction
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, count: int = 1) -> None:
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+            return
+        if len(counts) < self.capacity:
+            counts[key] = count
+            self.errors[key] = 0
+            heapq.heappush(self._heap, (count, key))
+            return
+
+        while True:
+            minimum, victim = heapq.heappop(self._heap)
+            if counts[victim] == minimum:
+                break
+            heapq.heappush(self._heap, (counts[victim], victim))
+        del counts[victim], self.errors[victim]
+        counts[key] = minimum + count
+        self.errors[key] = minimum
+        heapq.heappush(self._heap, (minimum + count, key))
+
+    def top(self, k: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """(key, estimated count, maximum overestimate), most frequent first."""
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return [(key, count, self.errors[key]) for key, count in ranked[:k]]
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket bounds, as Prometheus expects.
+    Not thread-safe: callers observe while holding the lock being measured.
+    """
+
+    def __init__(self, bounds: Sequence[float] = LOCK_WAIT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, object]:
+        cumulative = []
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), list(self.counts)):
+            total += count
+            cumulative.append((bound, total))
+        return {'buckets': cumulative, 'sum': self.sum, 'count': total}
+
+
+class TimedLock:
+    """A threading.Lock that records how long each acquire waited."""
+
+    def __init__(self, histogram: Histogram):
+        self._lock = threading.Lock()
+        self._histogram = histogram
+
+    def __enter__(self) -> "TimedLock":
+        # Holding the lock also serializes updates to the histogram
+        if self._lock.acquire(False):
+            # Uncontended: no wait to time
+            self._histogram.counts[0] += 1
+            return self
+        start = time.perf_counter()
+        self._lock.acquire()
+        self._histogram.observe(time.perf_counter() - start)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._lock.release()
+
+
+# Keys each thread maps straight to its prefix counters before starting over
+KEY_CACHE_SIZE = 4096
+
+
+class _ThreadMetrics:
+    __slots__ = ('thread', 'decisions', 'by_key', 'hot_keys', 'skipped')
+
+    def __init__(self, thread: threading.Thread, top_k: int, hot_key_sample: int):
+        self.thread = thread
+        self.decisions: Dict[str, List[int]] = {}  # prefix -> [denied, allowed]
+        # key -> the same list as decisions[key_prefix(key)], so recent
+        # keys skip the key_prefix() call
+        self.by_key: Dict[str, List[int]] = {}
+        self.hot_keys = SpaceSaving(top_k)
+        # Random phase, so scaled-up estimates are unbiased for every thread
+        self.skipped = random.randrange(hot_key_sample)
+
+
+class LimiterMetrics:
+    """
+    Decision counters, hot keys and lock wait times for one limiter.
+
+    Args:
+        top_k: Keys tracked by each thread's space-saving sketch.
+        key_prefix: Maps a key to the label its decisions are counted
+            under. Keep the number of distinct prefixes small.
+        hot_key_sample: Feed only every n-th decision to the hot key
+            sketch; estimates are scaled back up. Hot keys stand out
+            after sampling, and skipping the sketch is most of the saving.
+
+    Threads that have exited are folded into a shared total (keeping only
+    the top_k hot keys) and forgotten, so servers that start a thread per
+    connection don't accumulate per-thread state.
+    """
+
+    # Registered threads before dead ones are first looked for
+    RETIRE_AT = 64
+
+    def __init__(
+        self,
+        top_k: int = 32,
+        key_prefix: Callable[[str], str] = default_key_prefix,
+        hot_key_sample: int = 8,
+    ):
+        if hot_key_sample < 1:
+            raise ValueError("hot_key_sample must be at least 1")
+        self.top_k = top_k
+        self.key_prefix = key_prefix
+        self.hot_key_sample = hot_key_sample
+        self.lock_wait = Histogram()
+        self._local = threading.local()
+        self._threads: List[_ThreadMetrics] = []
+        self._threads_lock = threading.Lock()
+        self._retire_at = self.RETIRE_AT
+        # Totals of threads that have exited, guarded by _threads_lock
+        self._retired_decisions: Dict[str, List[int]] = {}
+        self._retired_counts: Dict[str, int] = {}
+        self._retired_errors: Dict[str, int] = {}
+
+    def _register_thread(self) -> _ThreadMetrics:
+        metrics = self._local.metrics = _ThreadMetrics(
+            threading.current_thread(), self.top_k, self.hot_key_sample
+        )
+        with self._threads_lock:
+            if len(self._threads) >= self._retire_at:
+                self._retire_dead_threads()
+                # Amortized: look again once the live list has doubled
+                self._retire_at = max(self.RETIRE_AT, 2 * len(self._threads))
+            self._threads.append(metrics)
+        return metrics
+
+    @staticmethod
+    def _fold(
+        metrics: _ThreadMetrics,
+        requests: Dict[str, List[int]],
+        counts: Dict[str, int],
+        errors: Dict[str, int],
+    ) -> None:
+        """Add one thread's decisions and hot key sketch to running totals."""
+        # dict.copy() is atomic under the GIL, so the owner may keep writing
+        for prefix, (denied, allowed) in metrics.decisions.copy().items():
+            totals = requests.setdefault(prefix, [0, 0])
+            totals[0] += denied
+            totals[1] += allowed
+        # Per-thread sketches merge by adding counts and error bounds
+        sketch_errors = metrics.hot_keys.errors.copy()
+        for key, count in metrics.hot_keys.counts.copy().items():
+            counts[key] = counts.get(key, 0) + count
+            errors[key] = errors.get(key, 0) + sketch_errors.get(key, 0)
+
+    def _retire_dead_threads(self) -> None:
+        """
+        Fold the metrics of exited threads into the retired totals and drop
+        them. Must be called with _threads_lock held.
+        """
+        live = []
+        for metrics in self._threads:
+            if metrics.thread.is_alive():
+                live.append(metrics)
+            else:
+                # The thread is gone, so its counters no longer change
+                self._fold(metrics, self._retired_decisions, self._retired_counts, self._retired_errors)
+        if len(live) == len(self._threads):
+            return
+        self._threads = live
+        if len(self._retired_counts) > self.top_k:
+            # snapshot() reports no more than top_k keys
+            kept = heapq.nlargest(self.top_k, self._retired_counts.items(), key=lambda item: item[1])
+            self._retired_counts = dict(kept)
+            self._retired_errors = {key: self._retired_errors[key] for key, _ in kept}
+
+    def record(self, key: str, allowed: bool) -> None:
+        """Count one rate limit decision for `key`."""
+        try:
+            metrics = self._local.metrics
+        except AttributeError:
+            metrics = self._register_thread()
+        counts = metrics.by_key.get(key)
+        if counts is None:
+            counts = self._counters(metrics, key)
+        counts[allowed] += 1
+        if metrics.skipped:
+            metrics.skipped -= 1
+        else:
+            metrics.skipped = self.hot_key_sample - 1
+            metrics.hot_keys.add(key)
+
+    def _counters(self, metrics: _ThreadMetrics, key: str) -> List[int]:
+        """The [denied, allowed] counters of key's prefix, cached by key."""
+        prefix = self.key_prefix(key)
+        counts = metrics.decisions.get(prefix)
+        if counts is None:
+            counts = metrics.decisions[prefix] = [0, 0]
+        if len(metrics.by_key) >= KEY_CACHE_SIZE:
+            metrics.by_key.clear()
+        metrics.by_key[key] = counts
+        return counts
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        Current values as plain data:
+
+            {'requests': {prefix: {'allowed': n, 'denied': n}},
+             'hot_keys': [(key, estimated count, maximum overestimate)],
+             'lock_wait_seconds': {'buckets': [(le, n)], 'sum': s, 'count': n}}
+        """
+        with self._threads_lock:
+            self._retire_dead_threads()
+            threads = list(self._threads)
+            requests = {prefix: list(totals) for prefix, totals in self._retired_decisions.items()}
+            counts = dict(self._retired_counts)
+            errors = dict(self._retired_errors)
+
+        for metrics in threads:
+            self._fold(metrics, requests, counts, errors)
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:self.top_k]
+        sample = self.hot_key_sample
+        hot_keys = [(key, count * sample, errors[key] * sample) for key, count in ranked]
+
+        return {
+            'requests': {
+                prefix: {'allowed': allowed, 'denied': denied}
+                for prefix, (denied, allowed) in requests.items()
+            },
+            'hot_keys': hot_keys,
+            'lock_wait_seconds': self.lock_wait.snapshot(),
+        }
+
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP ratelimit_requests_total Rate limit decisions by key prefix.",
+            "# TYPE ratelimit_requests_total counter",
+        ]
+        for prefix, counts in sorted(snapshot['requests'].items()):
+            for result in ('allowed', 'denied'):
+                lines.append(
+                    f'ratelimit_requests_total{{prefix="{_escape(prefix)}",result="{result}"}} {counts[result]}'
+                )
+
+        lines += [
+            "# HELP ratelimit_hot_key_requests Estimated requests for the most frequent keys.",
+            "# TYPE ratelimit_hot_key_requests gauge",
+        ]
+        for key, count, _ in snapshot['hot_keys']:
+            lines.append(f'ratelimit_hot_key_requests{{key="{_escape(key)}"}} {count}')
+
+        lock_wait = snapshot['lock_wait_seconds']
+        lines += [
+            "# HELP ratelimit_lock_wait_seconds Time spent waiting for the storage lock.",
+            "# TYPE ratelimit_lock_wait_seconds histogram",
+        ]
+        for bound, count in lock_wait['buckets']:
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'ratelimit_lock_wait_seconds_bucket{{le="{le}"}} {count}')
+        lines.append(f"ratelimit_lock_wait_seconds_sum {lock_wait['sum']!r}")
+        lines.append(f"ratelimit_lock_wait_seconds_count {lock_wait['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def start_http_server(metrics: LimiterMetrics, port: int = 9100, host: str = "") -> http.server.ThreadingHTTPServer:
+    """
+    Serve prometheus_text() at /metrics from a daemon thread.
+    Call shutdown() on the returned server to stop it.
+    """
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,233 @@
+"""
+Distributed token buckets in Redis.
+
+RedisStorage runs the refill math of InMemoryStorage.take_token inside a
+Lua script, so every check is one atomic server-side operation no matter
+how many hosts share the limit. Time comes from the Redis server clock
+(TIME), so hosts with skewed clocks still agree on elapsed time.
+
+Each bucket is a hash {tokens, ts} that expires once it would have
+refilled to capacity; an expired bucket and a full one are the same, so
+idle keys cost no memory on the server.
+
+Works with any Redis-compatible server (Redis >= 5, Valkey, KeyDB) and
+with fakeredis[lua] for tests. In Redis Cluster, keys checked together by
+take_tokens() must share a hash tag, e.g. "{user:1}:api" and "{user:1}:org".
+"""
+import time
+from typing import List, Sequence
+
+try:
+    import redis
+except ImportError:  # Optional: only needed for this backend
+    redis = None
+
+from .storage import RateLimitResult, ShardedInMemoryStorage, StorageBackend, TokenRequest
+
+# KEYS: bucket keys; ARGV: capacity, refill_rate, cost for each key in turn.
+# Mirrors storage._settle(): costs for a repeated key add up, the first
+# request's capacity and refill rate apply, and either every bucket is
+# charged or none is. Returns {allowed, retry_after as a string}.
+TAKE_TOKENS_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local order, limits, demand = {}, {}, {}
+for i, key in ipairs(KEYS) do
+  local cost = tonumber(ARGV[i * 3])
+  if not limits[key] then
+    limits[key] = {tonumber(ARGV[i * 3 - 2]), tonumber(ARGV[i * 3 - 1])}
+    demand[key] = 0
+    table.insert(order, key)
+  end
+  demand[key] = demand[key] + cost
+end
+
+local available = {}
+local retry_after = 0
+for _, key in ipairs(order) do
+  local capacity, rate = limits[key][1], limits[key][2]
+  local state = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = capacity
+  if state[1] then
+    local elapsed = math.max(0, now - tonumber(state[2]))
+    tokens = math.min(capacity, tonumber(state[1]) + elapsed * rate)
+  end
+  available[key] = tokens
+
+  local deficit = demand[key] - tokens
+  if deficit > 0 then
+    if demand[key] > capacity or rate <= 0 then
+      retry_after = math.huge
+    else
+      retry_after = math.max(retry_after, deficit / rate)
+    end
+  end
+end
+
+local allowed = retry_after == 0
+for _, key in ipairs(order) do
+  local capacity, rate = limits[key][1], limits[key][2]
+  local tokens = available[key]
+  if allowed then tokens = tokens - demand[key] end
+  -- Checkpoint the refill even if we fail
+  redis.call('HSET', key, 'tokens', string.format('%.17g', tokens), 'ts', string.format('%.17g', now))
+  if rate > 0 then
+    redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate * 1000) + 1000)
+  else
+    redis.call('PERSIST', key)
+  end
+end
+
+if allowed then return {1, '0'} end
+if retry_after == math.huge then return {0, 'inf'} end
+return {0, string.format('%.17g', retry_after)}
+"""
+
+# KEYS: one bucket key; ARGV: capacity, refill_rate, tokens to give back.
+# An expired bucket is full, so there is nothing to return to.
+RETURN_TOKENS_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+if not state[1] then return 0 end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local capacity, rate = tonumber(ARGV[1]), tonumber(ARGV[2])
+local elapsed = math.max(0, now - tonumber(state[2]))
+local tokens = math.min(capacity, tonumber(state[1]) + elapsed * rate + tonumber(ARGV[3]))
+redis.call('HSET', KEYS[1], 'tokens', string.format('%.17g', tokens), 'ts', string.format('%.17g', now))
+if rate > 0 then
+  redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+end
+return 1
+"""
+
+FALLBACK_MODES = ("open", "closed", "local")
+
+
+class RedisStorage(StorageBackend):
+    """
+    Token bucket storage shared through a Redis-compatible server.
+
+    Args:
+        client: A redis.Redis client. Its connection pool is shared by all
+            threads; size it with max_connections. If None, one is created
+            from `url`.
+        url: Server URL used when no client is given.
+        prefix: Prepended to every bucket key.
+        fallback: What to do while the server is unreachable:
+            "open" allows every request, "closed" denies every request and
+            "local" enforces the limit per process with in-memory buckets.
+        retry_interval: Seconds to stay on the fallback after a failure
+            before trying the server again, so an outage does not add a
+            connection timeout to every request.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "ratelimit:",
+        fallback: str = "closed",
+        retry_interval: float = 1.0,
+        max_connections: int = 50,
+        socket_timeout: float = 0.1,
+    ):
+        if fallback not in FALLBACK_MODES:
+            raise ValueError(f"fallback must be one of {FALLBACK_MODES}")
+        if client is None:
+            if redis is None:
+                raise ImportError("RedisStorage requires the 'redis' package")
+            pool = redis.ConnectionPool.from_url(
+                url,
+                max_connections=max_connections,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_timeout,
+            )
+            client = redis.Redis(connection_pool=pool)
+        # Resolved once, so an injected Redis-compatible client works
+        # without the package; such clients raise the builtin socket errors
+        if redis is not None:
+            self._errors = (redis.ConnectionError, redis.TimeoutError)
+        else:
+            self._errors = (ConnectionError, TimeoutError)
+        self.client = client
+        self.prefix = prefix
+        self.fallback = fallback
+        self.retry_interval = retry_interval
+        self._script = client.register_script(TAKE_TOKENS_SCRIPT)
+        self._return_script = client.register_script(RETURN_TOKENS_SCRIPT)
+        self._local = ShardedInMemoryStorage() if fallback == "local" else None
+        self._unavailable_until = 0.0
+        self.failures = 0
+
+    def _arguments(self, requests: Sequence[TokenRequest]):
+        keys = [self.prefix + request.key for request in requests]
+        args = []
+        for request in requests:
+            args.extend((request.capacity, repr(float(request.refill_rate)), repr(float(request.cost))))
+        return keys, args
+
+    @staticmethod
+    def _result(reply) -> RateLimitResult:
+        allowed, retry_after = reply
+        return RateLimitResult(bool(allowed), float(retry_after))
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _failed(self) -> None:
+        self.failures += 1
+        self._unavailable_until = time.monotonic() + self.retry_interval
+
+    def _fallback(self, requests: Sequence[TokenRequest]) -> RateLimitResult:
+        if self.fallback == "open":
+            return RateLimitResult(True)
+        if self.fallback == "closed":
+            return RateLimitResult(False, self.retry_interval)
+        return self._local.take_tokens(requests)
+
+    def take_token(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> bool:
+        return self.take_tokens([TokenRequest(key, capacity, refill_rate, cost)]).allowed
+
+    def take_tokens(self, requests: Sequence[TokenRequest]) -> RateLimitResult:
+        for request in requests:
+            if request.cost < 0:
+                raise ValueError("cost must not be negative")
+        if not self._available():
+            return self._fallback(requests)
+        keys, args = self._arguments(requests)
+        try:
+            return self._result(self._script(keys=keys, args=args))
+        except self._errors:
+            self._failed()
+            return self._fallback(requests)
+
+    def return_tokens(self, key: str, capacity: int, refill_rate: float, tokens: float) -> None:
+        if not self._available():
+            return
+        args = [capacity, repr(float(refill_rate)), repr(float(tokens))]
+        try:
+            self._return_script(keys=[self.prefix + key], args=args)
+        except self._errors:
+            # The tokens stay consumed until the bucket refills
+            self._failed()
+
+    def take_token_batch(self, requests: Sequence[TokenRequest]) -> List[RateLimitResult]:
+        """
+        Check independent requests in one pipelined round trip. Unlike
+        take_tokens(), each request is decided on its own.
+        """
+        if not self._available():
+            return [self._fallback([request]) for request in requests]
+        pipeline = self.client.pipeline(transaction=False)
+        for request in requests:
+            keys, args = self._arguments([request])
+            self._script(keys=keys, args=args, client=pipeline)
+        try:
+            replies = pipeline.execute()
+        except self._errors:
+            self._failed()
+            return [self._fallback([request]) for request in requests]
+        return [self._result(reply) for reply in replies]
@@ -0,0 +1,263 @@
+"""
+Token buckets shared by every process on a host.
+
+SharedMemoryStorage keeps its buckets in a memory-mapped file (put it on
+/dev/shm to keep it in RAM), so all gunicorn/uvicorn workers that open
+the same path enforce one limit together instead of one each.
+
+Layout: a 64-byte header followed by `slots` fixed-size slots, split into
+`stripes` equal regions. Each slot is
+
+    key hash (uint64) | tokens (double) | updated_at (double) | full_at (double)
+
+A key lives in the region picked by its hash and is placed with linear
+probing inside that region, so one region lock covers every slot the key
+can touch. Region locks are POSIX byte-range locks (fcntl.lockf) on the
+region's bytes, paired with a threading.Lock because POSIX locks do not
+exclude threads of the same process.
+
+Keys are identified by a 64-bit BLAKE2 hash; two keys colliding would
+share a bucket, which at 2^-64 per pair is ignored. Slots are never
+emptied, only reused: a key that is not found within MAX_PROBES slots
+takes the first empty slot, else the probed slot that is (or soonest
+will be) full again. Reusing a full bucket is invisible to callers, so
+size `slots` well above the number of keys active within one refill
+period. time.monotonic() is system-wide on Linux, so every process
+agrees on elapsed time.
+"""
+import errno
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Container, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .storage import RateLimitResult, StorageBackend, TokenRequest, _settle
+
+MAGIC = b"RLSHM001"
+HEADER = struct.Struct("<8sQQ")  # magic, slots, stripes
+HEADER_SIZE = 64
+SLOT = struct.Struct("<Qddd")
+MAX_PROBES = 16
+
+
+def key_hash(key: str) -> int:
+    """Stable 64-bit key hash; 0 is reserved for empty slots."""
+    value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1
+
+
+class SharedMemoryStorage(StorageBackend):
+    """
+    Cross-process token bucket storage in a shared memory-mapped file.
+
+    Args:
+        path: File backing the table. Every process must pass the same path;
+            the first one creates and sizes it, later ones reuse its layout.
+        slots: Total number of buckets the table can hold.
+        stripes: Number of independently locked regions.
+    """
+
+    def __init__(self, path: str, slots: int = 1 << 20, stripes: int = 64):
+        if stripes < 1 or slots < stripes:
+            raise ValueError("need at least one slot per stripe")
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            slots, stripes = self._initialize(slots, stripes)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._stripes = stripes
+        self._stripe_slots = slots // stripes
+        self._mmap = mmap.mmap(self._fd, HEADER_SIZE + slots * SLOT.size)
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self.evictions = 0
+
+    def _initialize(self, slots: int, stripes: int) -> Tuple[int, int]:
+        """Create the table if the file is new, else read its layout."""
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, HEADER_SIZE, 0)
+        try:
+            header = os.pread(self._fd, HEADER.size, 0)
+            if len(header) < HEADER.size:
+                # New file: zero-filled slots are empty
+                os.ftruncate(self._fd, HEADER_SIZE + slots * SLOT.size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, slots, stripes), 0)
+                return slots, stripes
+            magic, slots, stripes = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a rate limiter table")
+            return slots, stripes
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, HEADER_SIZE, 0)
+
+    def close(self) -> None:
+        self._mmap.close()
+        os.close(self._fd)
+
+    def __enter__(self) -> "SharedMemoryStorage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _region(self, stripe: int) -> Tuple[int, int]:
+        """(length, offset) of a stripe's bytes, for fcntl.lockf."""
+        length = self._stripe_slots * SLOT.size
+        return length, HEADER_SIZE + stripe * length
+
+    def _lock(self, stripe: int) -> None:
+        self._locks[stripe].acquire()
+        try:
+            while True:
+                try:
+                    fcntl.lockf(self._fd, fcntl.LOCK_EX, *self._region(stripe))
+                    return
+                except OSError as e:
+                    # The kernel tracks POSIX lock waits per process, so two
+                    # processes whose threads wait on each other's stripes
+                    # look deadlocked. Stripes are always locked in index
+                    # order, so no real deadlock exists: retry.
+                    if e.errno != errno.EDEADLK:
+                        raise
+                    time.sleep(0)
+        except BaseException:
+            self._locks[stripe].release()
+            raise
+
+    def _unlock(self, stripe: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, *self._region(stripe))
+        self._locks[stripe].release()
+
+    def _probes(self, hashed: int) -> Iterator[int]:
+        """Offsets of the slots a key hash may occupy, in probe order."""
+        stripe = hashed % self._stripes
+        home = (hashed // self._stripes) % self._stripe_slots
+        base = HEADER_SIZE + stripe * self._stripe_slots * SLOT.size
+        for probe in range(min(MAX_PROBES, self._stripe_slots)):
+            yield base + ((home + probe) % self._stripe_slots) * SLOT.size
+
+    def _lookup(self, hashed: int) -> Optional[Tuple[int, float, float]]:
+        """
+        Like _find(), but never claims a slot: returns None if the key has
+        none. Must be called with its stripe locked.
+        """
+        for offset in self._probes(hashed):
+            slot_hash, tokens, updated_at, _ = SLOT.unpack_from(self._mmap, offset)
+            if slot_hash == hashed:
+                return offset, tokens, updated_at
+            if slot_hash == 0:
+                break
+        return None
+
+    def _find(self, hashed: int, capacity: int, now: float, claimed: Container[int] = ()) -> Tuple[int, float, float]:
+        """
+        Locate or claim the slot for a key hash. Must be called with its
+        stripe locked. Slots in `claimed` (held by other keys of the same
+        batch) are never reused.
+
+        Returns:
+            (offset, tokens, updated_at) with a fresh full bucket if claimed.
+        """
+        victim = None
+        victim_full_at = math.inf
+        for offset in self._probes(hashed):
+            slot_hash, tokens, updated_at, full_at = SLOT.unpack_from(self._mmap, offset)
+            if slot_hash == hashed:
+                return offset, tokens, updated_at
+            if slot_hash == 0:
+                # Slots are never emptied, so the key cannot be further on
+                victim, victim_full_at = offset, -math.inf
+                break
+            if offset not in claimed and (victim is None or full_at < victim_full_at):
+                victim, victim_full_at = offset, full_at
+
+        if victim is None:
+            raise RuntimeError("batch touches more keys than one stripe can probe")
+        if victim_full_at > now:
+            # No empty or fully refilled slot in reach: reuse the one closest to full
+            self.evictions += 1
+        SLOT.pack_into(self._mmap, victim, hashed, float(capacity), now, now)
+        return victim, float(capacity), now
+
+    def _store(self, offset: int, hashed: int, tokens: float, capacity: int, refill_rate: float, now: float) -> None:
+        missing = float(capacity) - tokens
+        if missing <= 0.0:
+            full_at = now
+        elif refill_rate > 0:
+            full_at = now + missing / refill_rate
+        else:
+            full_at = math.inf
+        SLOT.pack_into(self._mmap, offset, hashed, tokens, now, full_at)
+
+    def take_token(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> bool:
+        hashed = key_hash(key)
+        stripe = hashed % self._stripes
+        self._lock(stripe)
+        try:
+            current_time = time.monotonic()
+            offset, tokens, updated_at = self._find(hashed, capacity, current_time)
+            elapsed = current_time - updated_at
+            tokens = min(float(capacity), tokens + elapsed * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            # Checkpoint the refill even if we fail
+            self._store(offset, hashed, tokens, capacity, refill_rate, current_time)
+            return allowed
+        finally:
+            self._unlock(stripe)
+
+    def return_tokens(self, key: str, capacity: int, refill_rate: float, tokens: float) -> None:
+        hashed = key_hash(key)
+        stripe = hashed % self._stripes
+        self._lock(stripe)
+        try:
+            found = self._lookup(hashed)
+            if found is None:
+                # Never used or evicted: nothing to give back to, and
+                # claiming a slot here could evict a live key
+                return
+            offset, available, updated_at = found
+            current_time = time.monotonic()
+            elapsed = current_time - updated_at
+            available = min(float(capacity), available + elapsed * refill_rate + tokens)
+            self._store(offset, hashed, available, capacity, refill_rate, current_time)
+        finally:
+            self._unlock(stripe)
+
+    def take_tokens(self, requests: Sequence[TokenRequest]) -> RateLimitResult:
+        hashes = {request.key: key_hash(request.key) for request in requests}
+        # Lock stripes in index order so concurrent batches cannot deadlock
+        stripes = sorted({hashed % self._stripes for hashed in hashes.values()})
+        locked: List[int] = []
+        try:
+            for stripe in stripes:
+                self._lock(stripe)
+                locked.append(stripe)
+
+            current_time = time.monotonic()
+            slots: Dict[str, Tuple[int, TokenRequest]] = {}
+            available: Dict[str, float] = {}
+            for request in requests:
+                if request.key in slots:
+                    continue
+                claimed = {offset for offset, _ in slots.values()}
+                offset, tokens, updated_at = self._find(
+                    hashes[request.key], request.capacity, current_time, claimed
+                )
+                elapsed = current_time - updated_at
+                slots[request.key] = (offset, request)
+                available[request.key] = min(float(request.capacity), tokens + elapsed * request.refill_rate)
+
+            result = _settle(requests, available)
+            for key, (offset, request) in slots.items():
+                self._store(offset, hashes[key], available[key], request.capacity, request.refill_rate, current_time)
+            return result
+        finally:
+            for stripe in reversed(locked):
+                self._unlock(stripe)
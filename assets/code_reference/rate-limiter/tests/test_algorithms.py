@@ -0,0 +1,98 @@
+import math
+import time
+import pytest
+import threading
+import sys
+import os
+
+# Ensure src is in path if running from repo root
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from src.algorithms import GCRAStorage, SlidingWindowCounterStorage, SlidingWindowLogStorage
+from src.limiter import RateLimiter
+from src.storage import TokenRequest
+
+ALGORITHMS = [GCRAStorage, SlidingWindowCounterStorage, SlidingWindowLogStorage]
+
+@pytest.mark.parametrize("backend", ALGORITHMS)
+def test_burst_then_block(backend):
+    limiter = RateLimiter(backend())
+    for _ in range(3):
+        assert limiter.allow_request("user1", 3, 0.1) is True
+    result = limiter.check("user1", 3, 0.1)
+    assert not result
+    # At most two windows of 30s, for the sliding counter
+    assert 0 < result.retry_after <= 60
+
+@pytest.mark.parametrize("backend", ALGORITHMS)
+def test_recovers_after_retry_after(backend):
+    limiter = RateLimiter(backend())
+    assert limiter.allow_request("user1", 1, 20.0) is True
+    result = limiter.check("user1", 1, 20.0)
+    assert not result
+    time.sleep(result.retry_after + 0.01)
+    assert limiter.allow_request("user1", 1, 20.0) is True
+
+@pytest.mark.parametrize("backend", ALGORITHMS)
+def test_weighted_cost_and_impossible_cost(backend):
+    limiter = RateLimiter(backend())
+    assert limiter.allow_request("user", 5, 0.1, cost=4) is True
+    assert limiter.allow_request("user", 5, 0.1, cost=2) is False
+    assert limiter.allow_request("user", 5, 0.1, cost=1) is True
+    assert limiter.check("other", 5, 0.1, cost=6).retry_after == math.inf
+
+@pytest.mark.parametrize("backend", ALGORITHMS)
+def test_zero_refill_is_a_fixed_allowance(backend):
+    # As with the token bucket: capacity in total, never refilled
+    limiter = RateLimiter(backend())
+    assert limiter.allow_request("k", 5, 0.0, cost=3) is True
+    assert limiter.allow_many([TokenRequest("k", 5, 0.0, 2), TokenRequest("j", 5, 0.0)])
+    result = limiter.check("k", 5, 0.0)
+    assert not result and result.retry_after == math.inf
+    assert limiter.allow_request("k", 5, 0.0, cost=0) is True
+
+@pytest.mark.parametrize("backend", ALGORITHMS)
+def test_allow_many_is_all_or_nothing(backend):
+    limiter = RateLimiter(backend())
+    requests = [TokenRequest("user", 5, 0.01), TokenRequest("org", 1, 0.01)]
+    assert limiter.allow_many(requests)
+    assert not limiter.allow_many(requests)
+    # The denied batch charged nothing
+    assert limiter.allow_request("user", 5, 0.01, cost=4) is True
+
+@pytest.mark.parametrize("backend", ALGORITHMS)
+def test_thread_safety(backend):
+    limiter = RateLimiter(backend(shards=4))
+    success_count = 0
+    lock = threading.Lock()
+
+    def task():
+        nonlocal success_count
+        if limiter.allow_request("concurrent_key", 100, 0.001):
+            with lock:
+                success_count += 1
+
+    threads = [threading.Thread(target=task) for _ in range(150)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert success_count == 100
+
+def test_gcra_stores_one_float_per_key():
+    storage = GCRAStorage(shards=1)
+    storage.take_token("user", 10, 1.0)
+    assert isinstance(storage._states[0]["user"], float)
+
+def test_sliding_counter_weights_previous_window():
+    storage = SlidingWindowCounterStorage(shards=1)
+    # Window of 10 requests per second; fill one window, then step halfway
+    # into the next: about half of the previous window still counts
+    now = time.monotonic()
+    window_start = now - now % 1.0
+    assert storage._check(storage._states[0], "user", window_start + 0.5, 10, 10.0, 10) == 0.0
+    storage._commit(storage._states[0], "user", window_start + 0.5, 10, 10.0, 10)
+    states = storage._states[0]
+    assert storage._check(states, "user", window_start + 1.5, 10, 10.0, 5) == 0.0
+    assert storage._check(states, "user", window_start + 1.5, 10, 10.0, 6) == pytest.approx(0.1)
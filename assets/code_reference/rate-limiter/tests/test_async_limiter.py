@@ -0,0 +1,118 @@
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+# Ensure src is in path if running from repo root
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from src.limiter import AsyncRateLimiter, RateLimitExceeded, limit_requests
+from src.storage import AsyncInMemoryStorage, AsyncStorageBackend, InMemoryStorage, TokenRequest
+
+def test_async_allow_and_block():
+    async def scenario():
+        limiter = AsyncRateLimiter(AsyncInMemoryStorage())
+        assert await limiter.allow_request("user1", 2, 0.1) is True
+        assert await limiter.allow_request("user1", 2, 0.1) is True
+        assert await limiter.allow_request("user1", 2, 0.1) is False
+
+    asyncio.run(scenario())
+
+def test_async_allow_many_is_all_or_nothing():
+    async def scenario():
+        limiter = AsyncRateLimiter(AsyncInMemoryStorage())
+        requests = [TokenRequest("user", 5, 0.1), TokenRequest("org", 1, 0.1)]
+        assert await limiter.allow_many(requests)
+        denied = await limiter.allow_many(requests)
+        assert not denied
+        assert denied.retry_after > 0
+        assert await limiter.allow_request("user", 5, 0.1, cost=4) is True
+
+    asyncio.run(scenario())
+
+def test_acquire_waits_for_refill():
+    async def scenario():
+        limiter = AsyncRateLimiter(AsyncInMemoryStorage())
+        await limiter.acquire("user", 1, 20.0)
+        start = time.monotonic()
+        await limiter.acquire("user", 1, 20.0)
+        return time.monotonic() - start
+
+    # One token at 20 tokens/s: about 50 ms
+    assert 0.04 <= asyncio.run(scenario()) < 0.5
+
+def test_acquire_timeout_and_impossible_cost():
+    async def scenario():
+        limiter = AsyncRateLimiter(AsyncInMemoryStorage())
+        await limiter.acquire("user", 1, 0.01)
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire("user", 1, 0.01, timeout=0.05)
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire("other", 1, 1.0, cost=2)
+
+    asyncio.run(scenario())
+
+def test_acquire_serves_concurrent_tasks():
+    async def scenario():
+        limiter = AsyncRateLimiter(AsyncInMemoryStorage())
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.acquire("shared", 2, 50.0) for _ in range(6)))
+        return time.monotonic() - start
+
+    # Burst of 2, then 4 more tokens at 50/s: about 80 ms
+    assert 0.07 <= asyncio.run(scenario()) < 0.5
+
+def test_decorator_on_async_function():
+    @limit_requests(lambda *args, **kwargs: "static_key", capacity=2, refill_rate=0.1)
+    async def handler():
+        return "success"
+
+    async def scenario():
+        assert await handler() == "success"
+        assert await handler() == "success"
+        with pytest.raises(RateLimitExceeded):
+            await handler()
+
+    asyncio.run(scenario())
+
+def test_decorator_accepts_sync_storage_for_async_function():
+    @limit_requests(lambda *args, **kwargs: "k", capacity=1, refill_rate=0.1, storage=InMemoryStorage())
+    async def handler():
+        return "success"
+
+    async def scenario():
+        assert await handler() == "success"
+        with pytest.raises(RateLimitExceeded):
+            await handler()
+
+    asyncio.run(scenario())
+
+def test_async_storage_rejects_sync_function():
+    with pytest.raises(TypeError):
+        @limit_requests(lambda *args, **kwargs: "k", capacity=1, refill_rate=1, storage=AsyncInMemoryStorage())
+        def handler():
+            return "success"
+
+class LegacyAsyncStorage(AsyncStorageBackend):
+    """A third-party backend written before take_tokens() existed."""
+
+    def __init__(self):
+        self._inner = InMemoryStorage()
+
+    async def take_token(self, key, capacity, refill_rate, cost=1.0):
+        return self._inner.take_token(key, capacity, refill_rate, cost)
+
+    async def return_tokens(self, key, capacity, refill_rate, tokens):
+        self._inner.return_tokens(key, capacity, refill_rate, tokens)
+
+def test_default_async_take_tokens_for_backends_with_only_take_token():
+    async def scenario():
+        limiter = AsyncRateLimiter(LegacyAsyncStorage())
+        requests = [TokenRequest("a", 2, 0.001), TokenRequest("b", 1, 0.001)]
+        assert await limiter.allow_many(requests)
+        assert not await limiter.allow_many(requests)
+        # "a" was charged before "b" was denied, then given back
+        assert await limiter.allow_request("a", 2, 0.001) is True
+        assert await limiter.allow_request("a", 2, 0.001) is False
+    asyncio.run(scenario())
@@ -0,0 +1,102 @@
+import time
+import pytest
+import threading
+import sys
+import os
+
+# Ensure src is in path if running from repo root
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from src.leased_storage import LeasedStorage, _close_open_storages
+from src.limiter import RateLimiter
+from src.storage import InMemoryStorage, ShardedInMemoryStorage, TokenRequest
+
+def test_calls_are_served_from_the_lease():
+    shared = InMemoryStorage()
+    storage = LeasedStorage(shared, lease_size=10)
+    limiter = RateLimiter(storage)
+    for _ in range(25):
+        assert limiter.allow_request("user", 100, 0.01) is True
+    assert storage.backend_calls == 3
+    # 30 tokens left the shared bucket for 25 calls
+    assert shared.take_token("user", 100, 0.01, cost=70) is True
+    assert shared.take_token("user", 100, 0.01) is False
+
+def test_leftovers_are_returned_on_close():
+    shared = InMemoryStorage()
+    with LeasedStorage(shared, lease_size=10) as storage:
+        assert storage.take_token("user", 10, 0.001) is True
+        # The other 9 are leased, not available to anyone else
+        assert shared.take_token("user", 10, 0.001) is False
+    assert shared.take_token("user", 10, 0.001, cost=9) is True
+
+def test_open_storages_are_closed_at_exit():
+    shared = InMemoryStorage()
+    storage = LeasedStorage(shared, lease_size=10)
+    assert storage.take_token("user", 10, 0.001) is True
+    # What the atexit hook runs
+    _close_open_storages()
+    assert shared.take_token("user", 10, 0.001, cost=9) is True
+
+def test_expired_leases_are_returned():
+    shared = ShardedInMemoryStorage()
+    storage = LeasedStorage(shared, lease_size=5, lease_ttl=0.05)
+    assert storage.take_token("user", 5, 0.001) is True
+    assert shared.take_token("user", 5, 0.001) is False
+    time.sleep(0.06)
+    assert storage.expire() == 1
+    assert shared.take_token("user", 5, 0.001, cost=4) is True
+
+def test_takes_only_the_cost_when_a_full_lease_is_not_left():
+    shared = InMemoryStorage()
+    storage = LeasedStorage(shared, lease_size=10)
+    assert shared.take_token("user", 10, 0.001, cost=8) is True
+    assert storage.take_token("user", 10, 0.001) is True
+    assert storage.take_token("user", 10, 0.001) is True
+    assert storage.take_token("user", 10, 0.001) is False
+
+def test_batches_go_to_the_shared_backend():
+    storage = LeasedStorage(InMemoryStorage(), lease_size=10)
+    limiter = RateLimiter(storage)
+    requests = [TokenRequest("user", 5, 0.01), TokenRequest("org", 1, 0.01)]
+    assert limiter.allow_many(requests)
+    assert not limiter.allow_many(requests)
+
+def test_over_admission_is_bounded_by_outstanding_leases():
+    capacity, refill_rate, lease_size = 20, 100.0, 4
+    shared = InMemoryStorage()
+    # Several "processes" sharing one bucket
+    instances = [LeasedStorage(shared, lease_size=lease_size, lease_ttl=10.0) for _ in range(3)]
+    for storage in instances:
+        assert storage.take_token("api", capacity, refill_rate) is True
+    # Let the shared bucket refill while the leases are still held
+    time.sleep(capacity / refill_rate + 0.05)
+
+    admitted = 0
+    lock = threading.Lock()
+
+    def task(storage):
+        nonlocal admitted
+        for _ in range(50):
+            if storage.take_token("api", capacity, refill_rate):
+                with lock:
+                    admitted += 1
+
+    threads = [threading.Thread(target=task, args=(instances[i % 3],)) for i in range(6)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+
+    # A full bucket plus refill, plus at most one lease per instance
+    limit = capacity + refill_rate * elapsed
+    assert admitted <= limit + len(instances) * lease_size
+    assert admitted >= capacity
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        LeasedStorage(InMemoryStorage(), lease_size=0)
+    with pytest.raises(ValueError):
+        LeasedStorage(InMemoryStorage(), lease_ttl=0)
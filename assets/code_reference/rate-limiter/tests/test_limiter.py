@@ -8,7 +8,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
 
 from src.limiter import RateLimiter, limit_requests, RateLimitExceeded
-from src.storage import InMemoryStorage
+from src.storage import InMemoryStorage, ShardedInMemoryStorage, TokenRequest
 
 def test_allow_request_basic():
     storage = InMemoryStorage()
@@ -48,6 +48,22 @@ def test_decorator():
     with pytest.raises(RateLimitExceeded):
         my_func()
 
+def test_decorated_functions_share_the_default_storage():
+    limit = limit_requests(lambda *args, **kwargs: "shared_key", capacity=1, refill_rate=0.001)
+
+    @limit
+    def first():
+        return "first"
+
+    @limit
+    def second():
+        return "second"
+
+    assert first() == "first"
+    # One decorator, one storage: the only token is already gone
+    with pytest.raises(RateLimitExceeded):
+        second()
+
 def test_thread_safety():
     storage = InMemoryStorage()
     limiter = RateLimiter(storage)
@@ -73,3 +89,52 @@ def test_thread_safety():
 
     # Should have exactly 100 successes
     assert success_count == 100
+
+def test_weighted_cost():
+    limiter = RateLimiter(InMemoryStorage())
+    assert limiter.allow_request("heavy", 5, 0.1, cost=3) is True
+    assert limiter.allow_request("heavy", 5, 0.1, cost=3) is False
+    assert limiter.allow_request("heavy", 5, 0.1, cost=2) is True
+
+def test_retry_after_on_denial():
+    limiter = RateLimiter(InMemoryStorage())
+    assert limiter.check("slow", 1, 2.0).allowed is True
+    result = limiter.check("slow", 1, 2.0)
+    assert not result
+    # One token at 2 tokens/s is at most half a second away
+    assert 0.4 < result.retry_after <= 0.5
+    assert limiter.check("slow", 1, 2.0, cost=2).retry_after == float('inf')
+
+@pytest.mark.parametrize("storage_class", [InMemoryStorage, ShardedInMemoryStorage])
+def test_allow_many_is_all_or_nothing(storage_class):
+    limiter = RateLimiter(storage_class())
+    requests = [
+        TokenRequest("user:1", 10, 0.1),
+        TokenRequest("org:1", 2, 0.1),
+        TokenRequest("endpoint:/search", 10, 0.1, cost=2),
+    ]
+    assert limiter.allow_many(requests)
+    assert limiter.allow_many(requests)
+
+    denied = limiter.allow_many(requests)
+    assert not denied
+    assert denied.retry_after > 0
+    # The denied batch charged nothing: user:1 still has 8 tokens
+    assert limiter.allow_request("user:1", 10, 0.1, cost=8) is True
+    assert limiter.allow_request("endpoint:/search", 10, 0.1, cost=6) is True
+
+@pytest.mark.parametrize("storage_class", [InMemoryStorage, ShardedInMemoryStorage])
+def test_allow_many_sums_repeated_keys(storage_class):
+    limiter = RateLimiter(storage_class())
+    assert not limiter.allow_many([TokenRequest("k", 3, 0.1, cost=2), TokenRequest("k", 3, 0.1, cost=2)])
+    assert limiter.allow_many([TokenRequest("k", 3, 0.1, cost=2), TokenRequest("k", 3, 0.1, cost=1)])
+
+def test_decorator_reports_retry_after():
+    @limit_requests(lambda *args, **kwargs: "static_key", capacity=1, refill_rate=1, storage=InMemoryStorage())
+    def my_func():
+        return "success"
+
+    my_func()
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        my_func()
+    assert 0 < excinfo.value.retry_after <= 1.0
@@ -0,0 +1,47 @@
+import collections
+import sys
+import os
+
+# Ensure src is in path if running from repo root
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from src.main import LoadConfig, accuracy, draw_keys, oracle_admitted, run_load, zipf_cum_weights
+from src.storage import InMemoryStorage, ShardedInMemoryStorage
+
+def test_zipf_skews_towards_the_first_keys():
+    counts = collections.Counter(draw_keys(zipf_cum_weights(100, 1.2), 10000, seed=1))
+    assert set(counts) <= set(range(100))
+    assert counts[0] > counts[1] > counts[10]
+
+def test_zero_skew_is_uniform():
+    counts = collections.Counter(draw_keys(zipf_cum_weights(4, 0.0), 10000, seed=1))
+    assert all(2200 < counts[key] < 2800 for key in range(4))
+
+def test_oracle_replays_in_time_order():
+    # Capacity 2, 1 token/s: calls at 0, 0.1, 0.2 and 1.2 seconds
+    samples = [(int(t * 1e9), 0, 7, True) for t in (1.2, 0.2, 0.0, 0.1)]
+    assert oracle_admitted(samples, 2, 1.0) == {7: 3}
+
+def test_accuracy_reports_over_and_under_admission():
+    samples = [(i, 0, 0, True) for i in range(3)] + [(i, 0, 1, False) for i in range(3)]
+    result = accuracy(samples, 2, 0.0)
+    assert result['admitted'] == 3
+    assert result['oracle_admitted'] == 4
+    assert result['over_admitted'] == 1
+    assert result['under_admitted'] == 2
+
+def test_run_load_matches_the_oracle():
+    config = LoadConfig(keys=50, threads=2, duration=0.2)
+    report = run_load(ShardedInMemoryStorage, config)
+    assert report['ops'] > 0
+    assert report['latency_us']['p99'] >= report['latency_us']['p50']
+    assert report['accuracy']['error_rate'] < 0.01
+
+def test_run_load_with_asyncio_tasks_and_metrics():
+    config = LoadConfig(keys=50, threads=1, tasks=5, duration=0.2, metrics=True)
+    report = run_load(InMemoryStorage, config)
+    assert report['ops'] > 0
+    assert report['metrics']['requests']['user']['allowed'] == report['accuracy']['admitted']
+    assert report['metrics']['hot_keys'][0][0] == "user:0"
+    # InMemoryStorage was built with the same metrics, so its lock is timed
+    assert report['metrics']['lock_wait_seconds']['count'] > 0
@@ -0,0 +1,133 @@
+import urllib.request
+import pytest
+import threading
+import sys
+import os
+
+# Ensure src is in path if running from repo root
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from src.limiter import RateLimiter, limit_requests, RateLimitExceeded
+from src.metrics import LimiterMetrics, SpaceSaving, default_key_prefix, start_http_server
+from src.storage import InMemoryStorage, TokenRequest
+
+def test_key_prefix():
+    assert default_key_prefix("user:42") == "user"
+    assert default_key_prefix("org:7:api") == "org"
+    assert default_key_prefix("user_42") == "user_"
+
+def test_counts_decisions_per_prefix():
+    metrics = LimiterMetrics()
+    limiter = RateLimiter(InMemoryStorage(), metrics=metrics)
+    for _ in range(3):
+        limiter.allow_request("user:1", 2, 0.01)
+    limiter.check("org:1", 1, 0.01)
+    limiter.allow_many([TokenRequest("user:2", 1, 0.01), TokenRequest("org:1", 1, 0.01)])
+
+    requests = metrics.snapshot()['requests']
+    assert requests["user"] == {'allowed': 2, 'denied': 2}
+    assert requests["org"] == {'allowed': 1, 'denied': 1}
+
+def test_counts_survive_key_cache_resets(monkeypatch):
+    monkeypatch.setattr("src.metrics.KEY_CACHE_SIZE", 4)
+    metrics = LimiterMetrics()
+    for _ in range(3):
+        for i in range(10):
+            metrics.record(f"user:{i}", allowed=i % 2 == 0)
+    assert metrics.snapshot()['requests'] == {"user": {'allowed': 15, 'denied': 15}}
+
+def test_counts_are_merged_across_threads():
+    metrics = LimiterMetrics()
+    limiter = RateLimiter(InMemoryStorage(), metrics=metrics)
+
+    def task():
+        for _ in range(100):
+            limiter.allow_request("shared:key", 1000, 0.01)
+
+    threads = [threading.Thread(target=task) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert metrics.snapshot()['requests']["shared"] == {'allowed': 800, 'denied': 0}
+
+def test_exited_threads_are_folded_and_forgotten():
+    metrics = LimiterMetrics(hot_key_sample=1)
+    limiter = RateLimiter(InMemoryStorage(), metrics=metrics)
+
+    # One short-lived thread at a time, as in a thread-per-request server
+    for _ in range(200):
+        thread = threading.Thread(target=limiter.allow_request, args=("conn:hot", 1000, 0.01))
+        thread.start()
+        thread.join()
+    assert len(metrics._threads) <= 2 * LimiterMetrics.RETIRE_AT
+
+    snapshot = metrics.snapshot()
+    assert metrics._threads == []
+    assert snapshot['requests']["conn"] == {'allowed': 200, 'denied': 0}
+    assert snapshot['hot_keys'][0][:2] == ("conn:hot", 200)
+
+def test_space_saving_finds_heavy_hitters():
+    sketch = SpaceSaving(8)
+    for i in range(1000):
+        sketch.add("hot" if i % 2 == 0 else f"cold{i}")
+        if i % 5 == 0:
+            sketch.add("warm")
+    top = sketch.top(2)
+    assert [key for key, _, _ in top] == ["hot", "warm"]
+    key, count, error = top[0]
+    # Estimates never undercount and overcount by at most the error bound
+    assert count - error <= 500 <= count
+
+def test_hot_keys_are_scaled_by_sampling():
+    metrics = LimiterMetrics(top_k=4, hot_key_sample=1)
+    limiter = RateLimiter(InMemoryStorage(), metrics=metrics)
+    for i in range(200):
+        limiter.allow_request("user:hot" if i % 2 else f"user:{i}", 10, 0.01)
+    hot_key, count, error = metrics.snapshot()['hot_keys'][0]
+    assert hot_key == "user:hot"
+    assert count - error <= 100 <= count
+
+def test_lock_wait_histogram():
+    metrics = LimiterMetrics()
+    limiter = RateLimiter(InMemoryStorage(metrics=metrics))
+    for _ in range(5):
+        limiter.allow_request("user:1", 10, 1.0)
+    limiter.allow_many([TokenRequest("user:1", 10, 1.0)])
+    lock_wait = metrics.snapshot()['lock_wait_seconds']
+    assert lock_wait['count'] == 6
+    assert lock_wait['buckets'][-1] == (float("inf"), 6)
+
+def test_decorator_records_denials():
+    metrics = LimiterMetrics()
+
+    @limit_requests(lambda *args, **kwargs: "api:static", capacity=1, refill_rate=0.01, metrics=metrics)
+    def handler():
+        return "success"
+
+    handler()
+    with pytest.raises(RateLimitExceeded):
+        handler()
+    assert metrics.snapshot()['requests']["api"] == {'allowed': 1, 'denied': 1}
+
+def test_prometheus_text_and_http_server():
+    metrics = LimiterMetrics(hot_key_sample=1)
+    limiter = RateLimiter(InMemoryStorage(metrics=metrics), metrics=metrics)
+    limiter.allow_request('say"hi":1', 1, 0.01)
+    limiter.allow_request('say"hi":1', 1, 0.01)
+
+    text = metrics.prometheus_text()
+    assert 'ratelimit_requests_total{prefix="say\\"hi\\"",result="denied"} 1' in text
+    assert 'ratelimit_hot_key_requests{key="say\\"hi\\":1"} 2' in text
+    assert 'ratelimit_lock_wait_seconds_bucket{le="+Inf"} 2' in text
+    assert "ratelimit_lock_wait_seconds_count 2" in text
+
+    server = start_http_server(metrics, port=0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.read().decode("utf-8") == text
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,126 @@
+import time
+import pytest
+import threading
+import sys
+import os
+
+# Ensure src is in path if running from repo root
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+fakeredis = pytest.importorskip("fakeredis")
+redis = pytest.importorskip("redis")
+
+from src.limiter import RateLimiter
+from src.redis_storage import RedisStorage
+from src.storage import TokenRequest
+
+@pytest.fixture
+def storage():
+    return RedisStorage(client=fakeredis.FakeRedis())
+
+def unreachable(fallback):
+    # Nothing listens on port 1, so every call fails fast
+    return RedisStorage(url="redis://127.0.0.1:1/0", fallback=fallback, retry_interval=60)
+
+def test_redis_block_and_refill(storage):
+    assert storage.take_token("user1", 1, 10.0) is True
+    assert storage.take_token("user1", 1, 10.0) is False
+    time.sleep(0.11)
+    assert storage.take_token("user1", 1, 10.0) is True
+
+def test_redis_shares_state_between_clients():
+    server = fakeredis.FakeServer()
+    first = RedisStorage(client=fakeredis.FakeRedis(server=server))
+    second = RedisStorage(client=fakeredis.FakeRedis(server=server))
+    assert first.take_token("shared", 1, 0.01) is True
+    assert second.take_token("shared", 1, 0.01) is False
+
+def test_redis_retry_after_and_cost(storage):
+    limiter = RateLimiter(storage)
+    assert limiter.check("slow", 2, 2.0, cost=2)
+    result = limiter.check("slow", 2, 2.0)
+    assert not result
+    assert 0.4 < result.retry_after <= 0.5
+    assert limiter.check("slow", 2, 2.0, cost=3).retry_after == float('inf')
+
+def test_redis_allow_many_is_all_or_nothing(storage):
+    limiter = RateLimiter(storage)
+    requests = [TokenRequest("user", 5, 0.01), TokenRequest("org", 1, 0.01)]
+    assert limiter.allow_many(requests)
+    assert not limiter.allow_many(requests)
+    assert limiter.allow_request("user", 5, 0.01, cost=4) is True
+
+def test_redis_buckets_expire_once_refilled(storage):
+    storage.take_token("idle", 10, 1.0, cost=2)
+    ttl = storage.client.pttl("ratelimit:idle")
+    # Two tokens at 1/s refill in 2s, plus a second of slack
+    assert 2000 < ttl <= 3000
+
+def test_redis_pipelined_batch_is_independent(storage):
+    results = storage.take_token_batch([
+        TokenRequest("a", 1, 0.01),
+        TokenRequest("a", 1, 0.01),
+        TokenRequest("b", 1, 0.01),
+    ])
+    assert [bool(result) for result in results] == [True, False, True]
+
+def test_redis_thread_safety(storage):
+    limiter = RateLimiter(storage)
+    success_count = 0
+    lock = threading.Lock()
+
+    def task():
+        nonlocal success_count
+        if limiter.allow_request("concurrent_key", 20, 0.001):
+            with lock:
+                success_count += 1
+
+    threads = [threading.Thread(target=task) for _ in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert success_count == 20
+
+def test_fallback_open():
+    storage = unreachable("open")
+    assert storage.take_token("k", 1, 0.01) is True
+    assert storage.take_token("k", 1, 0.01) is True
+    assert storage.failures == 1
+
+def test_fallback_closed():
+    storage = unreachable("closed")
+    result = RateLimiter(storage).check("k", 1, 0.01)
+    assert not result
+    assert result.retry_after == 60
+
+def test_fallback_local_enforces_per_process():
+    storage = unreachable("local")
+    assert storage.take_token("k", 1, 0.01) is True
+    assert storage.take_token("k", 1, 0.01) is False
+    assert [bool(r) for r in storage.take_token_batch([TokenRequest("j", 1, 0.01)] * 2)] == [True, False]
+
+class DownClient:
+    """A Redis-compatible client whose server is unreachable."""
+
+    def register_script(self, script):
+        def run(keys, args, client=None):
+            raise ConnectionError("connection refused")
+        return run
+
+def test_injected_client_without_redis_package(monkeypatch):
+    monkeypatch.setattr("src.redis_storage.redis", None)
+    storage = RedisStorage(client=DownClient(), fallback="open")
+    assert storage.take_token("user1", 1, 1.0) is True
+    storage.return_tokens("user1", 1, 1.0, 1)
+    assert storage.failures == 1
+
+def test_redis_return_tokens(storage):
+    assert storage.take_token("user", 5, 0.001, cost=5) is True
+    storage.return_tokens("user", 5, 0.001, 3)
+    assert storage.take_token("user", 5, 0.001, cost=3) is True
+    assert storage.take_token("user", 5, 0.001) is False
+    # Never above capacity
+    storage.return_tokens("user", 5, 0.001, 100)
+    assert storage.take_token("user", 5, 0.001, cost=6) is False
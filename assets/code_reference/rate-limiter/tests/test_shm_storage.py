@@ -0,0 +1,94 @@
+import functools
+import time
+import pytest
+import threading
+import sys
+import os
+
+# Ensure src is in path if running from repo root
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from src.limiter import RateLimiter
+from src.shm_storage import SharedMemoryStorage
+from src.storage import TokenRequest
+from src.benchmark import ENFORCED_LIMIT, run_process_benchmark
+
+def test_shm_block_and_refill(tmp_path):
+    with SharedMemoryStorage(str(tmp_path / "buckets"), slots=64, stripes=4) as storage:
+        assert storage.take_token("user1", 1, 10.0) is True
+        assert storage.take_token("user1", 1, 10.0) is False
+        time.sleep(0.11)
+        assert storage.take_token("user1", 1, 10.0) is True
+
+def test_shm_state_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "buckets")
+    with SharedMemoryStorage(path, slots=64, stripes=4) as first:
+        assert first.take_token("shared", 2, 0.01) is True
+        # A second mapping (as in another worker) adopts the existing layout
+        with SharedMemoryStorage(path, slots=1024, stripes=16) as second:
+            assert second.take_token("shared", 2, 0.01) is True
+            assert second.take_token("shared", 2, 0.01) is False
+        assert first.take_token("shared", 2, 0.01) is False
+
+def test_shm_rejects_foreign_file(tmp_path):
+    path = tmp_path / "not-a-table"
+    path.write_bytes(b"x" * 128)
+    with pytest.raises(ValueError):
+        SharedMemoryStorage(str(path))
+
+def test_shm_reuses_full_slots_when_table_is_full(tmp_path):
+    with SharedMemoryStorage(str(tmp_path / "buckets"), slots=4, stripes=1) as storage:
+        for i in range(4):
+            assert storage.take_token(f"key_{i}", 1, 1000.0) is True
+        time.sleep(0.01)
+        # Every slot is taken but refilled, so new keys fit without eviction
+        assert storage.take_token("key_new", 1, 1000.0) is True
+        assert storage.evictions == 0
+
+def test_shm_allow_many_is_all_or_nothing(tmp_path):
+    with SharedMemoryStorage(str(tmp_path / "buckets"), slots=64, stripes=4) as storage:
+        limiter = RateLimiter(storage)
+        requests = [TokenRequest("user", 5, 0.01), TokenRequest("org", 1, 0.01)]
+        assert limiter.allow_many(requests)
+        assert not limiter.allow_many(requests)
+        assert limiter.allow_request("user", 5, 0.01, cost=4) is True
+
+def test_shm_thread_safety(tmp_path):
+    with SharedMemoryStorage(str(tmp_path / "buckets"), slots=64, stripes=4) as storage:
+        limiter = RateLimiter(storage)
+        success_count = 0
+        lock = threading.Lock()
+
+        def task():
+            nonlocal success_count
+            if limiter.allow_request("concurrent_key", 100, 0.001):
+                with lock:
+                    success_count += 1
+
+        threads = [threading.Thread(target=task) for _ in range(150)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert success_count == 100
+
+def test_shm_enforces_one_limit_across_processes(tmp_path):
+    factory = functools.partial(SharedMemoryStorage, str(tmp_path / "buckets"), 1024, 8)
+    result = run_process_benchmark(factory, processes=3, threads=2, keys=50, duration=0.1)
+    assert result['admitted'] == ENFORCED_LIMIT
+
+def test_shm_return_tokens(tmp_path):
+    with SharedMemoryStorage(str(tmp_path / "buckets"), slots=64, stripes=4) as storage:
+        assert storage.take_token("user", 5, 0.001, cost=5) is True
+        storage.return_tokens("user", 5, 0.001, 3)
+        assert storage.take_token("user", 5, 0.001, cost=3) is True
+        assert storage.take_token("user", 5, 0.001) is False
+
+def test_shm_return_tokens_for_unknown_key_evicts_nothing(tmp_path):
+    # One slot: claiming one for "ghost" would evict the drained "user"
+    with SharedMemoryStorage(str(tmp_path / "buckets"), slots=1, stripes=1) as storage:
+        assert storage.take_token("user", 5, 0.001, cost=5) is True
+        storage.return_tokens("ghost", 5, 0.001, 1)
+        assert storage.evictions == 0
+        assert storage.take_token("user", 5, 0.001) is False
@@ -0,0 +1,132 @@
+import time
+import pytest
+import threading
+import sys
+import os
+
+# Ensure src is in path if running from repo root
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from src.limiter import RateLimiter
+from src.storage import InMemoryStorage, ShardedInMemoryStorage, StorageBackend, TokenRequest
+from src.benchmark import run_benchmark
+
+def test_sharded_block_and_refill():
+    storage = ShardedInMemoryStorage(shards=4)
+    assert storage.take_token("user1", 1, 10.0) is True
+    assert storage.take_token("user1", 1, 10.0) is False
+
+    time.sleep(0.11)
+    assert storage.take_token("user1", 1, 10.0) is True
+
+def test_sharded_keys_are_independent():
+    storage = ShardedInMemoryStorage(shards=1)
+    assert storage.take_token("a", 1, 0.1) is True
+    assert storage.take_token("b", 1, 0.1) is True
+    assert storage.take_token("a", 1, 0.1) is False
+
+def test_sharded_rejects_zero_shards():
+    with pytest.raises(ValueError):
+        ShardedInMemoryStorage(shards=0)
+
+def test_sharded_thread_safety():
+    limiter = RateLimiter(ShardedInMemoryStorage(shards=8))
+    success_count = 0
+    lock = threading.Lock()
+
+    def task(key):
+        nonlocal success_count
+        for _ in range(15):
+            if limiter.allow_request(key, 10, 0.001):
+                with lock:
+                    success_count += 1
+
+    # 4 keys x 10 capacity: exactly 40 of the 600 requests may pass
+    threads = [threading.Thread(target=task, args=(f"key_{i % 4}",)) for i in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert success_count == 40
+
+def test_benchmark_reports_throughput():
+    result = run_benchmark(ShardedInMemoryStorage(), threads=2, keys=10, duration=0.05)
+    assert result['ops'] > 0
+    assert result['p99_us'] >= result['p50_us']
+
+def test_idle_full_buckets_are_evicted():
+    storage = ShardedInMemoryStorage(shards=1, idle_ttl=0.05)
+    assert storage.take_token("idle", 1, 100.0) is True
+    time.sleep(0.06)
+    # Any later call sweeps the idle, refilled bucket
+    storage.take_token("active", 1, 100.0)
+    assert len(storage) == 1
+    assert storage.evictions == 1
+
+def test_refilling_buckets_are_kept():
+    storage = ShardedInMemoryStorage(shards=1, idle_ttl=0.01)
+    assert storage.take_token("slow", 1, 0.001) is True
+    time.sleep(0.02)
+    assert storage.sweep() == 0
+    # Still drained: eviction must not hand out a fresh bucket
+    assert storage.take_token("slow", 1, 0.001) is False
+
+def test_sweep_evicts_everything_idle():
+    storage = ShardedInMemoryStorage(shards=4, idle_ttl=0.01)
+    for i in range(20):
+        storage.take_token(f"key_{i}", 1, 1000.0)
+    time.sleep(0.02)
+    assert storage.sweep() == 20
+    assert len(storage) == 0
+
+def test_zero_idle_ttl_with_zero_cost_or_denied_requests():
+    # The only bucket is evicted by its own sweep, leaving the stripe empty
+    storage = ShardedInMemoryStorage(shards=1, idle_ttl=0)
+    assert storage.take_token("a", 1, 1.0, cost=0) is True
+    assert not storage.take_tokens([TokenRequest("a", 1, 1.0, 5)])
+    assert len(storage) == 0
+
+def test_batch_never_evicts_its_own_keys():
+    # max_keys below the batch size: evicting "a" for "b" would drop its charge
+    storage = ShardedInMemoryStorage(shards=1, max_keys=1)
+    batch = [TokenRequest("a", 1, 0.001), TokenRequest("b", 1, 0.001)]
+    assert storage.take_tokens(batch)
+    assert storage.take_token("a", 1, 0.001) is False
+    assert storage.take_token("b", 1, 0.001) is False
+    # The next new key brings the stripe back within max_keys
+    storage.take_token("c", 1, 0.001)
+    assert len(storage) == 1
+
+def test_max_keys_evicts_least_recently_used():
+    storage = ShardedInMemoryStorage(shards=1, max_keys=2)
+    assert storage.take_token("a", 1, 0.001) is True
+    assert storage.take_token("b", 1, 0.001) is True
+    assert storage.take_token("a", 1, 0.001) is False  # "a" is now most recent
+    storage.take_token("c", 1, 0.001)
+
+    assert len(storage) == 2
+    assert storage.take_token("a", 1, 0.001) is False
+    # "b" was evicted, so it comes back with a full bucket
+    assert storage.take_token("b", 1, 0.001) is True
+
+class LegacyStorage(StorageBackend):
+    """A third-party backend written before take_tokens() existed."""
+
+    def __init__(self):
+        self._inner = InMemoryStorage()
+
+    def take_token(self, key, capacity, refill_rate, cost=1.0):
+        return self._inner.take_token(key, capacity, refill_rate, cost)
+
+    def return_tokens(self, key, capacity, refill_rate, tokens):
+        self._inner.return_tokens(key, capacity, refill_rate, tokens)
+
+def test_default_take_tokens_for_backends_with_only_take_token():
+    storage = LegacyStorage()
+    assert storage.take_tokens([TokenRequest("a", 2, 0.001), TokenRequest("b", 1, 0.001)])
+    result = storage.take_tokens([TokenRequest("a", 2, 0.001), TokenRequest("b", 1, 0.001)])
+    assert not result and result.retry_after > 0
+    # "a" was charged before "b" was denied, then given back
+    assert storage.take_token("a", 2, 0.001) is True
+    assert storage.take_token("a", 2, 0.001) is False
@@ -0,0 +1,102 @@
+// BlurHash placeholders for images processed by scripts/image_pipeline.py
+// Elements with data-blurhash get the decoded hash as their background
+// until the image on top of them has loaded. The decoder mirrors the
+// Python encoder; change both together.
+
+(function (root) {
+  const BASE83 =
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~";
+  // Placeholders are stretched anyway, so a tiny canvas is enough
+  const PLACEHOLDER_SIZE = 32;
+
+  function decode83(text) {
+    let value = 0;
+    for (const char of text) value = value * 83 + BASE83.indexOf(char);
+    return value;
+  }
+
+  function srgbToLinear(value) {
+    const v = value / 255;
+    return v <= 0.04045 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
+  }
+
+  function linearToSrgb(value) {
+    const v = Math.max(0, Math.min(1, value));
+    return v <= 0.0031308
+      ? Math.trunc(v * 12.92 * 255 + 0.5)
+      : Math.trunc((1.055 * Math.pow(v, 1 / 2.4) - 0.055) * 255 + 0.5);
+  }
+
+  function signPow(value, exponent) {
+    return Math.sign(value) * Math.pow(Math.abs(value), exponent);
+  }
+
+  // Returns RGBA pixels (Uint8ClampedArray) for a width x height image
+  function decode(hash, width, height) {
+    const sizeFlag = decode83(hash[0]);
+    const componentsY = Math.floor(sizeFlag / 9) + 1;
+    const componentsX = (sizeFlag % 9) + 1;
+    const maxValue = (decode83(hash[1]) + 1) / 166;
+
+    const colors = [];
+    const dc = decode83(hash.slice(2, 6));
+    colors.push([srgbToLinear(dc >> 16), srgbToLinear((dc >> 8) & 255), srgbToLinear(dc & 255)]);
+    for (let i = 1; i < componentsX * componentsY; i++) {
+      const value = decode83(hash.slice(4 + i * 2, 6 + i * 2));
+      colors.push([
+        signPow((Math.floor(value / 361) - 9) / 9, 2) * maxValue,
+        signPow(((Math.floor(value / 19) % 19) - 9) / 9, 2) * maxValue,
+        signPow(((value % 19) - 9) / 9, 2) * maxValue,
+      ]);
+    }
+
+    const pixels = new Uint8ClampedArray(width * height * 4);
+    for (let y = 0; y < height; y++) {
+      for (let x = 0; x < width; x++) {
+        let r = 0;
+        let g = 0;
+        let b = 0;
+        for (let j = 0; j < componentsY; j++) {
+          for (let i = 0; i < componentsX; i++) {
+            const basis = Math.cos((Math.PI * x * i) / width) * Math.cos((Math.PI * y * j) / height);
+            const color = colors[i + j * componentsX];
+            r += color[0] * basis;
+            g += color[1] * basis;
+            b += color[2] * basis;
+          }
+        }
+        const offset = 4 * (x + y * width);
+        pixels[offset] = linearToSrgb(r);
+        pixels[offset + 1] = linearToSrgb(g);
+        pixels[offset + 2] = linearToSrgb(b);
+        pixels[offset + 3] = 255;
+      }
+    }
+    return pixels;
+  }
+
+  function paint(element) {
+    const canvas = document.createElement("canvas");
+    canvas.width = PLACEHOLDER_SIZE;
+    canvas.height = PLACEHOLDER_SIZE;
+    const context = canvas.getContext("2d");
+    const image = context.createImageData(PLACEHOLDER_SIZE, PLACEHOLDER_SIZE);
+    image.data.set(decode(element.dataset.blurhash, PLACEHOLDER_SIZE, PLACEHOLDER_SIZE));
+    context.putImageData(image, 0, 0);
+    element.style.backgroundImage = `url(${canvas.toDataURL()})`;
+    element.style.backgroundSize = "cover";
+  }
+
+  const api = { decode };
+  if (typeof module !== "undefined" && module.exports) {
+    module.exports = api;
+  } else {
+    root.BlurHash = api;
+    document.querySelectorAll("[data-blurhash]").forEach((element) => {
+      const img = element.querySelector("img");
+      if (img && img.complete) return;
+      paint(element);
+      if (img) img.addEventListener("load", () => (element.style.backgroundImage = ""), { once: true });
+    });
+  }
+})(typeof window !== "undefined" ? window : this);
@@ -0,0 +1,207 @@
+// Client for the sharded full-text index written by scripts/search_index.py
+// Tokenizer, stemmer and scoring mirror the Python SearchIndex exactly;
+// change both together.
+
+(function (root) {
+  const TOKEN_PATTERN = /[a-z0-9]+/g;
+  const PHRASE_PATTERN = /"([^"]*)"/g;
+
+  const STOPWORDS = new Set(
+    ("a an and are as at be but by for from has have if in into is it its of on " +
+      "or that the their then there these this to was were will with").split(" "),
+  );
+
+  const SUFFIX_RULES = [
+    ["izations", "iz"], ["ization", "iz"],
+    ["ations", "ate"], ["ation", "ate"],
+    ["nesses", ""], ["ness", ""],
+    ["ments", ""], ["ment", ""],
+    ["ingly", ""], ["ings", ""], ["ing", ""],
+    ["edly", ""], ["ed", ""],
+    ["sses", "ss"], ["ies", "y"],
+    ["ly", ""], ["es", "e"], ["s", ""],
+  ];
+  const UNDOUBLE_AFTER = new Set(["ingly", "ings", "ing", "edly", "ed"]);
+
+  function stem(word) {
+    if (word.length <= 3 || /^[0-9]+$/.test(word)) return word;
+
+    for (const [suffix, replacement] of SUFFIX_RULES) {
+      if (word.endsWith(suffix) && word.length - suffix.length >= 3) {
+        // class, analysis, status: not plurals
+        if (suffix === "s" && "siu".includes(word[word.length - 2])) break;
+        word = word.slice(0, word.length - suffix.length) + replacement;
+        const last = word[word.length - 1];
+        if (
+          UNDOUBLE_AFTER.has(suffix) &&
+          word.length > 3 &&
+          last === word[word.length - 2] &&
+          !"aeioulsz".includes(last)
+        ) {
+          word = word.slice(0, -1);
+        }
+        break;
+      }
+    }
+
+    if (word.length > 3 && word.endsWith("e")) word = word.slice(0, -1);
+    return word;
+  }
+
+  // Returns [position, term] pairs; stopwords advance the position
+  function tokenize(text) {
+    const tokens = text.toLowerCase().match(TOKEN_PATTERN) || [];
+    const terms = [];
+    tokens.forEach((token, position) => {
+      if (!STOPWORDS.has(token)) terms.push([position, stem(token)]);
+    });
+    return terms;
+  }
+
+  // Quoted text becomes one phrase clause, every other word its own clause
+  function parseQuery(query) {
+    const clauses = [];
+    for (const match of query.matchAll(PHRASE_PATTERN)) {
+      const terms = tokenize(match[1]);
+      if (terms.length) {
+        const start = terms[0][0];
+        clauses.push(terms.map(([position, term]) => [position - start, term]));
+      }
+    }
+    for (const [, term] of tokenize(query.replace(PHRASE_PATTERN, " "))) {
+      clauses.push([[0, term]]);
+    }
+    return clauses;
+  }
+
+  function decode(deltas) {
+    let current = 0;
+    return deltas.map((delta) => (current += delta));
+  }
+
+  class SearchClient {
+    constructor(baseUrl, fetchJson) {
+      this.baseUrl = baseUrl;
+      this.fetchJson = fetchJson || ((url) => fetch(url).then((r) => r.json()));
+      this.shards = new Map();
+      this.meta = null;
+    }
+
+    async load() {
+      if (!this.meta) {
+        this.meta = await this.fetchJson(`${this.baseUrl}/index.json`);
+        this.available = new Set(this.meta.shards);
+      }
+      return this.meta;
+    }
+
+    shard(prefix) {
+      if (!this.available.has(prefix)) return Promise.resolve({});
+      if (!this.shards.has(prefix)) {
+        this.shards.set(prefix, this.fetchJson(`${this.baseUrl}/terms-${prefix}.json`));
+      }
+      return this.shards.get(prefix);
+    }
+
+    async postings(term) {
+      const shard = await this.shard(term.slice(0, this.meta.prefixLength));
+      return shard[term] || [];
+    }
+
+    // A prefix shorter than the shard prefix loads every shard it could fall into
+    async prefixPostings(prefix) {
+      const length = this.meta.prefixLength;
+      const names =
+        prefix.length < length
+          ? this.meta.shards.filter((name) => name.startsWith(prefix))
+          : [prefix.slice(0, length)];
+      const shards = await Promise.all(names.map((name) => this.shard(name)));
+      const merged = new Map();
+      for (const shard of shards) {
+        for (const term of Object.keys(shard)) {
+          if (!term.startsWith(prefix)) continue;
+          for (const posting of shard[term]) {
+            const current = merged.get(posting[0]);
+            if (!current || posting[1] > current[1]) merged.set(posting[0], posting);
+          }
+        }
+      }
+      return [...merged.values()];
+    }
+
+    async matchClause(clause, asPrefix) {
+      const matches = new Map();
+      if (clause.length === 1) {
+        const term = clause[0][1];
+        const postings = asPrefix ? await this.prefixPostings(term) : await this.postings(term);
+        for (const [docId, weight] of postings) matches.set(docId, weight);
+        return matches;
+      }
+
+      const perTerm = await Promise.all(
+        clause.map(async ([offset, term]) => [
+          offset,
+          new Map((await this.postings(term)).map((p) => [p[0], p])),
+        ]),
+      );
+      for (const docId of perTerm[0][1].keys()) {
+        if (!perTerm.every(([, postings]) => postings.has(docId))) continue;
+        const positionSets = perTerm.map(([offset, postings]) => [
+          offset,
+          new Set(decode(postings.get(docId)[2])),
+        ]);
+        const [firstOffset, firstPositions] = positionSets[0];
+        const found = [...firstPositions].some((start) =>
+          positionSets
+            .slice(1)
+            .every(([offset, positions]) => positions.has(start - firstOffset + offset)),
+        );
+        if (found) {
+          matches.set(
+            docId,
+            perTerm.reduce((sum, [, postings]) => sum + postings.get(docId)[1], 0),
+          );
+        }
+      }
+      return matches;
+    }
+
+    // Resolves to [{doc, score}] best first; ties keep index (date) order
+    async search(query, { limit = 10, prefix = false } = {}) {
+      await this.load();
+      const clauses = parseQuery(query);
+      if (!clauses.length) return [];
+
+      let scores = null;
+      for (let i = 0; i < clauses.length; i++) {
+        const isLastWord = prefix && i === clauses.length - 1 && clauses[i].length === 1;
+        const matches = await this.matchClause(clauses[i], isLastWord);
+        if (scores === null) {
+          scores = matches;
+        } else {
+          const combined = new Map();
+          for (const [docId, score] of matches) {
+            if (scores.has(docId)) combined.set(docId, scores.get(docId) + score);
+          }
+          scores = combined;
+        }
+        if (!scores.size) return [];
+      }
+
+      return [...scores.entries()]
+        .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+        .slice(0, limit)
+        .map(([docId, score]) => ({
+          doc: this.meta.docs[docId],
+          score: Math.round(score * 10000) / 10000,
+        }));
+    }
+  }
+
+  const api = { stem, tokenize, parseQuery, SearchClient };
+  if (typeof module !== "undefined" && module.exports) {
+    module.exports = api;
+  } else {
+    root.SiteSearch = api;
+  }
+})(typeof window !== "undefined" ? window : this);
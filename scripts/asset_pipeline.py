@@ -0,0 +1,159 @@
+"""
+Asset fingerprinting and precompression for build_static.py.
+
+fingerprint_assets() copies static files under assets/ to assets/dist/
+with a content hash in the file name (theme.js -> theme.1a2b3c4d5e.js), so
+they can be served with an immutable cache policy. Templates reference
+them through the asset() global, which resolves the fingerprinted name.
+
+precompress() writes .gz and .br siblings for text outputs so a server or
+CDN can serve them without compressing on the fly.
+"""
+import concurrent.futures
+import gzip
+import hashlib
+import os
+import shutil
+
+try:
+    import brotli
+except ImportError:  # Optional: only .gz files are produced without it
+    brotli = None
+
+ASSETS_DIR = "assets"
+ASSET_OUTPUT_DIR = "assets/dist"
+# Source trees under assets/ that are not served as site assets
+FINGERPRINT_EXCLUDE = {"assets/dist", "assets/code_reference"}
+# Trees under assets/dist/ written and cleaned up by other build stages
+OUTPUT_EXCLUDE = {"assets/dist/gallery"}
+FINGERPRINT_EXTENSIONS = {
+    ".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp",
+    ".avif", ".ico", ".woff", ".woff2"
+}
+FINGERPRINT_LENGTH = 10
+
+COMPRESS_EXTENSIONS = {".html", ".json", ".js", ".css", ".xml", ".svg"}
+# Below this size the compressed file is rarely smaller than one packet
+COMPRESS_MIN_SIZE = 256
+COMPRESSED_SUFFIXES = (".gz", ".br") if brotli else (".gz",)
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def fingerprinted_name(path, digest):
+    """assets/js/theme.js -> assets/dist/js/theme.<hash>.js"""
+    relative = os.path.relpath(path, ASSETS_DIR)
+    stem, extension = os.path.splitext(relative)
+    return f"{ASSET_OUTPUT_DIR}/{stem}.{digest[:FINGERPRINT_LENGTH]}{extension}".replace(os.sep, "/")
+
+def fingerprint_assets():
+    """
+    Copy every static asset to its fingerprinted name and drop stale copies.
+    Files whose fingerprinted copy already exists are skipped, since the
+    name itself proves the content is unchanged.
+
+    Returns:
+        {source path: fingerprinted path}, both relative to the site root
+        with forward slashes.
+    """
+    asset_map = {}
+    copied = 0
+    for directory, dirnames, filenames in os.walk(ASSETS_DIR):
+        dirnames[:] = [
+            name for name in dirnames
+            if os.path.join(directory, name).replace(os.sep, "/") not in FINGERPRINT_EXCLUDE
+        ]
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() not in FINGERPRINT_EXTENSIONS:
+                continue
+            source = os.path.join(directory, filename).replace(os.sep, "/")
+            target = fingerprinted_name(source, file_hash(source))
+            asset_map[source] = target
+            if not os.path.exists(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(source, target)
+                copied += 1
+
+    # Remove fingerprinted copies of old asset versions
+    current = set(asset_map.values())
+    for directory, dirnames, filenames in os.walk(ASSET_OUTPUT_DIR):
+        dirnames[:] = [
+            name for name in dirnames
+            if os.path.join(directory, name).replace(os.sep, "/") not in OUTPUT_EXCLUDE
+        ]
+        for filename in filenames:
+            path = os.path.join(directory, filename).replace(os.sep, "/")
+            base = path[:-3] if path.endswith((".gz", ".br")) else path
+            if base not in current:
+                os.remove(path)
+
+    print(f"  {len(asset_map)} assets fingerprinted, {copied} copied")
+    return asset_map
+
+def asset_url(asset_map):
+    """Build the asset() template global for a fingerprint map."""
+    def asset(path):
+        return asset_map.get(path, path)
+    return asset
+
+def compress_file(path):
+    """Write .gz (and .br when available) siblings of `path`."""
+    with open(path, "rb") as f:
+        data = f.read()
+    # mtime=0 keeps .gz output deterministic across builds
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+    return path
+
+def remove_compressed(path):
+    for suffix in (".gz", ".br"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def precompress(paths, previous, jobs=1):
+    """
+    Compress text outputs in parallel, skipping files whose content hash
+    matches the previous build and whose compressed siblings still exist.
+
+    Args:
+        paths: Output files to consider; unsupported types are ignored.
+        previous: {path: content hash} from the last build's manifest.
+        jobs: Number of worker threads (zlib and brotli release the GIL).
+
+    Returns:
+        {path: content hash} for the manifest.
+    """
+    hashes = {}
+    pending = []
+    for path in paths:
+        if os.path.splitext(path)[1] not in COMPRESS_EXTENSIONS:
+            continue
+        if os.path.getsize(path) < COMPRESS_MIN_SIZE:
+            remove_compressed(path)
+            continue
+        digest = file_hash(path)
+        hashes[path] = digest
+        siblings_exist = all(os.path.exists(path + suffix) for suffix in COMPRESSED_SUFFIXES)
+        if previous.get(path) != digest or not siblings_exist:
+            pending.append(path)
+
+    # Compressed siblings of outputs that no longer exist
+    for path in previous:
+        if path not in hashes and not os.path.exists(path):
+            remove_compressed(path)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        list(executor.map(compress_file, pending))
+
+    formats = " + ".join(suffix[1:] for suffix in COMPRESSED_SUFFIXES)
+    print(f"  {len(pending)} compressed ({formats}), {len(hashes) - len(pending)} unchanged")
+    if not brotli:
+        print("  WARNING: brotli is not installed, skipping .br output")
+    return hashes
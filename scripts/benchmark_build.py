@@ -0,0 +1,137 @@
+"""
+Benchmark build_static.py on a synthetic site.
+
+Generates a few thousand articles in a temporary directory, builds them
+serially and with a process pool, and checks that the parallel build
+produces byte-identical output.
+
+Usage:
+    python scripts/benchmark_build.py --articles 3000 --jobs 8
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import build_static
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+WORDS = (
+    "pipeline idempotent query planner index latency throughput worker queue "
+    "batch stream partition replica cache eviction backpressure schema retry "
+    "python postgres airflow spark kafka profiling allocation interpreter"
+).split()
+
+CATEGORIES = ["Data Engineering", "Databases", "Backend Engineering", "Python"]
+
+def sentence(rng, length):
+    return " ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + "."
+
+def synthetic_markdown(rng, title, date, category, sections=6):
+    """Build an article that exercises the markdown extensions we enable."""
+    parts = [f"# {title}", "", f"**Date:** {date}", f"**Category:** {category}", "", "---", ""]
+    for i in range(sections):
+        parts.append(f"## Section {i + 1}")
+        parts.append("")
+        for _ in range(3):
+            parts.append(" ".join(sentence(rng, rng.randint(8, 20)) for _ in range(4)))
+            parts.append("")
+        parts.append("```python")
+        parts.extend(f"value_{j} = compute({j}, retries={rng.randint(1, 5)})" for j in range(6))
+        parts.append("```")
+        parts.append("")
+        parts.append("| Metric | Before | After |")
+        parts.append("| --- | --- | --- |")
+        for _ in range(4):
+            parts.append(f"| {rng.choice(WORDS)} | {rng.randint(1, 999)} ms | {rng.randint(1, 99)} ms |")
+        parts.append("")
+    return "\n".join(parts)
+
+def create_site(root, count, seed=42):
+    """Lay out templates, data files and `count` synthetic articles under root."""
+    rng = random.Random(seed)
+    shutil.copytree(REPO_ROOT / build_static.TEMPLATES_DIR, root / build_static.TEMPLATES_DIR)
+    for data_file in (build_static.PHOTOS_JSON, build_static.POEMS_JSON):
+        (root / data_file).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(REPO_ROOT / data_file, root / data_file)
+
+    articles_dir = root / build_static.ARTICLES_DIR
+    articles_dir.mkdir(parents=True)
+    articles = []
+    for i in range(count):
+        slug = f"synthetic-article-{i:05d}"
+        title = f"Synthetic Article {i}"
+        date = f"20{rng.randint(15, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        category = rng.choice(CATEGORIES)
+        (articles_dir / f"{slug}.md").write_text(
+            synthetic_markdown(rng, title, date, category), encoding="utf-8"
+        )
+        articles.append({
+            "slug": slug,
+            "title": title,
+            "date": date,
+            "category": category,
+            "excerpt": sentence(rng, 12),
+            "tags": rng.sample(WORDS, 3),
+            "readTime": f"{rng.randint(3, 15)} min"
+        })
+
+    with open(root / build_static.ARTICLES_JSON, "w", encoding="utf-8") as f:
+        json.dump({"articles": articles}, f)
+
+def digest_outputs(root):
+    """Hash every generated HTML/JSON file so two builds can be compared."""
+    digest = hashlib.sha256()
+    blog_dir = root / build_static.BLOG_OUTPUT_DIR
+    for path in sorted(blog_dir.rglob("*")):
+        if path.is_file() and path.suffix in (".html", ".json"):
+            digest.update(str(path.relative_to(root)).encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def timed_build(jobs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        build_static.build_site(full=True, jobs=jobs)
+        return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the static site builder.")
+    parser.add_argument("--articles", type=int, default=3000, help="Number of synthetic articles.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Processes for the parallel run.")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="site-bench-") as tmp:
+        root = Path(tmp)
+        print(f"Generating {args.articles} synthetic articles in {root}...")
+        create_site(root, args.articles)
+        os.chdir(root)
+        try:
+            serial = timed_build(jobs=1)
+            serial_digest = digest_outputs(root)
+            parallel = timed_build(jobs=args.jobs)
+            parallel_digest = digest_outputs(root)
+        finally:
+            os.chdir(cwd)
+
+    print(f"  serial   (jobs=1):  {serial:8.2f}s  {args.articles / serial:8.0f} articles/s")
+    print(f"  parallel (jobs={args.jobs}): {parallel:8.2f}s  {args.articles / parallel:8.0f} articles/s")
+    print(f"  speedup: {serial / parallel:.2f}x")
+
+    if serial_digest != parallel_digest:
+        print("ERROR: parallel build output differs from the serial build")
+        sys.exit(1)
+    print("  ✓ parallel output is byte-identical to the serial build")
+
+if __name__ == "__main__":
+    main()
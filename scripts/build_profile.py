@@ -0,0 +1,115 @@
+"""
+Timing collection for build_static.py.
+
+BuildProfile records wall time per build stage, per article phase and per
+template. Every build prints the template summary; --profile also writes
+the full report as JSON and lists the slowest articles and templates so
+regressions stand out in review.
+"""
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+REPORT_VERSION = 1
+# Phases timed for every rendered article, in pipeline order
+ARTICLE_PHASES = ("read", "markdown", "render", "analyze")
+
+class BuildProfile:
+    """Accumulates build timings. All durations are in seconds."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last_checkpoint = self.started
+        self.stages = {}
+        self.templates = {}
+        self.articles = []
+
+    def checkpoint(self, name):
+        """
+        End the current stage: everything since the previous checkpoint (or
+        the start of the build) is attributed to `name`.
+        """
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + now - self._last_checkpoint
+        self._last_checkpoint = now
+
+    def add_template(self, name, compile=0.0, render=0.0, renders=0):
+        entry = self.templates.setdefault(name, {"compile": 0.0, "render": 0.0, "renders": 0})
+        entry["compile"] += compile
+        entry["render"] += render
+        entry["renders"] += renders
+
+    def add_article(self, slug, timings):
+        """Record one rendered article's phase timings from render_article()."""
+        entry = {"slug": slug}
+        for phase in ARTICLE_PHASES:
+            entry[phase] = timings.get(phase, 0.0)
+        entry["total"] = sum(entry[phase] for phase in ARTICLE_PHASES)
+        self.articles.append(entry)
+
+    @property
+    def compile_time(self):
+        return sum(entry["compile"] for entry in self.templates.values())
+
+    @property
+    def render_time(self):
+        return sum(entry["render"] for entry in self.templates.values())
+
+    def report(self, top=10, **context):
+        """
+        Build the machine-readable report.
+
+        Args:
+            top: Number of slowest articles and templates to flag.
+            context: Extra build settings recorded as-is (jobs, full, ...).
+        """
+        articles = sorted(self.articles, key=lambda entry: entry["total"], reverse=True)
+        templates = sorted(
+            self.templates.items(),
+            key=lambda item: item[1]["compile"] + item[1]["render"],
+            reverse=True
+        )
+        phase_totals = {
+            phase: sum(entry[phase] for entry in self.articles) for phase in ARTICLE_PHASES
+        }
+        return {
+            "version": REPORT_VERSION,
+            "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "context": context,
+            "total": time.perf_counter() - self.started,
+            "stages": self.stages,
+            "article_phases": phase_totals,
+            "templates": dict(templates),
+            "articles": articles,
+            "slowest_articles": [entry["slug"] for entry in articles[:top]],
+            "slowest_templates": [name for name, _ in templates[:top]]
+        }
+
+    def write(self, path, report):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    def print_summary(self, report, top=10):
+        """Print stage, template and slowest-article tables."""
+        print(f"\nProfile ({report['total'] * 1000:.1f} ms total)")
+        print("  Stages:")
+        for name, seconds in sorted(report["stages"].items(), key=lambda item: item[1], reverse=True):
+            print(f"    {name:<20} {seconds * 1000:10.1f} ms")
+
+        if self.articles:
+            print("  Article phases (summed over processes):")
+            for phase, seconds in report["article_phases"].items():
+                print(f"    {phase:<20} {seconds * 1000:10.1f} ms")
+
+        print("  Slowest templates:")
+        for name in report["slowest_templates"][:top]:
+            entry = report["templates"][name]
+            print(f"    {name:<20} {entry['compile'] * 1000:8.1f} ms compile "
+                  f"{entry['render'] * 1000:8.1f} ms render ({entry['renders']} renders)")
+
+        if self.articles:
+            print("  Slowest articles:")
+            for entry in report["articles"][:top]:
+                print(f"    {entry['slug']:<40} {entry['total'] * 1000:8.1f} ms")
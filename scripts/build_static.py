@@ -1,10 +1,23 @@
+import argparse
+import hashlib
+import concurrent.futures
+import io
 import markdown
 import os
 import json
+import re
 import sys
+import time
+import yaml
+import xml.etree.ElementTree as ET
 from pathlib import Path
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, meta
+
+import asset_pipeline
+import image_pipeline
+import search_index
+from build_profile import BuildProfile
 
 # Configuration
 ARTICLES_DIR = "blog/articles"
@@ -12,8 +25,29 @@ ARTICLES_JSON = "blog/articles.json"
 PHOTOS_JSON = "assets/images/gallery/photos.json"
 POEMS_JSON = "assets/poetry/poems.json"
 BLOG_OUTPUT_DIR = "blog"
-SEARCH_INDEX_FILE = "blog/search.json"
+SEARCH_INDEX_DIR = "blog/search"
 TEMPLATES_DIR = "templates"
+BUILD_CACHE_DIR = ".build_cache"
+# The whole gallery directory, so replacing a photo file triggers a rebuild
+WATCH_PATHS = [ARTICLES_DIR, ARTICLES_JSON, TEMPLATES_DIR, os.path.dirname(PHOTOS_JSON), POEMS_JSON]
+MANIFEST_FILE = os.path.join(BUILD_CACHE_DIR, "manifest.json")
+TEMPLATE_CACHE_DIR = os.path.join(BUILD_CACHE_DIR, "templates")
+IMAGE_CACHE_FILE = os.path.join(BUILD_CACHE_DIR, "images.json")
+MANIFEST_VERSION = 1
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'nl2br']
+METADATA_SEPARATOR = "---"
+SUMMARY_LENGTH = 160
+HASH_CHUNK_SIZE = 1024 * 1024
+ARTICLES_PER_PAGE = 20
+FEED_FILE = os.path.join(BLOG_OUTPUT_DIR, "feed.xml")
+FEED_SIZE = 20
+# Absolute URLs are required in the Atom feed
+SITE_URL = "https://dattskoushik.github.io"
+ATOM_NAMESPACE = "http://www.w3.org/2005/Atom"
+
+# First non-blank line of the body that is not a heading
+SUMMARY_PATTERN = re.compile(r'^[ \t]*([^#\s][^\n]*)', re.MULTILINE)
+SLUG_PATTERN = re.compile(r'[^a-z0-9]+')
 
 def load_json_or_fail(filepath):
     """Load JSON file or exit with error if missing/invalid."""
@@ -28,64 +62,545 @@ def load_json_or_fail(filepath):
         print(f"ERROR: Invalid JSON in {filepath}: {e}")
         sys.exit(1)
 
-def parse_markdown_metadata(content):
+def read_article_header(f):
     """
-    Parse metadata from markdown files.
-    Supports frontmatter or inline metadata.
+    Read article metadata from an open text file, stopping at the metadata
+    separator so the body can be read from the current position.
+
+    Supports YAML front matter:
+
+        ---
+        title: My Post
+        date: 2024-03-20
+        ---
+
+    and the inline format:
+
+        # My Post
+        **Date:** 2024-03-20
+        **Category:** Backend Engineering
+        ---
+
+    Without a separator the body starts right after the title line.
     """
-    lines = content.split('\n')
-    title = "Untitled"
-    date = "Unknown Date"
-    category = "Uncategorized"
-    body_start_idx = 0
+    metadata = {
+        "title": "Untitled",
+        "date": "Unknown Date",
+        "category": "Uncategorized"
+    }
+
+    body_start = f.tell()
+    line = f.readline()
+
+    if line.strip() == METADATA_SEPARATOR:
+        front_matter = []
+        while True:
+            line = f.readline()
+            if not line or line.strip() == METADATA_SEPARATOR:
+                break
+            front_matter.append(line)
+        try:
+            values = yaml.safe_load("".join(front_matter)) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML front matter: {e}") from e
+        if not isinstance(values, dict):
+            raise ValueError("YAML front matter must be a mapping")
+        for key, value in values.items():
+            # YAML turns dates and numbers into native types; templates and
+            # the date sort expect the strings the inline format produces
+            metadata[key] = value if isinstance(value, list) else str(value)
+        return metadata
 
     # Try to extract title from first H1
-    if len(lines) > 0 and lines[0].startswith("# "):
-        title = lines[0][2:].strip()
-        body_start_idx = 1
+    if line.startswith("# "):
+        metadata["title"] = line[2:].strip()
+        body_start = f.tell()
 
     # Look for metadata section
-    for i, line in enumerate(lines[1:], start=1):
-        if line.strip() == "---":
-            body_start_idx = i + 1
+    while True:
+        line = f.readline()
+        if not line:
+            # No separator: everything after the title is body
+            f.seek(body_start)
+            break
+        if line.strip() == METADATA_SEPARATOR:
             break
 
         if line.startswith("**Date:**"):
-            date = line.replace("**Date:**", "").strip()
+            metadata["date"] = line.replace("**Date:**", "").strip()
         elif line.startswith("**Category:**"):
-            category = line.replace("**Category:**", "").strip()
+            metadata["category"] = line.replace("**Category:**", "").strip()
+
+    return metadata
 
-    body = "\n".join(lines[body_start_idx:]).strip()
+def read_article(f):
+    """
+    Read metadata and body from an open markdown file.
+
+    Returns:
+        Metadata from read_article_header() plus 'body' and 'summary'.
+    """
+    parsed = read_article_header(f)
+    parsed["body"] = f.read().strip()
 
     # Extract summary if not provided
-    summary = ""
-    for line in body.split('\n'):
-        stripped = line.strip()
-        if stripped and not stripped.startswith('#'):
-            summary = stripped
-            if len(summary) > 160:
-                summary = summary[:157] + "..."
-            break
+    match = SUMMARY_PATTERN.search(parsed["body"])
+    summary = match.group(1).strip() if match else ""
+    if len(summary) > SUMMARY_LENGTH:
+        summary = summary[:SUMMARY_LENGTH - 3] + "..."
+    parsed["summary"] = summary
+    return parsed
+
+def parse_markdown_metadata(content):
+    """
+    Parse metadata from markdown files.
+    Supports frontmatter or inline metadata.
+    """
+    return read_article(io.StringIO(content))
+
+def hash_content(*parts):
+    """
+    Return a SHA-256 hex digest over a sequence of inputs.
+    Strings and bytes are hashed as-is, anything else as canonical JSON.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        elif not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True).encode('utf-8')
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        digest.update(len(part).to_bytes(8, 'big'))
+        digest.update(part)
+    return digest.hexdigest()
+
+def template_dependencies(env, name, found=None):
+    """
+    Return `name` plus every template it extends, includes or imports,
+    following the chain recursively (e.g. article.html -> base.html).
+    """
+    if found is None:
+        found = []
+    if name in found:
+        return found
+    found.append(name)
+
+    source, _, _ = env.loader.get_source(env, name)
+    for ref in meta.find_referenced_templates(env.parse(source)):
+        # Dynamic references (variables) cannot be resolved statically
+        if ref is not None:
+            template_dependencies(env, ref, found)
+    return found
+
+def template_digest(env, name, cache):
+    """Hash a template together with all templates it depends on."""
+    if name not in cache:
+        deps = template_dependencies(env, name)
+        sources = [env.loader.get_source(env, dep)[0] for dep in deps]
+        cache[name] = hash_content(deps, *sources)
+    return cache[name]
+
+# Modules whose code determines the build output
+BUILDER_MODULES = [__file__, asset_pipeline.__file__, image_pipeline.__file__, search_index.__file__]
+PROFILE_REPORT = os.path.join(BUILD_CACHE_DIR, "profile.json")
+
+def builder_digest():
+    """
+    Hash of the builder itself. Any change to the builder modules or to the
+    markdown configuration invalidates every output in the manifest.
+    """
+    sources = []
+    for module_path in BUILDER_MODULES:
+        with open(module_path, 'rb') as f:
+            sources.append(f.read())
+    return hash_content(*sources, MARKDOWN_EXTENSIONS)
+
+def load_manifest():
+    """Load the build manifest, or an empty one if missing or unreadable."""
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest
 
+def save_manifest(manifest):
+    """Write the manifest atomically so an interrupted build never corrupts it."""
+    Path(BUILD_CACHE_DIR).mkdir(exist_ok=True)
+    tmp_path = MANIFEST_FILE + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_FILE)
+
+def source_digest(path, cached):
+    """
+    Hash a source file, reusing the cached hash while its mtime and size are
+    unchanged so incremental builds do not re-read every article.
+
+    Returns:
+        {'stat': [mtime_ns, size], 'hash': ...}
+    """
+    stat = os.stat(path)
+    signature = [stat.st_mtime_ns, stat.st_size]
+    if cached and cached.get('stat') == signature:
+        return cached
+
+    # Hash in chunks so large sources are never held in memory here
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return {'stat': signature, 'hash': digest.hexdigest()}
+
+def is_fresh(previous_key, key, output_path):
+    """An output is fresh if its inputs hash matches and the file still exists."""
+    return previous_key == key and os.path.exists(output_path)
+
+def write_output(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def create_environment(asset_map=None):
+    """
+    Create the Jinja2 environment with a persistent bytecode cache.
+    Cache entries are validated against the template source checksum, so a
+    cold process only compiles templates that actually changed.
+
+    Templates resolve static files through asset(path), which returns the
+    fingerprinted name from `asset_map` when fingerprinting is enabled.
+    """
+    Path(TEMPLATE_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        bytecode_cache=FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+    )
+    env.globals['asset'] = asset_pipeline.asset_url(asset_map or {})
+    env.filters['slugify'] = slugify
+    return env
+
+def slugify(text):
+    """'Backend Engineering' -> 'backend-engineering', used for listing URLs."""
+    return SLUG_PATTERN.sub('-', str(text).lower()).strip('-') or 'untitled'
+
+def group_listings(articles):
+    """
+    Split date-sorted articles into the blog index and per-category and
+    per-tag listings in a single pass. Names that slugify to the same URL
+    share one listing, displayed under the first name seen.
+
+    Returns:
+        List of listing dicts with 'path' (first page), 'page_dir' (where
+        pages 2+ live), 'heading', 'intro', 'description' and 'articles'.
+    """
+    index = []
+    categories = {}
+    tags = {}
+    for article in articles:
+        index.append(article)
+        categories.setdefault(slugify(article['category']), (article['category'], []))[1].append(article)
+        for tag in article['tags']:
+            tags.setdefault(slugify(tag), (tag, []))[1].append(article)
+
+    listings = [{
+        'path': f"{BLOG_OUTPUT_DIR}/index.html",
+        'page_dir': f"{BLOG_OUTPUT_DIR}/page",
+        'heading': "Writing",
+        'intro': "Thoughts on backend architecture, data reliability, and engineering practices.",
+        'description': "Technical articles and thoughts on backend engineering.",
+        'articles': index
+    }]
+    for slug, (name, members) in sorted(categories.items()):
+        listings.append({
+            'path': f"{BLOG_OUTPUT_DIR}/category/{slug}.html",
+            'page_dir': f"{BLOG_OUTPUT_DIR}/category/{slug}",
+            'heading': name,
+            'intro': f"Articles in {name}.",
+            'description': f"Articles in {name}.",
+            'articles': members
+        })
+    for slug, (name, members) in sorted(tags.items()):
+        listings.append({
+            'path': f"{BLOG_OUTPUT_DIR}/tag/{slug}.html",
+            'page_dir': f"{BLOG_OUTPUT_DIR}/tag/{slug}",
+            'heading': f"#{name}",
+            'intro': f"Articles tagged {name}.",
+            'description': f"Articles tagged {name}.",
+            'articles': members
+        })
+    return listings
+
+def listing_pages(listing, per_page=ARTICLES_PER_PAGE):
+    """
+    Split a listing into pages of `per_page` articles.
+
+    Yields:
+        (output_path, context) per page. URLs in the context are relative
+        to the site root; templates prefix them with `root`.
+    """
+    articles = listing['articles']
+    chunks = [articles[i:i + per_page] for i in range(0, len(articles), per_page)] or [[]]
+    paths = [listing['path']] + [
+        f"{listing['page_dir']}/{number}.html" for number in range(2, len(chunks) + 1)
+    ]
+    for number, (path, chunk) in enumerate(zip(paths, chunks), start=1):
+        title = listing['heading'] if number == 1 else f"{listing['heading']} (page {number})"
+        yield path, {
+            'root': os.path.relpath(".", os.path.dirname(path)).replace(os.sep, "/"),
+            'active_page': "blog",
+            'title': title,
+            'description': listing['description'],
+            'heading': listing['heading'],
+            'intro': listing['intro'],
+            'articles': chunk,
+            'pagination': {
+                'page': number,
+                'pages': len(chunks),
+                'prev_url': paths[number - 2] if number > 1 else None,
+                'next_url': paths[number] if number < len(chunks) else None
+            }
+        }
+
+def feed_timestamp(date):
+    """Article date (YYYY-MM-DD) as an RFC 3339 timestamp, or None if unparseable."""
+    try:
+        return datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%dT00:00:00Z")
+    except (TypeError, ValueError):
+        return None
+
+def write_feed(path, articles):
+    """
+    Write an Atom feed of the given (newest first) articles.
+    Entries are dated by publication date, never the build time, so an
+    unchanged feed is byte-identical across builds.
+    """
+    timestamps = [feed_timestamp(article['date']) for article in articles]
+    fallback = max((t for t in timestamps if t), default="1970-01-01T00:00:00Z")
+
+    feed = ET.Element("feed", xmlns=ATOM_NAMESPACE)
+    ET.SubElement(feed, "title").text = "Writing"
+    ET.SubElement(feed, "subtitle").text = "Technical articles and thoughts on backend engineering."
+    ET.SubElement(feed, "id").text = f"{SITE_URL}/{BLOG_OUTPUT_DIR}/"
+    ET.SubElement(feed, "link", href=f"{SITE_URL}/{BLOG_OUTPUT_DIR}/")
+    ET.SubElement(feed, "link", rel="self", href=f"{SITE_URL}/{FEED_FILE}")
+    ET.SubElement(feed, "updated").text = fallback
+    author = ET.SubElement(feed, "author")
+    ET.SubElement(author, "name").text = "M S Suchindra Datta Koushik"
+
+    for article, timestamp in zip(articles, timestamps):
+        url = f"{SITE_URL}/{BLOG_OUTPUT_DIR}/{article['url']}"
+        entry = ET.SubElement(feed, "entry")
+        ET.SubElement(entry, "title").text = article['title']
+        ET.SubElement(entry, "link", href=url)
+        ET.SubElement(entry, "id").text = url
+        ET.SubElement(entry, "updated").text = timestamp or fallback
+        ET.SubElement(entry, "summary").text = article['excerpt']
+        ET.SubElement(entry, "category", term=article['category'])
+        for tag in article['tags']:
+            ET.SubElement(entry, "category", term=tag)
+
+    ET.indent(feed)
+    ET.ElementTree(feed).write(path, encoding="utf-8", xml_declaration=True)
+
+def load_template(env, name, profile):
+    """Look up a template, recording its load/compile time in the profile."""
+    start = time.perf_counter()
+    template = env.get_template(name)
+    profile.add_template(name, compile=time.perf_counter() - start)
+    return template
+
+def search_fields(final_article, body):
+    """Map an article to the fields indexed for full-text search."""
     return {
-        "title": title,
-        "date": date,
-        "category": category,
-        "body": body,
-        "summary": summary
+        'title': final_article['title'],
+        'tags': " ".join(final_article['tags']),
+        'summary': final_article['excerpt'],
+        'body': body
+    }
+
+# Search analyses by article key. Lives for the whole process, so --watch
+# rebuilds only re-tokenize the articles that changed.
+_analysis_cache = {}
+
+def article_analysis(entry):
+    """
+    Return the search analysis for a manifest article entry, re-reading the
+    markdown source if this process has not analysed it yet.
+    """
+    if entry['key'] not in _analysis_cache:
+        md_file = os.path.join(ARTICLES_DIR, f"{entry['article']['slug']}.md")
+        with open(md_file, 'r', encoding='utf-8') as f:
+            parsed = read_article(f)
+        fields = search_fields(entry['article'], parsed['body'])
+        _analysis_cache[entry['key']] = search_index.analyze_document(fields)
+    return _analysis_cache[entry['key']]
+
+# Per-process state used by render_article(); see init_article_worker()
+_article_template = None
+# Template compile time not yet reported back to the main process
+_unreported_compile = 0.0
+
+def init_article_worker(asset_map=None):
+    """
+    Build a Jinja Environment once per process and keep the article template.
+    Used as the process pool initializer so workers never share Jinja state.
+    """
+    global _article_template, _unreported_compile
+    start = time.perf_counter()
+    _article_template = create_environment(asset_map).get_template('article.html')
+    _unreported_compile = time.perf_counter() - start
+
+def render_article(task):
+    """
+    Parse, render and write a single article.
+    Module-level so it can be pickled and run in a worker process.
+
+    The source is read by the worker and the page is streamed into the
+    output file, so the full page is never held in memory as one string.
+
+    Args:
+        task: (article, md_file, output_path) tuple.
+
+    Returns:
+        (final_article, timings, analysis) where timings holds the seconds
+        spent per phase (see build_profile.ARTICLE_PHASES) plus the worker's
+        one-off template compile time on its first call, and analysis is the
+        article's search index entry.
+    """
+    global _unreported_compile
+    article, md_file, output_path = task
+    slug = article['slug']
+    timings = {'compile': _unreported_compile}
+    _unreported_compile = 0.0
+
+    start = time.perf_counter()
+    with open(md_file, 'r', encoding='utf-8') as f:
+        parsed = read_article(f)
+    timings['read'] = time.perf_counter() - start
+
+    # Merge metadata
+    final_article = {
+        'slug': slug,
+        'title': article.get('title', parsed['title']),
+        'date': article.get('date', parsed['date']),
+        'category': article.get('category', parsed['category']),
+        'excerpt': article.get('excerpt', parsed.get('excerpt', parsed['summary'])),
+        'readTime': article.get('readTime', parsed.get('readTime', '5 min')),
+        'tags': article.get('tags', parsed.get('tags', [])),
+        'url': f"{slug}.html" # Relative to blog/
     }
 
-def build_site():
+    # Render Content
+    start = time.perf_counter()
+    html_body = markdown.markdown(parsed['body'], extensions=MARKDOWN_EXTENSIONS)
+    timings['markdown'] = time.perf_counter() - start
+
+    # Render Template, streaming chunks straight into the output file
+    start = time.perf_counter()
+    stream = _article_template.stream(
+        root="..",
+        active_page="blog",
+        title=final_article['title'],
+        description=final_article['excerpt'],
+        category=final_article['category'],
+        date=final_article['date'],
+        read_time=final_article['readTime'],
+        content=html_body
+    )
+    with open(output_path, 'w', encoding='utf-8') as f:
+        stream.dump(f)
+    timings['render'] = time.perf_counter() - start
+    del html_body
+
+    start = time.perf_counter()
+    analysis = search_index.analyze_document(search_fields(final_article, parsed['body']))
+    timings['analyze'] = time.perf_counter() - start
+    return final_article, timings, analysis
+
+def render_articles(tasks, jobs=1, asset_map=None):
+    """
+    Render article tasks serially or across `jobs` worker processes.
+    Results are returned in task order either way, so everything built from
+    them (blog index, search index) is identical to a serial build.
+
+    Returns:
+        A list with render_article()'s result per task, or None for None tasks.
+    """
+    pending = [task for task in tasks if task is not None]
+    if jobs <= 1 or len(pending) <= 1:
+        if pending:
+            init_article_worker(asset_map)
+        rendered = [render_article(task) for task in pending]
+    else:
+        workers = min(jobs, len(pending))
+        # A few chunks per worker keeps IPC overhead low while balancing load
+        chunksize = max(1, len(pending) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_article_worker,
+            initargs=(asset_map,)
+        ) as executor:
+            rendered = list(executor.map(render_article, pending, chunksize=chunksize))
+
+    # Re-interleave with the skipped (None) tasks to restore task order
+    results = iter(rendered)
+    return [None if task is None else next(results) for task in tasks]
+
+def build_site(full=False, jobs=1, fingerprint=False, precompress=False, profile_report=None):
+    """
+    Build the site. Unless `full` is set, outputs whose inputs (source,
+    metadata and template chain) are unchanged since the last build are
+    skipped, using the manifest in BUILD_CACHE_DIR. Articles are rendered
+    across `jobs` processes.
+
+    With `fingerprint`, static assets are copied to content-hashed names
+    before rendering; with `precompress`, .gz/.br siblings are written for
+    every text output afterwards.
+
+    With `profile_report`, per-stage, per-article and per-template timings
+    are written to that path as JSON and the slowest entries are printed.
+    """
+    profile = BuildProfile()
     print("=" * 60)
     print("Building static site with Jinja2...")
     print("=" * 60)
 
-    # Setup Jinja2
-    env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
-    
     # Ensure output directories exist
     Path(BLOG_OUTPUT_DIR).mkdir(exist_ok=True)
 
+    # Fingerprint assets first: every page embeds the resulting names
+    asset_map = {}
+    if fingerprint:
+        print("Fingerprinting assets...")
+        asset_map = asset_pipeline.fingerprint_assets()
+        profile.checkpoint("fingerprint")
+    asset_digest = hash_content(asset_map)
+
+    # Setup Jinja2
+    env = create_environment(asset_map)
+    digests = {}
+
+    # Load the previous manifest. A full build ignores it for freshness
+    # checks but still uses it to clean up outputs of removed articles.
+    previous = load_manifest()
+    builder = builder_digest()
+    if previous.get('builder') != builder:
+        if previous:
+            print("Builder changed since last build, rebuilding everything.")
+        full = True
+    previous_articles = previous.get('articles', {})
+    previous_pages = {} if full else previous.get('pages', {})
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'builder': builder,
+        'articles': {},
+        'pages': {},
+        'compressed': {}
+    }
+
     # Load Data
     print("Loading content data...")
     articles_data = load_json_or_fail(ARTICLES_JSON).get('articles', [])
@@ -94,6 +609,13 @@ def build_site():
 
     if not articles_data:
         print("WARNING: No articles found in articles.json")
+    profile.checkpoint("load_data")
+
+    # Responsive variants for local gallery photos; the about page key
+    # below covers the resulting image metadata
+    print("Processing gallery photos...")
+    photos_data = image_pipeline.process_photos(photos_data, IMAGE_CACHE_FILE, jobs=jobs, refresh=full)
+    profile.checkpoint("images")
 
     # --- Generate Blog Articles ---
     print(f"\nProcessing {len(articles_data)} articles...")
@@ -102,68 +624,112 @@ def build_site():
     articles_data.sort(key=lambda x: x['date'], reverse=True)
 
     processed_articles = []
+    article_digest = hash_content(template_digest(env, 'article.html', digests), asset_digest)
+    rebuilt = 0
+
+    # One task per article in date order; None marks an unchanged article
+    tasks = []
+    slots = []
 
     for article in articles_data:
         slug = article['slug']
         md_file = os.path.join(ARTICLES_DIR, f"{slug}.md")
+        output_path = os.path.join(BLOG_OUTPUT_DIR, f"{slug}.html")
         
         if not os.path.exists(md_file):
             print(f"ERROR: Markdown file missing for article '{slug}': {md_file}")
             sys.exit(1)
-        
-        with open(md_file, 'r', encoding='utf-8') as f:
-            md_content = f.read()
-        
-        parsed = parse_markdown_metadata(md_content)
-        
-        # Merge metadata
-        final_article = {
-            'slug': slug,
-            'title': article.get('title', parsed['title']),
-            'date': article.get('date', parsed['date']),
-            'category': article.get('category', parsed['category']),
-            'excerpt': article.get('excerpt', parsed['summary']),
-            'readTime': article.get('readTime', '5 min'),
-            'tags': article.get('tags', []),
-            'url': f"{slug}.html" # Relative to blog/
-        }
 
-        # Render Content
-        html_body = markdown.markdown(parsed['body'], extensions=['fenced_code', 'tables', 'nl2br'])
+        cached = previous_articles.get(slug, {})
+        source = source_digest(md_file, cached.get('source'))
+        key = hash_content(source['hash'], article, article_digest)
+        slots.append((slug, key, source))
+        if not full and is_fresh(cached.get('key'), key, output_path):
+            # Keep the new stat signature, e.g. after a touch that left the
+            # content alone, so the next build can skip hashing again
+            manifest['articles'][slug] = dict(cached, source=source)
+            tasks.append(None)
+        else:
+            tasks.append((article, md_file, output_path))
 
-        # Render Template
-        template = env.get_template('article.html')
-        html_output = template.render(
-            root="..",
-            active_page="blog",
-            title=final_article['title'],
-            description=final_article['excerpt'],
-            category=final_article['category'],
-            date=final_article['date'],
-            read_time=final_article['readTime'],
-            content=html_body
-        )
+    profile.checkpoint("hash_sources")
 
-        output_path = os.path.join(BLOG_OUTPUT_DIR, f"{slug}.html")
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_output)
-        
-        print(f"  ✓ {slug}.html")
+    if jobs > 1 and any(task is not None for task in tasks):
+        # Compile once up front so pool workers start from a warm bytecode cache
+        load_template(env, 'article.html', profile)
+
+    for (slug, key, source), result in zip(slots, render_articles(tasks, jobs, asset_map)):
+        if result is None:
+            final_article = manifest['articles'][slug]['article']
+        else:
+            final_article, article_timings, analysis = result
+            _analysis_cache[key] = analysis
+            profile.add_template(
+                'article.html',
+                compile=article_timings['compile'],
+                render=article_timings['render'],
+                renders=1
+            )
+            profile.add_article(slug, article_timings)
+            print(f"  ✓ {slug}.html")
+            rebuilt += 1
+            manifest['articles'][slug] = {
+                'key': key,
+                'source': source,
+                'article': final_article
+            }
         processed_articles.append(final_article)
 
-    # --- Generate Blog Index ---
-    print("\nGenerating blog index...")
-    template = env.get_template('blog_index.html')
-    html_output = template.render(
-        root="..",
-        active_page="blog",
-        title="Writing",
-        description="Technical articles and thoughts on backend engineering.",
-        articles=processed_articles
-    )
-    with open(os.path.join(BLOG_OUTPUT_DIR, "index.html"), 'w', encoding='utf-8') as f:
-        f.write(html_output)
-    print(f"  ✓ blog/index.html")
+    print(f"  {rebuilt} rebuilt, {len(articles_data) - rebuilt} unchanged")
+    profile.checkpoint("render_articles")
+
+    # --- Remove outputs of deleted articles ---
+    for slug in previous_articles:
+        if slug not in manifest['articles']:
+            output_path = os.path.join(BLOG_OUTPUT_DIR, f"{slug}.html")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+                print(f"  ✗ {slug}.html (removed)")
+    profile.checkpoint("remove_stale")
+
+    # --- Generate Blog Listings ---
+    # Paginated index plus category and tag pages, each keyed by its own
+    # articles and page links, so only pages whose membership changed are
+    # rewritten
+    print("\nGenerating blog listings...")
+    listing_digest = hash_content(template_digest(env, 'blog_index.html', digests), asset_digest)
+    template = None
+    written = 0
+    unchanged = 0
+    for listing in group_listings(processed_articles):
+        for output_path, context in listing_pages(listing):
+            key = hash_content(listing_digest, context)
+            manifest['pages'][output_path] = key
+            if is_fresh(previous_pages.get(output_path), key, output_path):
+                unchanged += 1
+                continue
+            if template is None:
+                template = load_template(env, 'blog_index.html', profile)
+            start = time.perf_counter()
+            html_output = template.render(**context)
+            profile.add_template('blog_index.html', render=time.perf_counter() - start, renders=1)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            write_output(output_path, html_output)
+            print(f"  ✓ {output_path}")
+            written += 1
+    print(f"  {written} rebuilt, {unchanged} unchanged")
+    profile.checkpoint("listings")
+
+    # --- Generate Atom Feed ---
+    feed_articles = processed_articles[:FEED_SIZE]
+    key = hash_content(SITE_URL, feed_articles)
+    if is_fresh(previous_pages.get(FEED_FILE), key, FEED_FILE):
+        print(f"  · {FEED_FILE} (unchanged)")
+    else:
+        write_feed(FEED_FILE, feed_articles)
+        print(f"  ✓ {FEED_FILE}")
+    manifest['pages'][FEED_FILE] = key
+    profile.checkpoint("feed")
 
     # --- Generate Search Index ---
     print("\nGenerating search index...")
@@ -178,29 +744,177 @@ def build_site():
             "readTime": article['readTime'],
             "url": article['url']
         })
-    
-    with open(SEARCH_INDEX_FILE, 'w', encoding='utf-8') as f:
-        json.dump(search_data, f, indent=2)
-    print(f"  ✓ {SEARCH_INDEX_FILE}")
+
+    # The index depends on every article's full text, which the article
+    # keys already cover (source hash, metadata and template chain)
+    entries = [manifest['articles'][article['slug']] for article in processed_articles]
+    key = hash_content(search_data, [entry['key'] for entry in entries])
+    index_path = os.path.join(SEARCH_INDEX_DIR, search_index.INDEX_FILE)
+    if is_fresh(previous_pages.get(index_path), key, index_path):
+        print(f"  · {SEARCH_INDEX_DIR}/ (unchanged)")
+    else:
+        analyses = [article_analysis(entry) for entry in entries]
+        index_meta, shards = search_index.build_index(search_data, analyses)
+        search_index.write_index(SEARCH_INDEX_DIR, index_meta, shards)
+        term_count = sum(len(terms) for terms in shards.values())
+        print(f"  ✓ {SEARCH_INDEX_DIR}/ ({term_count} terms in {len(shards)} shards)")
+    manifest['pages'][index_path] = key
+    profile.checkpoint("search_index")
 
     # --- Generate About Page ---
     print("\nGenerating about page...")
-    template = env.get_template('about.html')
-    html_output = template.render(
-        root=".",
-        active_page="about",
-        title="About",
-        description="About M S Suchindra Datta Koushik, Software engineer - Backend and Data.",
-        photos=photos_data,
-        poems=poems_data
-    )
-    with open("about.html", 'w', encoding='utf-8') as f:
-        f.write(html_output)
-    print(f"  ✓ about.html")
+    output_path = "about.html"
+    key = hash_content(template_digest(env, 'about.html', digests), asset_digest, photos_data, poems_data)
+    if is_fresh(previous_pages.get(output_path), key, output_path):
+        print(f"  · about.html (unchanged)")
+    else:
+        template = load_template(env, 'about.html', profile)
+        start = time.perf_counter()
+        html_output = template.render(
+            root=".",
+            active_page="about",
+            title="About",
+            description="About M S Suchindra Datta Koushik, Software engineer - Backend and Data.",
+            photos=photos_data,
+            poems=poems_data
+        )
+        profile.add_template('about.html', render=time.perf_counter() - start, renders=1)
+        write_output(output_path, html_output)
+        print(f"  ✓ about.html")
+    manifest['pages'][output_path] = key
+    profile.checkpoint("about")
+
+    # --- Remove pages no longer generated (emptied categories, tags, pages) ---
+    for output_path in previous.get('pages', {}):
+        if output_path not in manifest['pages'] and os.path.exists(output_path):
+            os.remove(output_path)
+            print(f"  ✗ {output_path} (removed)")
+            try:
+                # Drop directories left empty, e.g. blog/tag/<slug>/
+                os.removedirs(os.path.dirname(output_path))
+            except OSError:
+                pass
+    profile.checkpoint("remove_stale_pages")
+
+    # --- Precompress Outputs ---
+    previous_compressed = previous.get('compressed', {})
+    if precompress:
+        print("\nPrecompressing outputs...")
+        outputs = [
+            os.path.join(BLOG_OUTPUT_DIR, f"{slug}.html") for slug in manifest['articles']
+        ]
+        outputs += list(manifest['pages'])
+        outputs += [
+            os.path.join(SEARCH_INDEX_DIR, name) for name in sorted(os.listdir(SEARCH_INDEX_DIR))
+            if not name.endswith(('.gz', '.br'))
+        ]
+        outputs += list(asset_map.values())
+        manifest['compressed'] = asset_pipeline.precompress(
+            list(dict.fromkeys(outputs)),
+            {} if full else previous_compressed,
+            jobs=jobs
+        )
+        profile.checkpoint("precompress")
+    else:
+        # Drop siblings from an earlier precompressed build so they never go stale
+        for path in previous_compressed:
+            asset_pipeline.remove_compressed(path)
+
+    save_manifest(manifest)
+    profile.checkpoint("save_manifest")
+
+    # Compile time summed over all processes that loaded templates
+    print(f"\nTemplates: {profile.compile_time * 1000:.1f} ms compile, "
+          f"{profile.render_time * 1000:.1f} ms render")
+
+    if profile_report:
+        report = profile.report(
+            jobs=jobs,
+            full=full,
+            fingerprint=fingerprint,
+            precompress=precompress,
+            articles=len(articles_data),
+            rebuilt=rebuilt
+        )
+        profile.write(profile_report, report)
+        profile.print_summary(report)
+        print(f"  ✓ {profile_report}")
 
     print("\n" + "=" * 60)
     print("✓ Build complete!")
     print("=" * 60)
 
+def main():
+    parser = argparse.ArgumentParser(description="Build the static site from templates and content.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the build manifest and rebuild every output."
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes used to render articles (default: 1, 0 = all CPUs)."
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Serve the site locally, rebuild on change and live-reload the browser."
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8000,
+        help="Port for the --watch dev server (default: 8000)."
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="Copy assets to content-hashed names under assets/dist/ and reference those."
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="Write .gz and .br siblings for every HTML, JSON, JS and CSS output."
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=PROFILE_REPORT,
+        metavar="PATH",
+        help=f"Write a JSON timing report (default: {PROFILE_REPORT}) and list the slowest articles and templates."
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="Run the build under cProfile and save stats to PATH (main process only; "
+             "view with snakeviz or flameprof)."
+    )
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    options = {
+        'jobs': jobs,
+        'fingerprint': args.fingerprint,
+        'precompress': args.precompress
+    }
+
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.runcall(build_site, full=args.full, profile_report=args.profile, **options)
+        profiler.dump_stats(args.cprofile)
+        print(f"cProfile stats written to {args.cprofile}")
+    else:
+        build_site(full=args.full, profile_report=args.profile, **options)
+
+    if args.watch:
+        import dev_server
+        dev_server.serve(
+            rebuild=lambda: build_site(**options),
+            watch_paths=WATCH_PATHS,
+            port=args.port
+        )
+
 if __name__ == "__main__":
-    build_site()
+    main()
@@ -0,0 +1,194 @@
+"""
+Development server for build_static.py.
+
+Watches content and template sources with a lightweight stat poller,
+runs an incremental build when something changes, and tells open browser
+tabs to reload through Server-Sent Events.
+"""
+import functools
+import http.server
+import os
+import threading
+import time
+import traceback
+import urllib.parse
+
+RELOAD_PATH = "/__livereload"
+
+# Injected before </body> of every HTML page served by the dev server.
+# The built files on disk are never modified.
+RELOAD_SCRIPT = f"""<script>
+  new EventSource("{RELOAD_PATH}").addEventListener("reload", () => location.reload());
+</script>
+""".encode("utf-8")
+
+class ReloadNotifier:
+    """Broadcasts a reload to every connected SSE client."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._version = 0
+
+    def notify(self):
+        with self._condition:
+            self._version += 1
+            self._condition.notify_all()
+
+    def wait(self, seen, timeout):
+        """Block until the version moves past `seen`, then return the new version."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._version != seen, timeout=timeout)
+            return self._version
+
+    @property
+    def version(self):
+        with self._condition:
+            return self._version
+
+class DevRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Static file handler with an SSE reload endpoint and script injection."""
+
+    notifier = None
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.stream_reloads()
+            return
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            parts = urllib.parse.urlsplit(self.path)
+            if not parts.path.endswith("/"):
+                # Same redirect as SimpleHTTPRequestHandler, so relative
+                # links in the index page resolve against the directory
+                self.send_response(301)
+                self.send_header("Location", urllib.parse.urlunsplit(parts._replace(path=parts.path + "/")))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            self.send_html(path)
+            return
+        super().do_GET()
+
+    def send_html(self, path):
+        with open(path, "rb") as f:
+            body = f.read()
+        marker = body.rfind(b"</body>")
+        if marker == -1:
+            body += RELOAD_SCRIPT
+        else:
+            body = body[:marker] + RELOAD_SCRIPT + body[marker:]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reloads(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        seen = self.notifier.version
+        try:
+            while True:
+                version = self.notifier.wait(seen, timeout=15)
+                if version == seen:
+                    # Comment line as keep-alive, also detects closed tabs
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    seen = version
+                    self.wfile.write(b"event: reload\ndata: {}\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        # Keep the console for build output; SSE pings would flood it
+        pass
+
+def snapshot(paths):
+    """
+    Return {file: (mtime_ns, size)} for the given files and directories.
+    Directories are scanned recursively with os.scandir, which needs no
+    extra stat call per entry on most platforms.
+    """
+    state = {}
+    pending = list(paths)
+    while pending:
+        path = pending.pop()
+        try:
+            if os.path.isdir(path):
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            pending.append(entry.path)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            state[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            else:
+                stat = os.stat(path)
+                state[path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            continue
+    return state
+
+def changed_paths(before, after):
+    """Return the sorted set of files added, removed or modified between snapshots."""
+    return sorted(
+        path for path in before.keys() | after.keys()
+        if before.get(path) != after.get(path)
+    )
+
+def serve(rebuild, watch_paths, host="127.0.0.1", port=8000, interval=0.05):
+    """
+    Serve the current directory and rebuild on change.
+
+    Args:
+        rebuild: Callable running an incremental build.
+        watch_paths: Files and directories to poll.
+        host, port: Address for the HTTP server.
+        interval: Seconds between polls.
+    """
+    notifier = ReloadNotifier()
+    handler = functools.partial(DevRequestHandler, directory=os.getcwd())
+    DevRequestHandler.notifier = notifier
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"\nServing on http://{host}:{port} - watching for changes (Ctrl+C to stop)")
+    state = snapshot(watch_paths)
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot(watch_paths)
+            changed = changed_paths(state, current)
+            if not changed:
+                continue
+            state = current
+
+            start = time.perf_counter()
+            print(f"\nChanged: {', '.join(changed)}")
+            try:
+                rebuild()
+            except SystemExit:
+                # The builder exits on invalid content; keep watching
+                print("Build failed, waiting for the next change...")
+                continue
+            except Exception:
+                traceback.print_exc()
+                print("Build failed, waiting for the next change...")
+                continue
+            notifier.notify()
+            print(f"Reloaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        print("\nStopping dev server.")
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,269 @@
+"""
+Responsive images for the photo gallery on about.html.
+
+process_photos() resizes every local gallery photo into WebP (and AVIF,
+when Pillow was built with it) variants under assets/dist/gallery/ and
+attaches the result to the photo as photo['image']:
+
+    {"width": 4000, "height": 3000, "blurhash": "LEHV6nWB2yk8...",
+     "sources": [{"type": "image/avif",
+                  "variants": [{"path": "assets/dist/gallery/x.1a2b3c4d5e-400.avif",
+                                "width": 400}, ...]}, ...]}
+
+Templates build srcset attributes from the variants, reserve space with
+the intrinsic dimensions and paint the BlurHash (decoded by
+assets/js/blurhash.js) until the image arrives. Remote URLs are left as-is.
+
+Results are cached by the source's content hash and the encoder settings,
+so unchanged photos are never decoded again.
+"""
+import concurrent.futures
+import hashlib
+import json
+import math
+import os
+
+import asset_pipeline
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Optional: photos are served as-is without it
+    Image = None
+
+IMAGE_OUTPUT_DIR = f"{asset_pipeline.ASSET_OUTPUT_DIR}/gallery"
+CACHE_VERSION = 1
+# Variant widths in pixels; sources are never upscaled
+IMAGE_WIDTHS = (400, 800, 1600)
+# (extension, MIME type, Pillow save options), preferred format first
+IMAGE_FORMATS = [
+    ("avif", "image/avif", {"quality": 50}),
+    ("webp", "image/webp", {"quality": 80, "method": 6}),
+]
+BLURHASH_COMPONENTS = (4, 3)
+# The BlurHash only keeps a few cosine components, so a tiny sample is enough
+BLURHASH_SAMPLE_WIDTH = 32
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+def available_formats():
+    """IMAGE_FORMATS entries the installed Pillow can encode."""
+    if Image is None:
+        return []
+    return [entry for entry in IMAGE_FORMATS if features.check(entry[0])]
+
+def local_source(path):
+    """Map a photo path (/assets/images/...) to a local file, or None if remote."""
+    if not path or "://" in path or path.startswith("//"):
+        return None
+    path = path.lstrip("/")
+    return path if os.path.isfile(path) else None
+
+def variant_widths(width):
+    """Widths to generate for a source `width` pixels wide."""
+    widths = [w for w in IMAGE_WIDTHS if w < width]
+    if width <= IMAGE_WIDTHS[-1]:
+        widths.append(width)
+    return widths
+
+# --- BlurHash (https://blurha.sh), mirrored by assets/js/blurhash.js ---
+
+# sRGB byte -> linear light, precomputed for the 256 possible values
+_SRGB_TO_LINEAR = [
+    v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+    for v in (i / 255 for i in range(256))
+]
+
+def _linear_to_srgb(value):
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+def _encode_base83(value, length):
+    return "".join(BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+def _sign_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+def blurhash(image, components=BLURHASH_COMPONENTS):
+    """Encode a Pillow image as a BlurHash string."""
+    components_x, components_y = components
+    image = image.convert("RGB")
+    width, height = image.size
+    pixels = [
+        (_SRGB_TO_LINEAR[r], _SRGB_TO_LINEAR[g], _SRGB_TO_LINEAR[b])
+        for r, g, b in image.getdata()
+    ]
+
+    factors = []
+    for j in range(components_y):
+        basis_y = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(components_x):
+            basis_x = [math.cos(math.pi * i * x / width) for x in range(width)]
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                for x in range(width):
+                    basis = basis_x[x] * basis_y[y]
+                    pr, pg, pb = pixels[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = (1 if i == 0 and j == 0 else 2) / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode_base83((components_x - 1) + (components_y - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _encode_base83(quantised_max, 1)
+    else:
+        max_value = 1.0
+        result += _encode_base83(0, 1)
+
+    result += _encode_base83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4
+    )
+    for factor in ac:
+        r, g, b = (
+            max(0, min(18, math.floor(_sign_pow(value / max_value, 0.5) * 9 + 9.5)))
+            for value in factor
+        )
+        result += _encode_base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+# --- Variant generation ---
+
+def settings_digest(formats):
+    """Hash of everything besides the source that determines the output."""
+    settings = [CACHE_VERSION, IMAGE_WIDTHS, formats, BLURHASH_COMPONENTS, BLURHASH_SAMPLE_WIDTH]
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+def process_photo(task):
+    """
+    Decode one photo and write all of its variants.
+    Module-level so it can be pickled and run in a worker process.
+
+    Args:
+        task: (source path, content hash, formats) tuple.
+
+    Returns:
+        The photo['image'] dict described in the module docstring.
+    """
+    source, digest, formats = task
+    stem = os.path.splitext(os.path.basename(source))[0]
+    prefix = f"{IMAGE_OUTPUT_DIR}/{stem}.{digest[:asset_pipeline.FINGERPRINT_LENGTH]}"
+
+    with Image.open(source) as opened:
+        # Apply the camera orientation so width and height match what is shown
+        image = ImageOps.exif_transpose(opened)
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    width, height = image.size
+
+    sample_height = max(1, round(height * BLURHASH_SAMPLE_WIDTH / width))
+    sample = image.resize((BLURHASH_SAMPLE_WIDTH, sample_height), Image.Resampling.BOX)
+
+    os.makedirs(IMAGE_OUTPUT_DIR, exist_ok=True)
+    sources = {extension: [] for extension, _, _ in formats}
+    for variant_width in variant_widths(width):
+        variant_height = max(1, round(height * variant_width / width))
+        resized = image if variant_width == width else image.resize(
+            (variant_width, variant_height), Image.Resampling.LANCZOS
+        )
+        for extension, _, options in formats:
+            path = f"{prefix}-{variant_width}.{extension}"
+            resized.save(path, format=extension.upper(), **options)
+            sources[extension].append({"path": path, "width": variant_width})
+
+    return {
+        "width": width,
+        "height": height,
+        "blurhash": blurhash(sample),
+        "sources": [
+            {"type": mime_type, "variants": sources[extension]}
+            for extension, mime_type, _ in formats
+        ]
+    }
+
+def image_files(image):
+    return [variant["path"] for source in image["sources"] for variant in source["variants"]]
+
+def load_cache(path, settings):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return cache.get("images", {}) if cache.get("settings") == settings else {}
+
+def save_cache(path, settings, images):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"settings": settings, "images": images}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def process_photos(photos, cache_path, jobs=1, refresh=False):
+    """
+    Generate responsive variants for every local photo.
+
+    Args:
+        photos: Entries from photos.json; 'path' is the full-size source.
+        cache_path: JSON file caching results by source path and hash.
+        jobs: Number of worker processes used for conversion.
+        refresh: Ignore the cache and reprocess every photo.
+
+    Returns:
+        A copy of `photos` where each processed photo has an 'image' key.
+    """
+    formats = available_formats()
+    if not formats:
+        print("  WARNING: Pillow is not installed, serving gallery photos as-is")
+        return photos
+
+    settings = settings_digest(formats)
+    cached = {} if refresh else load_cache(cache_path, settings)
+    entries = {}
+    pending = []
+    for photo in photos:
+        source = local_source(photo.get("path"))
+        if source is None or source in entries:
+            continue
+        stat = os.stat(source)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        entry = cached.get(source, {})
+        # Only re-hash sources whose mtime or size moved
+        digest = entry["hash"] if entry.get("stat") == signature else asset_pipeline.file_hash(source)
+        if entry.get("hash") == digest and all(os.path.exists(path) for path in image_files(entry["image"])):
+            entries[source] = dict(entry, stat=signature)
+        else:
+            entries[source] = {"stat": signature, "hash": digest}
+            pending.append((source, digest, formats))
+
+    if pending:
+        if jobs <= 1 or len(pending) == 1:
+            results = [process_photo(task) for task in pending]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as executor:
+                results = list(executor.map(process_photo, pending))
+        for (source, _, _), image in zip(pending, results):
+            entries[source]["image"] = image
+            print(f"  ✓ {source} ({len(image_files(image))} variants)")
+
+    # Variants of replaced or removed photos
+    current = {path for entry in entries.values() for path in image_files(entry["image"])}
+    if os.path.isdir(IMAGE_OUTPUT_DIR):
+        for name in os.listdir(IMAGE_OUTPUT_DIR):
+            path = f"{IMAGE_OUTPUT_DIR}/{name}"
+            if path not in current:
+                os.remove(path)
+
+    save_cache(cache_path, settings, entries)
+    print(f"  {len(pending)} processed, {len(entries) - len(pending)} unchanged")
+
+    result = []
+    for photo in photos:
+        source = local_source(photo.get("path"))
+        result.append(dict(photo, image=entries[source]["image"]) if source else photo)
+    return result
@@ -0,0 +1,330 @@
+"""
+Full-text search index for the blog.
+
+The builder writes an inverted index to blog/search/:
+
+    index.json        document table and the list of shards
+    terms-<xx>.json   postings for every term starting with prefix <xx>
+
+Each posting holds the document id, the precomputed BM25F weight of the
+term in that document and its delta-encoded token positions. Clients only
+fetch the shards their query terms fall into, sum weights, and use the
+positions to check phrase adjacency.
+
+assets/js/search.js implements the same tokenizer, stemmer and query logic
+for the browser. SearchIndex below reads the same files so results can be
+tested and benchmarked offline. Keep the two in sync.
+"""
+import json
+import math
+import os
+import re
+
+INDEX_VERSION = 1
+SHARD_PREFIX_LENGTH = 2
+INDEX_FILE = "index.json"
+SHARD_FILE = "terms-{}.json"
+
+# Fields in position order with their BM25F weights
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "summary": 1.5, "body": 1.0}
+# Gap between fields so phrase matches never span two fields
+FIELD_GAP = 100
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# ASCII only, matching JavaScript's regex semantics in assets/js/search.js
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have if in into is it its of on
+or that the their then there these this to was were will with
+""".split())
+
+# (suffix, replacement), first match wins; the stem must keep 3+ characters
+SUFFIX_RULES = [
+    ("izations", "iz"), ("ization", "iz"),
+    ("ations", "ate"), ("ation", "ate"),
+    ("nesses", ""), ("ness", ""),
+    ("ments", ""), ("ment", ""),
+    ("ingly", ""), ("ings", ""), ("ing", ""),
+    ("edly", ""), ("ed", ""),
+    ("sses", "ss"), ("ies", "y"),
+    ("ly", ""), ("es", "e"), ("s", ""),
+]
+# Suffixes after which a doubled final consonant is undone (running -> run)
+UNDOUBLE_AFTER = ("ingly", "ings", "ing", "edly", "ed")
+
+def stem(word):
+    """
+    Light suffix-stripping stemmer.
+    Deliberately simpler than Porter so it can be mirrored exactly in JS.
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+
+    for suffix, replacement in SUFFIX_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == "s" and word[-2] in "siu":
+                # class, analysis, status: not plurals
+                break
+            word = word[:-len(suffix)] + replacement
+            if (suffix in UNDOUBLE_AFTER and len(word) > 3
+                    and word[-1] == word[-2] and word[-1] not in "aeioulsz"):
+                word = word[:-1]
+            break
+
+    if len(word) > 3 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+def tokenize(text):
+    """
+    Split text into (position, term) pairs.
+    Stopwords are dropped but still advance the position counter, so phrase
+    offsets stay correct.
+    """
+    terms = []
+    for position, token in enumerate(TOKEN_PATTERN.findall(text.lower())):
+        if token not in STOPWORDS:
+            terms.append((position, stem(token)))
+    return terms
+
+def analyze_document(fields):
+    """
+    Tokenize a document's fields into per-term positions.
+
+    Args:
+        fields: {field name: text} for the names in FIELD_WEIGHTS.
+
+    Returns:
+        {"lengths": {field: token count},
+         "terms": {term: {field: [positions]}}}
+    """
+    lengths = {}
+    terms = {}
+    offset = 0
+    for field in FIELD_WEIGHTS:
+        tokens = tokenize(fields.get(field, ""))
+        lengths[field] = len(tokens)
+        last = -1
+        for position, term in tokens:
+            terms.setdefault(term, {}).setdefault(field, []).append(offset + position)
+            last = position
+        offset += last + 1 + FIELD_GAP
+    return {"lengths": lengths, "terms": terms}
+
+def build_index(documents, analyses):
+    """
+    Build the index from display documents and their analyses.
+
+    Args:
+        documents: List of dicts shown in results (title, url, ...). The
+            list position is the document id.
+        analyses: analyze_document() results, parallel to `documents`.
+
+    Returns:
+        (meta, shards) where shards maps a term prefix to {term: postings}.
+    """
+    doc_count = len(documents)
+    doc_lengths = [
+        sum(FIELD_WEIGHTS[field] * n for field, n in analysis["lengths"].items())
+        for analysis in analyses
+    ]
+    avg_length = (sum(doc_lengths) / doc_count) if doc_count else 0.0
+
+    doc_freq = {}
+    for analysis in analyses:
+        for term in analysis["terms"]:
+            doc_freq[term] = doc_freq.get(term, 0) + 1
+
+    shards = {}
+    for doc_id, analysis in enumerate(analyses):
+        length_norm = 1 - BM25_B + BM25_B * (doc_lengths[doc_id] / avg_length if avg_length else 1.0)
+        for term, by_field in analysis["terms"].items():
+            tf = sum(FIELD_WEIGHTS[field] * len(positions) for field, positions in by_field.items())
+            df = doc_freq[term]
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            weight = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+
+            positions = sorted(p for field_positions in by_field.values() for p in field_positions)
+            deltas = [positions[0]] + [b - a for a, b in zip(positions, positions[1:])]
+
+            shard = shards.setdefault(term[:SHARD_PREFIX_LENGTH], {})
+            shard.setdefault(term, []).append([doc_id, round(weight, 4), deltas])
+
+    meta = {
+        "version": INDEX_VERSION,
+        "prefixLength": SHARD_PREFIX_LENGTH,
+        "docs": documents,
+        "shards": sorted(shards)
+    }
+    return meta, shards
+
+def write_index(directory, meta, shards):
+    """Write index.json and shard files, removing shards that no longer exist."""
+    os.makedirs(directory, exist_ok=True)
+    keep = {SHARD_FILE.format(prefix) for prefix in shards}
+    for name in os.listdir(directory):
+        if name.startswith("terms-") and name.endswith(".json") and name not in keep:
+            os.remove(os.path.join(directory, name))
+
+    for prefix, terms in shards.items():
+        with open(os.path.join(directory, SHARD_FILE.format(prefix)), "w", encoding="utf-8") as f:
+            json.dump(terms, f, separators=(",", ":"), sort_keys=True)
+    with open(os.path.join(directory, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, separators=(",", ":"))
+
+def parse_query(query):
+    """
+    Split a query into clauses. Quoted text becomes a phrase clause, every
+    other word its own clause.
+
+    Returns:
+        List of clauses, each a list of (offset, term) pairs.
+    """
+    clauses = []
+    for phrase in PHRASE_PATTERN.findall(query):
+        terms = tokenize(phrase)
+        if terms:
+            start = terms[0][0]
+            clauses.append([(position - start, term) for position, term in terms])
+    for _, term in tokenize(PHRASE_PATTERN.sub(" ", query)):
+        clauses.append([(0, term)])
+    return clauses
+
+class SearchIndex:
+    """
+    Reader for an index written by write_index().
+    Shards are loaded lazily, exactly like the browser client does.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.docs = self.meta["docs"]
+        self._shards = {}
+
+    def postings(self, term):
+        """Return [[doc_id, weight, positions], ...] for an exact term."""
+        return self._shard(term[:self.meta["prefixLength"]]).get(term, [])
+
+    def prefix_postings(self, prefix):
+        """
+        Return postings for every term starting with `prefix`, merged by max
+        weight. A prefix shorter than the shard prefix (a single letter
+        typed so far) loads every shard it could fall into.
+        """
+        length = self.meta["prefixLength"]
+        if len(prefix) < length:
+            shards = [name for name in self.meta["shards"] if name.startswith(prefix)]
+        else:
+            shards = [prefix[:length]]
+        merged = {}
+        for shard in shards:
+            for term, postings in self._shard(shard).items():
+                if term.startswith(prefix):
+                    for doc_id, weight, deltas in postings:
+                        if doc_id not in merged or weight > merged[doc_id][1]:
+                            merged[doc_id] = [doc_id, weight, deltas]
+        return list(merged.values())
+
+    def search(self, query, limit=10, prefix=False):
+        """
+        Rank documents matching every clause of `query`.
+
+        Args:
+            query: Free text; "quoted words" must appear as a phrase.
+            limit: Maximum number of results.
+            prefix: Treat the last unquoted word as a prefix (search-as-you-type).
+
+        Returns:
+            List of (document, score) tuples, best first. Ties keep the
+            index order (newest first).
+        """
+        clauses = parse_query(query)
+        if not clauses:
+            return []
+
+        scores = None
+        for i, clause in enumerate(clauses):
+            is_last_word = prefix and i == len(clauses) - 1 and len(clause) == 1
+            matches = self._match_clause(clause, is_last_word)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {doc_id: scores[doc_id] + score for doc_id, score in matches.items() if doc_id in scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.docs[doc_id], round(score, 4)) for doc_id, score in ranked[:limit]]
+
+    def _match_clause(self, clause, as_prefix):
+        """Return {doc_id: score} for documents matching a word or phrase clause."""
+        if len(clause) == 1:
+            term = clause[0][1]
+            postings = self.prefix_postings(term) if as_prefix else self.postings(term)
+            return {doc_id: weight for doc_id, weight, _ in postings}
+
+        per_term = []
+        for offset, term in clause:
+            per_term.append((offset, {doc_id: (weight, deltas) for doc_id, weight, deltas in self.postings(term)}))
+
+        candidates = set(per_term[0][1])
+        for _, postings in per_term[1:]:
+            candidates &= set(postings)
+
+        matches = {}
+        for doc_id in candidates:
+            position_sets = [(offset, set(_decode(postings[doc_id][1]))) for offset, postings in per_term]
+            first_offset, first_positions = position_sets[0]
+            if any(all(start - first_offset + offset in positions for offset, positions in position_sets[1:])
+                   for start in first_positions):
+                matches[doc_id] = sum(postings[doc_id][0] for _, postings in per_term)
+        return matches
+
+    def _shard(self, prefix):
+        if prefix not in self._shards:
+            path = os.path.join(self.directory, SHARD_FILE.format(prefix))
+            if prefix in self.meta["shards"] and os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    self._shards[prefix] = json.load(f)
+            else:
+                self._shards[prefix] = {}
+        return self._shards[prefix]
+
+def _decode(deltas):
+    """Expand delta-encoded positions."""
+    positions = []
+    current = 0
+    for delta in deltas:
+        current += delta
+        positions.append(current)
+    return positions
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Query a built search index.")
+    parser.add_argument("query", help='Search terms; use "quotes" for phrases.')
+    parser.add_argument("--index", default="blog/search", help="Index directory (default: blog/search).")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum number of results.")
+    parser.add_argument("--prefix", action="store_true", help="Prefix-match the last word.")
+    parser.add_argument("--repeat", type=int, default=1, help="Run the query N times and report latency.")
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        results = index.search(args.query, limit=args.limit, prefix=args.prefix)
+    elapsed = time.perf_counter() - start
+
+    for doc, score in results:
+        print(f"{score:8.4f}  {doc['title']}  ({doc['url']})")
+    print(f"{len(results)} results, {elapsed / args.repeat * 1000:.3f} ms per query")
+
+if __name__ == "__main__":
+    main()